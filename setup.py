@@ -43,6 +43,7 @@ setup(
             "pytest-cov>=4.1.0",
             "pytest-xdist>=3.5.0",  # Optional: for parallel test execution
             "pytest-flask>=1.3.0",  # Optional: for Flask-specific testing
+            "aiosmtpd>=1.4.4",  # Local SMTP server for the mail outbox tests
         ]
     },
     python_requires=">=3.11",
@@ -0,0 +1,160 @@
+"""
+Role authorization from JWT claims.
+
+`handle_login` signs `role` and `user_id` into the access token, so staff
+endpoints authorize from the token instead of loading the user on every
+request. The token cannot know that the account was deactivated or given
+another role after it was issued, and access tokens live for a day, so
+`role_required` also checks the user against `user_status`: a per-worker
+cache of `(is_active, role)` that re-reads a user at most once every
+`AUTH_USER_CACHE_TTL` seconds (0 trusts the claims alone).
+
+Updating or deleting a `User` evicts it from this worker's cache once the
+change commits, and a read that raced with the commit is not cached;
+other workers see the change within the TTL.
+"""
+
+import functools
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from src.api import db
+from src.api.models import User
+from src.api.utils import create_api_response
+
+
+class UserStatusCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[float, bool, Optional[str]]] = {}
+        # Bumped by every revocation; reads that overlap one are not cached
+        self._generation = 0
+        self.ttl = 30.0
+
+    def init_app(self, app):
+        self.ttl = float(
+            app.config.get("AUTH_USER_CACHE_TTL", os.getenv("AUTH_USER_CACHE_TTL", 30))
+        )
+        self.clear()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def revoke(self, user_id: int):
+        """Forget `user_id` so its next request re-reads the account."""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(user_id, None)
+
+    def status(self, session, user_id: int) -> Tuple[bool, Optional[str]]:
+        """Return `(is_active, role)`; a missing user is inactive."""
+        now = time.monotonic()
+        cached = self._entries.get(user_id)
+        if cached and now - cached[0] < self.ttl:
+            return cached[1], cached[2]
+
+        generation = self._generation
+        row = session.execute(
+            select(User.is_active, User.role).where(User.id == user_id)
+        ).first()
+        is_active, role = (row.is_active, row.role.value) if row else (False, None)
+        with self._lock:
+            if generation == self._generation:
+                self._entries[user_id] = (now, is_active, role)
+        return is_active, role
+
+
+user_status = UserStatusCache()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    changed = [
+        user.id for user in (*session.dirty, *session.deleted) if isinstance(user, User)
+    ]
+    if changed:
+        session.info.setdefault("revoked_users", set()).update(changed)
+
+
+# Until the commit other requests still read the old account, so evicting
+# earlier would let them cache it again for the whole TTL
+@event.listens_for(Session, "after_commit")
+def _revoke_changed_users(session):
+    for user_id in session.info.pop("revoked_users", ()):
+        user_status.revoke(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop("revoked_users", None)
+
+
+def current_user_id() -> Optional[int]:
+    """The id of the user the current token was issued to."""
+    claims = get_jwt()
+    user_id = claims.get("user_id", get_jwt_identity())
+    try:
+        return int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def current_user(session) -> Optional[User]:
+    user_id = current_user_id()
+    return session.get(User, user_id) if user_id is not None else None
+
+
+def role_required(roles: Iterable[str], error: str = "Access denied"):
+    """
+    Allow only tokens whose `role` claim is one of `roles`.
+
+    Deactivated accounts get a 401 and accounts whose role changed since
+    login a 403, once `user_status` notices.
+    """
+    allowed = frozenset(roles)
+
+    def decorator(f):
+        @functools.wraps(f)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            role = get_jwt().get("role")
+            if role not in allowed:
+                return create_api_response(error=error, status_code=403)
+
+            if user_status.enabled:
+                user_id = current_user_id()
+                is_active, current_role = (
+                    user_status.status(db.session, user_id)
+                    if user_id is not None
+                    else (False, None)
+                )
+                if not is_active:
+                    return create_api_response(
+                        error="Account is disabled", status_code=401
+                    )
+                if current_role != role:
+                    return create_api_response(error=error, status_code=403)
+            return f(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+admin_required = role_required(["ADMIN"], "Admin privileges required")
+waiter_required = role_required(["WAITER"], "Waiter staff privileges required")
+kitchen_required = role_required(["KITCHEN"], "Access denied. Kitchen staff only.")
+staff_required = role_required(
+    ["ADMIN", "WAITER", "KITCHEN"], "Staff privileges required"
+)
@@ -0,0 +1,246 @@
+"""
+Reservation availability.
+
+A reservation only records when it starts; it holds its table for
+`RESERVATION_DURATION_MINUTES` (120 by default). `TableSchedule` keeps the
+start times of a table's pending and confirmed reservations sorted. Every
+reservation lasts the same time, so the end times are sorted too, and
+whether a slot is free takes two bisections.
+
+`Availability` is the floor for a date window: one schedule per table plus
+the tables ordered by chairs, which answers "which tables can seat 6 at
+20:30?" and picks the smallest table that fits. Built windows are cached
+per day in each worker and dropped when the shared `availability` version
+changes; reservation and table writes bump it once they commit, so they
+do not queue on the version row for the length of their transaction.
+
+Writes do not trust the cache: `check_reservation` locks the table row and
+reads that table's schedule from the database, so two concurrent requests
+cannot both book the same slot.
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+
+from src.api.cache_versions import SharedVersion
+from src.api.models import Reservation, Table, reservation_status
+
+AVAILABILITY = "availability"
+
+# Reservations that hold their table
+HOLDING_STATUSES = (reservation_status.PENDING, reservation_status.CONFIRMED)
+
+# Days of built availability each worker keeps
+MAX_CACHED_DAYS = 31
+
+
+class TableSchedule:
+    """Sorted reservation starts of one table."""
+
+    def __init__(self, duration: timedelta):
+        self.duration = duration
+        self._starts: List[datetime] = []
+        self._ids: List[int] = []
+
+    def __len__(self):
+        return len(self._starts)
+
+    def add(self, start: datetime, reservation_id: int):
+        i = bisect_right(self._starts, start)
+        self._starts.insert(i, start)
+        self._ids.insert(i, reservation_id)
+
+    def conflicts(self, start: datetime) -> List[int]:
+        """Ids of reservations overlapping one that starts at `start`."""
+        lo = bisect_right(self._starts, start - self.duration)
+        hi = bisect_left(self._starts, start + self.duration)
+        return self._ids[lo:hi]
+
+    def is_free(self, start: datetime, exclude_id: Optional[int] = None) -> bool:
+        return all(rid == exclude_id for rid in self.conflicts(start))
+
+    def free_slots(self, opens: datetime, closes: datetime):
+        """
+        Gaps in `[opens, closes)` long enough for a whole reservation.
+
+        A reservation fits in a gap `(a, b)` if it starts between `a` and
+        `b - duration`.
+        """
+        lo = bisect_right(self._starts, opens - self.duration)
+        hi = bisect_left(self._starts, closes)
+        slots = []
+        cursor = opens
+        for start in self._starts[lo:hi]:
+            if start - cursor >= self.duration:
+                slots.append((cursor, start))
+            cursor = max(cursor, start + self.duration)
+        if closes - cursor >= self.duration:
+            slots.append((cursor, closes))
+        return slots
+
+
+class Availability:
+    """Table schedules for one date window, with tables ordered by chairs."""
+
+    def __init__(
+        self,
+        tables: Iterable[Table],
+        reservations: Iterable[Tuple[int, int, datetime]],
+        duration: timedelta,
+    ):
+        self.duration = duration
+        self.tables = {table.id: table.serialize() for table in tables}
+        self._by_chairs = sorted(
+            (table["chairs"], table_id) for table_id, table in self.tables.items()
+        )
+        self._chairs = [chairs for chairs, _ in self._by_chairs]
+        self.schedules = {table_id: TableSchedule(duration) for table_id in self.tables}
+        for reservation_id, table_id, start in reservations:
+            if table_id in self.schedules:
+                self.schedules[table_id].add(start, reservation_id)
+
+    def seating(self, party: int) -> List[int]:
+        """Ids of tables with room for `party`, smallest first."""
+        i = bisect_left(self._chairs, party)
+        return [table_id for _, table_id in self._by_chairs[i:]]
+
+    def free_tables(self, party: int, start: datetime) -> List[int]:
+        return [
+            table_id
+            for table_id in self.seating(party)
+            if self.schedules[table_id].is_free(start)
+        ]
+
+    def best_fit(self, party: int, start: datetime) -> Optional[int]:
+        """The smallest free table that seats `party` at `start`, if any."""
+        for table_id in self.seating(party):
+            if self.schedules[table_id].is_free(start):
+                return table_id
+        return None
+
+
+def load_availability(session, window_start, window_end, duration) -> Availability:
+    """Build `Availability` for reservations overlapping the window."""
+    tables = session.scalars(select(Table).order_by(Table.id)).all()
+    reservations = session.execute(
+        select(Reservation.id, Reservation.table_id, Reservation.start_date_time)
+        .where(
+            Reservation.table_id.isnot(None),
+            Reservation.status.in_(HOLDING_STATUSES),
+            Reservation.start_date_time > window_start - duration,
+            Reservation.start_date_time < window_end,
+        )
+        .order_by(Reservation.start_date_time)
+    ).all()
+    return Availability(tables, reservations, duration)
+
+
+def parse_clock(value: str) -> time:
+    return datetime.strptime(value, "%H:%M").time()
+
+
+class AvailabilityCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._days: Dict[date, Tuple[int, Availability]] = {}
+        self._version = SharedVersion(AVAILABILITY)
+        self.duration = timedelta(minutes=120)
+        self.opens = time(12, 0)
+        self.closes = time(23, 0)
+
+    def init_app(self, app):
+        self.duration = timedelta(
+            minutes=int(app.config.get("RESERVATION_DURATION_MINUTES", 120))
+        )
+        self.opens = parse_clock(app.config.get("RESERVATION_OPENS", "12:00"))
+        self.closes = parse_clock(app.config.get("RESERVATION_CLOSES", "23:00"))
+        self._version.ttl = float(app.config.get("AVAILABILITY_VERSION_TTL", 5))
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
+        self._version.reset()
+
+    def bump(self, session):
+        """
+        Call in the transaction of any reservation or table write; the
+        shared version is bumped once it commits.
+        """
+        self._version.bump_after_commit(session)
+
+    def opening_hours(self, day: date) -> Tuple[datetime, datetime]:
+        """
+        When reservations can be made on `day`; a closing time at or
+        before the opening time is on the next morning.
+        """
+        opens = datetime.combine(day, self.opens)
+        closes = datetime.combine(day, self.closes)
+        if closes <= opens:
+            closes += timedelta(days=1)
+        return opens, closes
+
+    def day_window(self, day: date) -> Tuple[datetime, datetime]:
+        """The calendar day plus any opening hours past midnight."""
+        start = datetime.combine(day, time.min)
+        return start, max(start + timedelta(days=1), self.opening_hours(day)[1])
+
+    def for_day(self, session, day: date) -> Availability:
+        version = self._version.current(session)
+        cached = self._days.get(day)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        start, end = self.day_window(day)
+        availability = load_availability(session, start, end, self.duration)
+        with self._lock:
+            self._days = {
+                d: entry for d, entry in self._days.items() if entry[0] == version
+            }
+            if len(self._days) >= MAX_CACHED_DAYS:
+                self._days.pop(min(self._days))
+            self._days[day] = (version, availability)
+        return availability
+
+    def check_reservation(
+        self,
+        session,
+        table_id: int,
+        start: datetime,
+        party: int,
+        exclude_id: Optional[int] = None,
+    ) -> Optional[Tuple[str, int]]:
+        """
+        Return `(error, status_code)` if the table cannot take the booking.
+
+        Locks the table row until the caller's transaction ends, so checks
+        for the same table run one at a time.
+        """
+        table = session.scalars(
+            select(Table).where(Table.id == table_id).with_for_update()
+        ).first()
+        if table is None:
+            return "Mesa no encontrada", 404
+        if party > table.chairs:
+            return f"La mesa {table.number} tiene {table.chairs} sillas", 400
+
+        schedule = TableSchedule(self.duration)
+        for reservation_id, reserved_at in session.execute(
+            select(Reservation.id, Reservation.start_date_time).where(
+                Reservation.table_id == table_id,
+                Reservation.status.in_(HOLDING_STATUSES),
+                Reservation.start_date_time > start - self.duration,
+                Reservation.start_date_time < start + self.duration,
+            )
+        ):
+            schedule.add(reserved_at, reservation_id)
+        if not schedule.is_free(start, exclude_id):
+            return f"La mesa {table.number} ya está reservada en ese horario", 409
+        return None
+
+
+availability_cache = AvailabilityCache()
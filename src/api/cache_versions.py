@@ -0,0 +1,112 @@
+"""
+Version counters shared by every worker through the `cache_versions` table.
+
+Caches that live in each worker's memory tag their contents with a counter
+that writers bump when they change the cached data. Readers re-check the
+counter at most once every `ttl` seconds, so a worker serves at most `ttl`
+seconds of stale data after another worker's write.
+
+Bumping locks the counter's row until the bumping transaction ends. Busy
+writers use `bump_after_commit`, which bumps in a transaction of its own
+right after theirs commits, so the row is held for one statement instead
+of for every write request in turn. A reader that caches the old data
+under the old version between the two still sees the bump afterwards. If
+the process dies in between, workers serve the old data until the next
+bump.
+"""
+
+import threading
+import time
+
+from sqlalchemy import event, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from src.api.models import CacheVersion
+
+
+class SharedVersion:
+    def __init__(self, name: str, ttl: float = 5.0):
+        self.name = name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = 0.0
+
+    def reset(self):
+        with self._lock:
+            self._version = None
+            self._checked_at = 0.0
+
+    def current(self, session) -> int:
+        now = time.monotonic()
+        if self._version is None or now - self._checked_at >= self.ttl:
+            version = session.scalar(
+                select(CacheVersion.version).where(CacheVersion.name == self.name)
+            )
+            with self._lock:
+                self._version = version or 0
+                self._checked_at = now
+        return self._version
+
+    def bump(self, session) -> int:
+        """
+        Increment the version inside the caller's transaction.
+
+        Call this before committing the write it describes.
+        """
+        stmt = (
+            insert(CacheVersion)
+            .values(name=self.name, version=1)
+            .on_conflict_do_update(
+                index_elements=[CacheVersion.name],
+                set_={"version": CacheVersion.version + 1},
+            )
+            .returning(CacheVersion.version)
+        )
+        version = session.execute(stmt).scalar_one()
+        with self._lock:
+            # Re-read the version on the next request rather than trusting
+            # it now: the write is not committed yet
+            self._checked_at = 0.0
+        return version
+
+    def bump_after_commit(self, session):
+        """Increment the version once the caller's transaction commits."""
+        bumps = session.info.setdefault("version_bumps", [])
+        if self not in bumps:
+            bumps.append(self)
+
+    def advance(self, session, version: int) -> int:
+        """Raise the version to at least `version`, like `bump`."""
+        stmt = insert(CacheVersion).values(name=self.name, version=version)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CacheVersion.name],
+            set_={"version": func.greatest(CacheVersion.version, version)},
+        ).returning(CacheVersion.version)
+        version = session.execute(stmt).scalar_one()
+        with self._lock:
+            self._checked_at = 0.0
+        return version
+
+
+def bump_committed(session, versions):
+    """Bump `versions` in one short transaction of their own."""
+    try:
+        with session.get_bind().begin() as connection:
+            for version in versions:
+                version.bump(connection)
+    except Exception as e:
+        print("Could not bump cache versions:", e)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_versions(session):
+    versions = session.info.pop("version_bumps", None)
+    if versions:
+        bump_committed(session, versions)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_versions(session):
+    session.info.pop("version_bumps", None)
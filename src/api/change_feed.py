@@ -0,0 +1,226 @@
+"""
+Change feed for terminals that keep a local copy of the floor.
+
+Every flush that inserts, updates or deletes an order, order detail, table
+or reservation (cascaded deletes included) appends one `change_log` row per
+changed row, in the same transaction and with one multi-row `INSERT`. A terminal keeps the `seq` of
+the last change it applied as its token and asks for what came after; it
+gets the current state of changed rows and tombstones for deleted ones, so
+it stays current without re-downloading lists and can catch up after an
+outage as long as its token is still in the log.
+
+Sequence numbers are taken when a row is written but become visible when
+its transaction commits, so a reader can see seq 12 before seq 11 commits.
+The feed therefore never moves a token past a gap in the sequence unless
+the first change after the gap is older than `SYNC_GAP_TIMEOUT`; by then
+the gap is a rolled back transaction, not a running one. Rows after an
+unsettled gap are left for the next poll.
+
+Writes that bypass the ORM unit of work (bulk `UPDATE`/`DELETE` statements
+on these tables) are not logged.
+"""
+
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, select
+from sqlalchemy.orm import Session
+
+from src.api.cache_versions import SharedVersion
+from src.api.date_windows import date_windows
+from src.api.models import (
+    ACTIVE_ORDER_STATUSES,
+    ChangeLog,
+    Order,
+    OrderDetail,
+    Reservation,
+    Table,
+)
+from src.api.order_queries import load_orders, select_orders
+
+SYNCED = {
+    model.__tablename__: model for model in (Order, OrderDetail, Table, Reservation)
+}
+
+# Highest seq deleted by `prune`; older tokens must resync
+PRUNED = "change_log_pruned"
+
+
+def _row_deleted(mapper, connection, target):
+    # Rows removed by a delete-orphan cascade (an order's details replaced
+    # by `set_details`) never appear in `session.deleted`; the mapper event
+    # sees every row the flush deletes
+    session = inspect(target).session
+    if session is not None:
+        deleted = session.info.setdefault("synced_deletes", set())
+        deleted.add((target.__tablename__, target.id))
+
+
+for model in SYNCED.values():
+    event.listen(model, "after_delete", _row_deleted)
+
+
+@event.listens_for(Session, "after_flush")
+def _log_changes(session, flush_context):
+    changes = {}
+    for obj in (*session.new, *session.dirty):
+        entity = getattr(obj, "__tablename__", None)
+        if entity not in SYNCED:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        changes[(entity, obj.id)] = False
+    for key in session.info.pop("synced_deletes", ()):
+        changes[key] = True
+    if changes:
+        session.connection().execute(
+            insert(ChangeLog),
+            [
+                {"entity": entity, "entity_id": entity_id, "deleted": deleted}
+                for (entity, entity_id), deleted in changes.items()
+            ],
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_deletes(session):
+    session.info.pop("synced_deletes", None)
+
+
+def serialize(entity: str, obj) -> Dict:
+    data = obj.serialize()
+    if entity == "order_details":
+        data["order_id"] = obj.order_id
+    return data
+
+
+def load_rows(session, entity: str, ids) -> List[Dict]:
+    model = SYNCED[entity]
+    stmt = select_orders() if model is Order else select(model)
+    rows = session.scalars(stmt.where(model.id.in_(ids)).order_by(model.id))
+    return [serialize(entity, obj) for obj in rows.unique()]
+
+
+class ChangeFeed:
+    def __init__(self):
+        self.max_changes = 1000
+        self.gap_timeout = timedelta(seconds=10)
+        self.retention = timedelta(days=7)
+        self._pruned = SharedVersion(PRUNED)
+
+    def init_app(self, app):
+        self.max_changes = int(app.config.get("SYNC_MAX_CHANGES", 1000))
+        self.gap_timeout = timedelta(
+            seconds=float(app.config.get("SYNC_GAP_TIMEOUT", 10))
+        )
+        self.retention = timedelta(
+            days=float(app.config.get("CHANGE_LOG_RETENTION_DAYS", 7))
+        )
+        self._pruned.reset()
+
+    def settled_token(self, session) -> int:
+        """A token no running transaction can still write before."""
+        settled = session.scalar(
+            select(func.max(ChangeLog.seq)).where(
+                ChangeLog.changed_at < func.clock_timestamp() - self.gap_timeout
+            )
+        )
+        return max(settled or 0, self._pruned.current(session))
+
+    def snapshot(self, session) -> Dict:
+        """
+        What a terminal needs to start syncing: every table, the active
+        orders with their details and reservations from today on.
+        """
+        # Taken first: changes after it are sent again, never missed
+        token = self.settled_token(session)
+        orders = load_orders(
+            session,
+            select_orders(Order.status.in_(ACTIVE_ORDER_STATUSES)).order_by(Order.id),
+        )
+        today = datetime.combine(date_windows.today(), time.min)
+        reservations = session.scalars(
+            select(Reservation)
+            .where(Reservation.start_date_time >= today)
+            .order_by(Reservation.id)
+        )
+        details = [d for order in orders for d in order.details]
+        return {
+            "token": str(token),
+            "reset": True,
+            "changes": {
+                "orders": [serialize("orders", o) for o in orders],
+                "order_details": [serialize("order_details", d) for d in details],
+                "tables": [
+                    t.serialize()
+                    for t in session.scalars(select(Table).order_by(Table.id))
+                ],
+                "reservations": [r.serialize() for r in reservations],
+            },
+            "deleted": {entity: [] for entity in SYNCED},
+            "has_more": False,
+        }
+
+    def changes_since(self, session, token: Optional[int]) -> Dict:
+        """
+        Changes after `token`, or a fresh snapshot when there is no token
+        or the log no longer goes back that far.
+        """
+        if token is None or token < self._pruned.current(session):
+            return self.snapshot(session)
+
+        rows = session.execute(
+            select(
+                ChangeLog.seq,
+                ChangeLog.entity,
+                ChangeLog.entity_id,
+                ChangeLog.deleted,
+                (func.clock_timestamp() - ChangeLog.changed_at).label("age"),
+            )
+            .where(ChangeLog.seq > token)
+            .order_by(ChangeLog.seq)
+            .limit(self.max_changes + 1)
+        ).all()
+
+        latest: Dict[tuple, bool] = {}
+        last = token
+        has_more = len(rows) > self.max_changes
+        for row in rows[: self.max_changes]:
+            if row.seq != last + 1 and row.age < self.gap_timeout:
+                # An earlier change may not be committed yet
+                has_more = False
+                break
+            latest[(row.entity, row.entity_id)] = row.deleted
+            last = row.seq
+
+        upserts: Dict[str, List[int]] = {entity: [] for entity in SYNCED}
+        deleted: Dict[str, List[int]] = {entity: [] for entity in SYNCED}
+        for (entity, entity_id), is_deleted in latest.items():
+            (deleted if is_deleted else upserts)[entity].append(entity_id)
+
+        return {
+            "token": str(last),
+            "reset": False,
+            "changes": {
+                entity: load_rows(session, entity, ids) if ids else []
+                for entity, ids in upserts.items()
+            },
+            "deleted": {entity: sorted(ids) for entity, ids in deleted.items()},
+            "has_more": has_more,
+        }
+
+    def prune(self, session) -> int:
+        """Delete changes older than the retention period."""
+        cutoff = session.scalar(
+            select(func.max(ChangeLog.seq)).where(
+                ChangeLog.changed_at < func.clock_timestamp() - self.retention
+            )
+        )
+        if cutoff is None:
+            return 0
+        self._pruned.advance(session, cutoff)
+        result = session.execute(delete(ChangeLog).where(ChangeLog.seq <= cutoff))
+        return result.rowcount
+
+
+change_feed = ChangeFeed()
@@ -1,5 +1,7 @@
 from src.api import db
 from src.api.models import User
+from src.api import query_advisor, sales_rollup
+from src.api.change_feed import change_feed
 import click
 
 """
@@ -37,3 +39,72 @@ def setup_commands(app):
     @app.cli.command("insert-test-data")
     def insert_test_data():
         pass
+
+    @app.cli.command("rebuild-daily-sales")
+    def rebuild_daily_sales():
+        """Recompute the daily_sales rollup from all orders."""
+        days = sales_rollup.rebuild(db.session)
+        db.session.commit()
+        print(f"daily_sales rebuilt: {days} days")
+
+    @app.cli.command("compact-daily-sales")
+    def compact_daily_sales():
+        """Fold the pending daily_sales_deltas into daily_sales."""
+        days = sales_rollup.compact(db.session)
+        db.session.commit()
+        if days is None:
+            print("daily_sales compaction already running")
+        else:
+            print(f"daily_sales compacted: {days} days")
+
+    @app.cli.command("check-daily-sales")
+    @click.option("--repair", is_flag=True, help="Rebuild the rollup on mismatch.")
+    def check_daily_sales(repair):
+        """Compare the daily_sales rollup with the orders table."""
+        mismatches = sales_rollup.check(db.session)
+        if not mismatches:
+            print("daily_sales is consistent with orders")
+            return
+        for mismatch in mismatches:
+            print(
+                f"{mismatch['date']}: rollup {mismatch['rollup']}, "
+                f"orders {mismatch['expected']}"
+            )
+        if repair:
+            sales_rollup.rebuild(db.session)
+            db.session.commit()
+            print(f"Repaired {len(mismatches)} days")
+        else:
+            raise SystemExit(1)
+
+    @app.cli.command("prune-change-log")
+    def prune_change_log():
+        """Delete sync changes older than CHANGE_LOG_RETENTION_DAYS."""
+        deleted = change_feed.prune(db.session)
+        db.session.commit()
+        print(f"change_log pruned: {deleted} changes")
+
+    @app.cli.command("explain-queries")
+    @click.option(
+        "--planner-choice",
+        is_flag=True,
+        help="Keep sequential scans enabled and show the planner's real choice.",
+    )
+    def explain_queries(planner_choice):
+        """EXPLAIN the hot endpoint queries and flag sequential scans."""
+        try:
+            reports = query_advisor.advise(db.session, planner_choice)
+        finally:
+            db.session.rollback()
+
+        flagged = 0
+        for report in reports:
+            if report["seq_scans"]:
+                flagged += 1
+                status = "FULL SCAN of " + ", ".join(report["seq_scans"])
+            else:
+                status = "ok (" + ", ".join(report["indexes"] or ["no scan"]) + ")"
+            print(f"{report['query']:<40} {status}")
+        if flagged:
+            print(f"{flagged} of {len(reports)} queries scan a whole table")
+            raise SystemExit(1)
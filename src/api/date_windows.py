@@ -0,0 +1,100 @@
+"""
+Date windows for filtering timestamp columns.
+
+`start_date_time` and the other timestamps hold naive wall-clock times in
+the restaurant's time zone (`RESTAURANT_TIMEZONE`, UTC by default). A
+"day" is therefore `[00:00, next 00:00)` of local time, and filters are
+written as `column >= start AND column < end`: unlike `date(column) = day`
+that comparison can use an index on the column.
+
+Instants sent with a UTC offset (`2026-05-01T18:00:00Z`) are converted to
+restaurant time before comparing; "today" is today where the restaurant is.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import NamedTuple, Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import and_
+
+
+class Window(NamedTuple):
+    start: datetime
+    end: datetime
+
+    def serialize(self):
+        return {"start": self.start.isoformat(), "end": self.end.isoformat()}
+
+
+def parse_day(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def within(column, window: Window):
+    """`window.start <= column < window.end`, in a form an index can serve."""
+    return and_(column >= window.start, column < window.end)
+
+
+class DateWindows:
+    def __init__(self):
+        self.tz = ZoneInfo("UTC")
+
+    def init_app(self, app):
+        self.tz = ZoneInfo(app.config.get("RESTAURANT_TIMEZONE", "UTC"))
+
+    def today(self) -> date:
+        return datetime.now(self.tz).date()
+
+    def local(self, value: datetime) -> datetime:
+        """Naive restaurant time for `value`; naive values already are."""
+        if value.tzinfo is None:
+            return value
+        return value.astimezone(self.tz).replace(tzinfo=None)
+
+    def day(self, day: date) -> Window:
+        start = datetime.combine(day, time.min)
+        return Window(start, start + timedelta(days=1))
+
+    def week(self, day: date) -> Window:
+        """Monday to Sunday around `day`."""
+        start = datetime.combine(day - timedelta(days=day.weekday()), time.min)
+        return Window(start, start + timedelta(days=7))
+
+    def window(self, since: str, until: str) -> Window:
+        """
+        Parse a `from`/`to` pair of ISO dates or datetimes.
+
+        A bare date in `to` includes that whole day. Raises ValueError for
+        malformed values or an empty window.
+        """
+        start = self.parse_bound(since)
+        end = self.parse_bound(until, end_of_day=True)
+        if end <= start:
+            raise ValueError("empty window")
+        return Window(start, end)
+
+    def parse_bound(self, value: str, end_of_day: bool = False) -> datetime:
+        value = value.strip()
+        if len(value) == 10:
+            bound = datetime.combine(parse_day(value), time.min)
+            return bound + timedelta(days=1) if end_of_day else bound
+        return self.local(datetime.fromisoformat(value.replace("Z", "+00:00")))
+
+    def from_args(self, args) -> Optional[Window]:
+        """
+        The window selected by `date`, `week` or `from`/`to` in `args`, if
+        any. Raises ValueError for malformed values.
+        """
+        if args.get("date", "").strip():
+            return self.day(parse_day(args["date"].strip()))
+        if args.get("week", "").strip():
+            return self.week(parse_day(args["week"].strip()))
+        since, until = args.get("from", "").strip(), args.get("to", "").strip()
+        if since or until:
+            if not (since and until):
+                raise ValueError("from and to go together")
+            return self.window(since, until)
+        return None
+
+
+date_windows = DateWindows()
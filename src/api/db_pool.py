@@ -0,0 +1,238 @@
+"""
+Database connection pool settings and pool metrics.
+
+Every gunicorn worker has its own pool, so the number of connections
+Postgres sees is workers x (`DB_POOL_SIZE` + `DB_MAX_OVERFLOW`), plus one
+per worker for each of the floor and order listeners.
+
+Workers run many threads (`--threads` in the Procfile and render.yaml)
+because every kitchen or floor stream holds one for as long as the screen
+is open. Streams give their connection back after the snapshot, so they do
+not count against the pool; every other request in flight holds a
+connection. `DB_POOL_SIZE` + `DB_MAX_OVERFLOW` is therefore the number of
+regular requests a worker serves at once, and further ones wait up to
+`DB_POOL_TIMEOUT` for a connection. Size it for the regular traffic, with
+threads = expected open streams + pool size + overflow, and raise the two
+together. The pool is configured from the environment:
+
+- `DB_POOL_SIZE` (5), `DB_MAX_OVERFLOW` (10): connections kept open and
+  extra ones opened under load.
+- `DB_POOL_TIMEOUT` (30): seconds a request waits for a free connection
+  before failing.
+- `DB_POOL_RECYCLE` (1800): seconds after which a connection is replaced,
+  ahead of server or load balancer idle timeouts; -1 keeps them.
+- `DB_POOL_PRE_PING` (true): test connections on checkout, so one the
+  server closed is replaced instead of failing a request.
+- `DB_STATEMENT_TIMEOUT_MS` (0, off): cancel statements that run longer.
+  Exports switch it off for their own transaction.
+- `DB_PGBOUNCER` (false): the database URL points at pgbouncer in
+  transaction pooling mode. Session state is not kept between
+  transactions there, so the statement timeout is set with `SET LOCAL` in
+  every transaction instead of as a connection option, drivers that
+  prepare statements (psycopg 3, asyncpg) are told not to, and the floor
+  and order listeners, which need `LISTEN`, are off unless `FLOOR_LISTEN`
+  and `ORDER_LISTEN` say otherwise. psycopg2 never prepares statements.
+
+`pool_metrics` counts checkouts, new connections, invalidations and
+timeouts and times how long checkouts take; the admin metrics endpoint
+reports them with the pool's current size and the server's
+`max_connections` to size pools against.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+from sqlalchemy.pool import QueuePool
+
+from src.api.request_metrics import Counter, Histogram
+
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30)
+
+GAUGES = {
+    "db_pool_size": "Connections the pool keeps open.",
+    "db_pool_max_overflow": "Extra connections the pool may open under load.",
+    "db_pool_checked_out": "Connections in use.",
+    "db_pool_idle": "Open connections waiting in the pool.",
+    "db_pool_overflow": "Extra connections currently open.",
+    "db_server_max_connections": "Postgres max_connections.",
+    "db_server_connections": "Connections open to this database, all clients.",
+}
+
+TRUE = ("1", "true", "yes", "on")
+
+
+def env_flag(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return default if value is None else value.strip().lower() in TRUE
+
+
+def pool_config(db_url: str) -> Dict:
+    """Flask config for the database pool, from the environment."""
+    pgbouncer = env_flag("DB_PGBOUNCER", False)
+    statement_timeout = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+    options = {
+        "poolclass": TimedQueuePool,
+        "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+        "pool_pre_ping": env_flag("DB_POOL_PRE_PING", True),
+    }
+    connect_args = {}
+    driver = make_url(db_url).get_driver_name()
+    if pgbouncer:
+        if driver == "psycopg":
+            connect_args["prepare_threshold"] = None
+        elif driver == "asyncpg":
+            connect_args["statement_cache_size"] = 0
+    elif statement_timeout and driver in ("psycopg2", "psycopg"):
+        connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+    if connect_args:
+        options["connect_args"] = connect_args
+    return {
+        "SQLALCHEMY_ENGINE_OPTIONS": options,
+        "DB_PGBOUNCER": pgbouncer,
+        "DB_STATEMENT_TIMEOUT_MS": statement_timeout,
+    }
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long checkouts wait for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeout:
+            pool_metrics.timed_out()
+            raise
+        finally:
+            pool_metrics.waited(time.perf_counter() - start)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self.clear()
+
+    def init_app(self, app, engine):
+        self.clear()
+        self._pool = engine.pool
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "invalidate", self._on_invalidate)
+        timeout = app.config.get("DB_STATEMENT_TIMEOUT_MS")
+        if app.config.get("DB_PGBOUNCER") and timeout:
+            event.listen(engine, "begin", set_local_timeout(timeout))
+
+    def clear(self):
+        labels = ("worker",)
+        with self._lock:
+            self.checkouts = Counter(
+                "db_pool_checkouts_total", "Connections taken from the pool.", labels
+            )
+            self.connects = Counter(
+                "db_pool_connects_total", "New database connections opened.", labels
+            )
+            self.invalidations = Counter(
+                "db_pool_invalidations_total",
+                "Connections discarded after an error.",
+                labels,
+            )
+            self.timeouts = Counter(
+                "db_pool_timeouts_total",
+                "Checkouts that gave up after DB_POOL_TIMEOUT.",
+                labels,
+            )
+            self.wait = Histogram(
+                "db_pool_checkout_wait_seconds",
+                "Time spent getting a connection, including opening new ones.",
+                labels,
+                WAIT_BUCKETS,
+            )
+
+    def _labels(self):
+        return (os.getpid(),)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects.inc(self._labels())
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts.inc(self._labels())
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations.inc(self._labels())
+
+    def timed_out(self):
+        with self._lock:
+            self.timeouts.inc(self._labels())
+
+    def waited(self, seconds: float):
+        with self._lock:
+            self.wait.observe(self._labels(), seconds)
+
+    def gauges(self) -> Dict[str, float]:
+        pool = self._pool
+        if pool is None or not isinstance(pool, QueuePool):
+            return {}
+        return {
+            "db_pool_size": pool.size(),
+            "db_pool_max_overflow": pool._max_overflow,
+            "db_pool_checked_out": pool.checkedout(),
+            "db_pool_idle": pool.checkedin(),
+            "db_pool_overflow": max(pool.overflow(), 0),
+        }
+
+    def render(self, server: Optional[Dict[str, float]] = None) -> str:
+        """Pool metrics, and server ones if given, in the Prometheus format."""
+        worker = f'{{worker="{os.getpid()}"}}'
+        lines = []
+        gauges = [(name, worker, value) for name, value in self.gauges().items()]
+        gauges += [(name, "", value) for name, value in (server or {}).items()]
+        for name, labels, value in gauges:
+            lines.append(f"# HELP {name} {GAUGES[name]}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name}{labels} {value}")
+        with self._lock:
+            for metric in (
+                self.checkouts,
+                self.connects,
+                self.invalidations,
+                self.timeouts,
+                self.wait,
+            ):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+pool_metrics = PoolMetrics()
+
+
+def set_local_timeout(timeout_ms: int):
+    statement = f"SET LOCAL statement_timeout = {int(timeout_ms)}"
+
+    def begin(connection):
+        connection.exec_driver_sql(statement)
+
+    return begin
+
+
+def server_connections(session) -> Dict[str, float]:
+    """Postgres' connection limit and the connections open to this database."""
+    limit = session.scalar(text("SHOW max_connections"))
+    used = session.scalar(
+        text(
+            "SELECT count(*) FROM pg_stat_activity "
+            "WHERE datname = current_database()"
+        )
+    )
+    return {"db_server_max_connections": int(limit), "db_server_connections": used}
@@ -0,0 +1,218 @@
+"""
+Ingredient demand and depletion forecast for procurement.
+
+Dish and drink sales are turned into ingredient demand with two sparse
+matrices instead of walking `ProductIngredient` rows for every order line:
+
+- the recipe matrix R (products x ingredients), built from every
+  `ProductIngredient` row, duplicates summed;
+- the sales matrix S (days x products), built from `OrderDetail`
+  quantities summed per local day and product in SQL, cancelled orders
+  excluded.
+
+S @ R gives the units of every ingredient used on every day of the
+history window. Its mean over the window is the expected daily demand;
+dividing the current `Ingredient.stock` by it gives the days until an
+ingredient reaches its minimum and runs out.
+
+The daily demand only changes when the day or the recipes do, so each
+worker keeps it per history length for `FORECAST_CACHE_TTL` seconds (600
+by default). Stock is read on every request, so forecasts follow orders
+and deliveries straight away.
+"""
+
+import math
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Tuple
+
+import numpy as np
+from scipy import sparse
+from sqlalchemy import Integer, cast, func, select
+
+from src.api.date_windows import Window, date_windows, within
+from src.api.models import (
+    Ingredient,
+    Order,
+    OrderDetail,
+    ProductIngredient,
+    order_status,
+)
+
+# Entries kept per worker; there is one per history length in use
+CACHE_SIZE = 16
+# Longest history and horizon the endpoint accepts, in days
+MAX_DAYS = 3650
+MAX_HORIZON = 365
+
+
+def recipe_matrix(session) -> Tuple[np.ndarray, np.ndarray, sparse.csr_matrix]:
+    """Sorted product ids, sorted ingredient ids and R between them."""
+    rows = session.execute(
+        select(
+            ProductIngredient.product_id,
+            ProductIngredient.ingredient_id,
+            ProductIngredient.quantity,
+        )
+    ).all()
+    if not rows:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty, sparse.csr_matrix((0, 0))
+    columns = np.array(rows, dtype=np.float64)
+    product_ids, product_index = np.unique(
+        columns[:, 0].astype(np.int64), return_inverse=True
+    )
+    ingredient_ids, ingredient_index = np.unique(
+        columns[:, 1].astype(np.int64), return_inverse=True
+    )
+    recipes = sparse.coo_matrix(
+        (columns[:, 2], (product_index, ingredient_index)),
+        shape=(len(product_ids), len(ingredient_ids)),
+    )
+    return product_ids, ingredient_ids, recipes.tocsr()
+
+
+def sales_matrix(session, window: Window, product_ids: np.ndarray):
+    """S for the days of `window` and the columns of `product_ids`."""
+    start = window.start.date()
+    days = (window.end.date() - start).days
+    product_id = func.coalesce(OrderDetail.dish_id, OrderDetail.drink_id)
+    day = cast(func.date(Order.created_at) - start, Integer)
+    rows = session.execute(
+        select(day, product_id, func.sum(OrderDetail.quantity))
+        .join(Order, OrderDetail.order_id == Order.id)
+        .where(
+            within(Order.created_at, window),
+            Order.status != order_status.CANCELLED,
+            product_id.in_(product_ids.tolist()),
+        )
+        .group_by(day, product_id)
+    ).all()
+    if not rows:
+        return sparse.csr_matrix((days, len(product_ids)))
+    # One 2-D conversion is much faster than building each column from rows
+    columns = np.array(rows, dtype=np.float64)
+    day_index = columns[:, 0].astype(np.int64)
+    product_index = np.searchsorted(product_ids, columns[:, 1].astype(np.int64))
+    sales = sparse.coo_matrix(
+        (columns[:, 2], (day_index, product_index)),
+        shape=(days, len(product_ids)),
+    )
+    return sales.tocsr()
+
+
+def history_window(today: date, days: int) -> Window:
+    """The `days` full days before `today`."""
+    end = datetime.combine(today, datetime.min.time())
+    return Window(end - timedelta(days=days), end)
+
+
+class DemandForecast:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._demand: Dict[Tuple[date, int], Tuple[float, Tuple]] = {}
+        self.ttl = 600.0
+
+    def init_app(self, app):
+        self.ttl = float(app.config.get("FORECAST_CACHE_TTL", 600))
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._demand.clear()
+
+    def daily_demand(
+        self, session, today: date, days: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Ingredient ids used by any recipe and their mean daily demand over
+        the `days` days before `today`.
+        """
+        key = (today, days)
+        now = time.monotonic()
+        cached = self._demand.get(key)
+        if cached and cached[0] > now:
+            return cached[1]
+
+        product_ids, ingredient_ids, recipes = recipe_matrix(session)
+        sales = sales_matrix(session, history_window(today, days), product_ids)
+        demand = np.asarray((sales @ recipes).sum(axis=0)).ravel() / days
+        result = (ingredient_ids, demand)
+        with self._lock:
+            if len(self._demand) >= CACHE_SIZE:
+                self._demand = {k: v for k, v in self._demand.items() if v[0] > now}
+            self._demand[key] = (now + self.ttl, result)
+        return result
+
+    def forecast(self, session, days: int = 28, horizon: int = 14) -> Dict:
+        """
+        Every ingredient with its expected daily demand, the dates it
+        reaches its minimum and runs out at that rate (None when unused),
+        and the units to order to still be at the minimum after `horizon`
+        days. Soonest to run out first.
+        """
+        today = date_windows.today()
+        ingredient_ids, demand = self.daily_demand(session, today, days)
+        ingredients = session.execute(
+            select(
+                Ingredient.id,
+                Ingredient.name,
+                Ingredient.unit,
+                Ingredient.stock,
+                Ingredient.minimum_stock,
+            ).order_by(Ingredient.id)
+        ).all()
+
+        ids = np.array([row.id for row in ingredients], dtype=np.int64)
+        stock = np.array([row.stock for row in ingredients], dtype=np.float64)
+        minimum = np.array([row.minimum_stock for row in ingredients], dtype=np.float64)
+        rate = np.zeros(len(ids))
+        if len(ingredient_ids):
+            position = np.searchsorted(ingredient_ids, ids)
+            position = np.minimum(position, len(ingredient_ids) - 1)
+            known = ingredient_ids[position] == ids
+            rate[known] = demand[position[known]]
+
+        used = rate > 0
+        days_left = np.full(len(ids), np.inf)
+        days_to_minimum = np.full(len(ids), np.inf)
+        np.divide(np.maximum(stock, 0), rate, out=days_left, where=used)
+        np.divide(np.maximum(stock - minimum, 0), rate, out=days_to_minimum, where=used)
+        to_order = np.ceil(np.maximum(rate * horizon + minimum - stock, 0))
+
+        def on(days_ahead):
+            if math.isinf(days_ahead):
+                return None
+            return (today + timedelta(days=int(days_ahead))).isoformat()
+
+        items = [
+            {
+                "id": row.id,
+                "name": row.name,
+                "unit": row.unit,
+                "stock": row.stock,
+                "minimum_stock": row.minimum_stock,
+                "daily_demand": round(daily, 3),
+                "days_left": None if math.isinf(left) else round(left, 1),
+                "minimum_date": on(to_minimum),
+                "depletion_date": on(left),
+                "to_order": int(order),
+            }
+            for row, daily, left, to_minimum, order in zip(
+                ingredients,
+                rate.tolist(),
+                days_left.tolist(),
+                days_to_minimum.tolist(),
+                to_order.tolist(),
+            )
+        ]
+        items.sort(key=lambda item: (item["days_left"] is None, item["days_left"] or 0))
+        return {
+            "window": history_window(today, days).serialize(),
+            "horizon": horizon,
+            "ingredients": items,
+        }
+
+
+demand_forecast = DemandForecast()
@@ -0,0 +1,301 @@
+"""
+Streaming exports of orders, order details, reservations and users.
+
+An export is one `SELECT` whose rows go straight to the response without
+being collected first, so memory stays flat however many rows there are:
+
+- CSV on Postgres through psycopg2 uses `COPY (SELECT ...) TO STDOUT`. The
+  server formats the rows; a thread feeds the chunks `copy_expert` writes
+  through a small bounded queue, so a slow client slows the copy down
+  instead of filling memory.
+- Otherwise (NDJSON, other drivers, `EXPORT_COPY=False`) rows are read
+  through a server-side cursor `EXPORT_CHUNK_ROWS` at a time and written
+  one chunk per response block.
+
+Both CSV paths produce the same text: values are cast in SQL where Python
+and Postgres would print them differently.
+
+Exports run on their own connection, which the response generator opens
+and closes, since the request's session is gone by the time the body is
+sent.
+"""
+
+import csv
+import io
+import json
+import queue
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Callable, Dict, Iterator, Optional, Sequence
+
+from sqlalchemy import Boolean, DateTime, Numeric, Select, String, cast, select
+from sqlalchemy.dialects import postgresql
+
+from src.api.date_windows import Window, within
+from src.api.models import (
+    Order,
+    OrderDetail,
+    Reservation,
+    User,
+    order_status,
+    reservation_status,
+    user_role,
+)
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+# Chunks `COPY` may get ahead of the client
+COPY_QUEUE_SIZE = 16
+
+
+@dataclass
+class Export:
+    columns: Callable[[], Sequence]
+    date_column: object
+    status_column: object
+    statuses: type
+    joins: Sequence = ()
+
+    def statement(self, window: Optional[Window], statuses, for_csv: bool) -> Select:
+        columns = [csv_column(c) if for_csv else c for c in self.columns()]
+        stmt = select(*columns)
+        for join in self.joins:
+            stmt = stmt.join(*join)
+        if window:
+            stmt = stmt.where(within(self.date_column, window))
+        if statuses:
+            stmt = stmt.where(self.status_column.in_(statuses))
+        return stmt.order_by(self.columns()[0])
+
+
+def money(column, name):
+    return cast(column, Numeric(12, 2)).label(name)
+
+
+def csv_column(column):
+    # Printed by Postgres on both paths: COPY shows booleans as t/f and
+    # trims trailing zeros from fractional seconds
+    if isinstance(column.type, (Boolean, DateTime)):
+        return cast(column, String).label(column.key)
+    return column
+
+
+EXPORTS: Dict[str, Export] = {
+    "orders": Export(
+        columns=lambda: (
+            Order.id,
+            Order.order_code,
+            Order.user_id,
+            Order.creator_id,
+            Order.table_id,
+            Order.status,
+            money(Order.total, "total"),
+            Order.take_away,
+            Order.created_at,
+            Order.updated_at,
+        ),
+        date_column=Order.created_at,
+        status_column=Order.status,
+        statuses=order_status,
+    ),
+    "order_details": Export(
+        columns=lambda: (
+            OrderDetail.id,
+            OrderDetail.order_id,
+            Order.order_code,
+            OrderDetail.dish_id,
+            OrderDetail.drink_id,
+            OrderDetail.product_name,
+            OrderDetail.quantity,
+            money(OrderDetail.unit_price, "unit_price"),
+            money(OrderDetail.unit_price * OrderDetail.quantity, "subtotal"),
+            Order.status.label("order_status"),
+            Order.created_at.label("order_created_at"),
+        ),
+        date_column=Order.created_at,
+        status_column=Order.status,
+        statuses=order_status,
+        joins=((Order, OrderDetail.order_id == Order.id),),
+    ),
+    "reservations": Export(
+        columns=lambda: (
+            Reservation.id,
+            Reservation.user_id,
+            Reservation.guest_name,
+            Reservation.guest_phone,
+            Reservation.email,
+            Reservation.quantity,
+            Reservation.table_id,
+            Reservation.status,
+            Reservation.start_date_time,
+            Reservation.created_at,
+        ),
+        date_column=Reservation.start_date_time,
+        status_column=Reservation.status,
+        statuses=reservation_status,
+    ),
+    "users": Export(
+        columns=lambda: (
+            User.id,
+            User.name,
+            User.last_name,
+            User.email,
+            User.phone_number,
+            User.role,
+            User.is_active,
+            User.created_at,
+        ),
+        date_column=User.created_at,
+        status_column=User.role,
+        statuses=user_role,
+    ),
+}
+
+
+def parse_statuses(export: Export, value: str):
+    """Comma separated status names; raises ValueError for unknown ones."""
+    names = [name.strip().upper() for name in value.split(",") if name.strip()]
+    unknown = [name for name in names if name not in export.statuses.__members__]
+    if unknown:
+        raise ValueError(f"Unknown status: {', '.join(unknown)}")
+    return [export.statuses[name] for name in names]
+
+
+def plain(value):
+    return value.value if isinstance(value, Enum) else value
+
+
+def json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return plain(value)
+
+
+def stream_rows(connection, stmt: Select, fmt: str, chunk_rows: int) -> Iterator[str]:
+    """Rows of `stmt` as CSV or NDJSON text, a chunk at a time."""
+    result = connection.execution_options(
+        stream_results=True, yield_per=chunk_rows
+    ).execute(stmt)
+    columns = list(result.keys())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    if fmt == "csv":
+        writer.writerow(columns)
+    for rows in result.partitions():
+        if fmt == "csv":
+            writer.writerows([plain(v) for v in row] for row in rows)
+        else:
+            for row in rows:
+                buffer.write(
+                    json.dumps(
+                        {k: json_value(v) for k, v in zip(columns, row)},
+                        separators=(",", ":"),
+                    )
+                )
+                buffer.write("\n")
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if fmt == "csv" and buffer.tell():
+        yield buffer.getvalue()
+
+
+class QueueWriter:
+    """File-like target for `copy_expert` that hands chunks to a consumer."""
+
+    def __init__(self):
+        self.chunks = queue.Queue(maxsize=COPY_QUEUE_SIZE)
+        self.cancelled = threading.Event()
+
+    def write(self, data):
+        while True:
+            if self.cancelled.is_set():
+                raise IOError("export cancelled")
+            try:
+                self.chunks.put(data, timeout=1)
+                return len(data)
+            except queue.Full:
+                continue
+
+
+def copy_rows(connection, stmt: Select) -> Iterator[bytes]:
+    """Rows of `stmt` as CSV through `COPY ... TO STDOUT`."""
+    sql = stmt.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    copy = f"COPY ({sql}) TO STDOUT WITH (FORMAT csv, HEADER)"
+    dbapi = connection.connection.dbapi_connection
+    writer = QueueWriter()
+    done = object()
+    errors = []
+
+    def run():
+        try:
+            with dbapi.cursor() as cursor:
+                cursor.copy_expert(copy, writer)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            while True:
+                try:
+                    writer.chunks.put(done, timeout=1)
+                    break
+                except queue.Full:
+                    if writer.cancelled.is_set():
+                        break
+
+    thread = threading.Thread(target=run, name="export-copy", daemon=True)
+    thread.start()
+    finished = False
+    try:
+        while True:
+            chunk = writer.chunks.get()
+            if chunk is done:
+                finished = True
+                break
+            yield chunk
+    finally:
+        writer.cancelled.set()
+        thread.join()
+        if errors or not finished:
+            # An interrupted COPY leaves the connection mid-protocol
+            connection.invalidate()
+    if errors:
+        raise errors[0]
+
+
+def can_copy(connection) -> bool:
+    return connection.dialect.name == "postgresql" and connection.dialect.driver == (
+        "psycopg2"
+    )
+
+
+def export_stream(
+    engine,
+    name: str,
+    fmt: str,
+    window: Optional[Window] = None,
+    statuses=(),
+    use_copy: bool = True,
+    chunk_rows: int = 2000,
+):
+    """Generate the export body on a connection of its own."""
+    export = EXPORTS[name]
+    with engine.connect() as connection:
+        if connection.dialect.name == "postgresql":
+            # Runs as long as the client keeps reading, whatever
+            # DB_STATEMENT_TIMEOUT_MS says
+            connection.exec_driver_sql("SET LOCAL statement_timeout = 0")
+        if fmt == "csv" and use_copy and can_copy(connection):
+            yield from copy_rows(
+                connection, export.statement(window, statuses, for_csv=True)
+            )
+        else:
+            stmt = export.statement(window, statuses, for_csv=fmt == "csv")
+            yield from stream_rows(connection, stmt, fmt, chunk_rows)
+        connection.rollback()
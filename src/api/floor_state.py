@@ -0,0 +1,181 @@
+"""
+Table floor state: every change to `Table.status` goes through here.
+
+`transition` locks the table row with `SELECT ... FOR UPDATE` and only
+changes it if its status is one of the expected ones. Seating a table
+passes `skip_locked=True`, so when two waiters try to seat the same table
+one of them wins and the other gets a 409 straight away instead of
+queueing behind the first; changes that must go through (paying or
+deleting an order, editing a reservation) wait for the lock instead.
+
+Each worker keeps the floor map (every table, serialized) tagged with the
+shared `floor` version. Once a change commits, the version is bumped and
+the change sent on the `table_state` Postgres channel in one short
+transaction of its own, so table writes never queue on the version row;
+the other workers' listeners pick the change up to refresh their map and
+feed their own streams. It is also published on this worker's
+`floor_events` for the floor stream.
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from src.api.cache_versions import SharedVersion
+from src.api.models import Table, table_status
+from src.api.order_events import OrderEventBroker
+from src.api.pg_listener import ChannelListener
+
+FLOOR = "floor"
+CHANNEL = "table_state"
+
+
+class TableStateError(Exception):
+    def __init__(self, message, status_code=409):
+        Exception.__init__(self, message)
+        self.message = message
+        self.status_code = status_code
+
+
+floor_events = OrderEventBroker(maxlen=200)
+
+
+class FloorState:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._map = None
+        self._version = SharedVersion(FLOOR, ttl=2.0)
+        self.listen = True
+        self._listener = ChannelListener(CHANNEL, self._receive, "floor")
+
+    def init_app(self, app):
+        self._version.ttl = float(app.config.get("FLOOR_VERSION_TTL", 2))
+        # pgbouncer in transaction mode does not deliver notifications
+        self.listen = bool(
+            app.config.get("FLOOR_LISTEN", not app.config.get("DB_PGBOUNCER"))
+        )
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._map = None
+        self._version.reset()
+
+    def floor_map(self, session) -> List[Dict]:
+        """Every table, serialized and ordered by number."""
+        version = self._version.current(session)
+        cached = self._map
+        if cached and cached[0] == version:
+            return cached[1]
+        tables = [
+            table.serialize()
+            for table in session.scalars(select(Table).order_by(Table.number, Table.id))
+        ]
+        with self._lock:
+            self._map = (version, tables)
+        return tables
+
+    def available(self, session, chairs: Optional[int] = None) -> List[Dict]:
+        return [
+            table
+            for table in self.floor_map(session)
+            if table["status"] == table_status.FREE.value
+            and (chairs is None or table["chairs"] >= chairs)
+        ]
+
+    def transition(
+        self,
+        session,
+        table_id: int,
+        status: table_status,
+        expected: Optional[Iterable[table_status]] = None,
+        skip_locked: bool = False,
+    ) -> Table:
+        """
+        Set the table's status if it currently is one of `expected` (any
+        status when None), in the caller's transaction. With `skip_locked`
+        a table another request is changing counts as taken instead of
+        being waited for.
+
+        Raises TableStateError: 404 for an unknown table, 409 when the
+        table is in another status or (with `skip_locked`) another request
+        is changing it.
+        """
+        stmt = select(Table).where(Table.id == table_id)
+        if expected is not None:
+            expected = tuple(expected)
+            stmt = stmt.where(Table.status.in_(expected))
+        # The table may already be in the session, e.g. as `order.table`;
+        # compare against the row just locked, not the loaded copy
+        stmt = stmt.with_for_update(skip_locked=skip_locked).execution_options(
+            populate_existing=True
+        )
+        table = session.scalars(stmt).first()
+
+        if table is None:
+            current = session.scalar(select(Table.status).where(Table.id == table_id))
+            if current is None:
+                raise TableStateError("Table not found", 404)
+            if expected is not None and current not in expected:
+                raise TableStateError(f"Table is {current.value}")
+            raise TableStateError("Table is being updated, try again")
+
+        if table.status != status:
+            table.status = status
+            self.changed(session, table)
+        return table
+
+    def changed(self, session, table: Table, deleted: bool = False):
+        """Record a table write (creation, edit, deletion) for the floor."""
+        session.flush()
+        payload = {"id": table.id} if deleted else table.serialize()
+        kind = "table.deleted" if deleted else "table.updated"
+        session.info.setdefault("floor_events", []).append((kind, payload))
+
+    def committed(self, session, events: List):
+        """Bump the version, then announce `events` to every worker."""
+        try:
+            with session.get_bind().begin() as connection:
+                self._version.bump(connection)
+                for kind, payload in events:
+                    message = {"pid": os.getpid(), "type": kind, "table": payload}
+                    connection.execute(
+                        select(func.pg_notify(CHANNEL, json.dumps(message)))
+                    )
+        except Exception as e:
+            print("Could not announce floor changes:", e)
+        for kind, payload in events:
+            floor_events.publish(kind, payload)
+
+    def _receive(self, message: str):
+        data = json.loads(message)
+        self._version.reset()
+        if data.get("pid") != os.getpid():
+            floor_events.publish(data["type"], data["table"])
+
+    def start_listener(self, engine):
+        """Follow other workers' changes; started by the first subscriber."""
+        if self.listen:
+            self._listener.start(engine)
+
+    def stop_listener(self):
+        self._listener.stop()
+
+
+floor_state = FloorState()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_floor_events(session):
+    events = session.info.pop("floor_events", None)
+    if events:
+        floor_state.committed(session, events)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_floor_events(session):
+    session.info.pop("floor_events", None)
@@ -0,0 +1,263 @@
+"""
+`Idempotency-Key` support for POST endpoints that create rows.
+
+Tablets on flaky Wi-Fi retry requests whose response they never received.
+A client that sends the same `Idempotency-Key` header with every retry of
+one request gets the first response replayed (marked with
+`Idempotent-Replayed: true`) instead of a second order, reservation or
+email.
+
+With the database store, the key is claimed with an `INSERT` in the
+request's own transaction, so it commits together with the rows the
+endpoint creates and disappears if the endpoint rolls back. A concurrent
+retry waits on the key's unique index until the first request's
+transaction ends. Once the endpoint returns, its response is saved on the
+key for `IDEMPOTENCY_TTL` seconds. Keys are scoped to the method, path and
+JWT identity, and a key reused with a different body is refused. Server
+errors are not saved, so the request can be retried. Anonymous requests
+are scoped to the client's address and User-Agent instead, so two guests
+who happen to send the same key never get each other's responses (behind
+a reverse proxy that needs `remote_addr` to be the client's, e.g. through
+werkzeug's `ProxyFix`).
+
+`IDEMPOTENCY_BACKEND=memory` keeps keys in the process instead, for single
+worker setups without the table.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from functools import wraps
+from typing import Dict, Optional, Tuple
+
+from flask import jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+
+from src.api.models import IdempotencyKey, db
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+# Expired keys are deleted at most this often per worker
+PURGE_INTERVAL = 60
+
+
+@dataclass
+class Record:
+    fingerprint: str
+    status_code: Optional[int] = None
+    content_type: Optional[str] = None
+    body: Optional[str] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status_code is not None
+
+
+class DatabaseBackend:
+    def __init__(self, ttl: float):
+        self.ttl = timedelta(seconds=ttl)
+        self._purged_at = 0.0
+
+    def claim(self, session, scope, key, fingerprint) -> Optional[Record]:
+        """Claim `key` in the caller's transaction, or return its record."""
+        stmt = insert(IdempotencyKey).values(
+            scope=scope,
+            key=key,
+            fingerprint=fingerprint,
+            expires_at=func.now() + self.ttl,
+        )
+        # An expired key is taken over as if it were new
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.scope, IdempotencyKey.key],
+            set_={
+                "fingerprint": stmt.excluded.fingerprint,
+                "status_code": None,
+                "content_type": None,
+                "response_body": None,
+                "created_at": func.now(),
+                "expires_at": stmt.excluded.expires_at,
+            },
+            where=IdempotencyKey.expires_at <= func.now(),
+        ).returning(IdempotencyKey.key)
+        if session.execute(stmt).first():
+            return None
+        row = session.execute(
+            select(IdempotencyKey).where(
+                IdempotencyKey.scope == scope, IdempotencyKey.key == key
+            )
+        ).scalar_one()
+        return Record(
+            row.fingerprint, row.status_code, row.content_type, row.response_body
+        )
+
+    def complete(self, session, scope, key, fingerprint, response):
+        session.rollback()
+        record = {
+            "fingerprint": fingerprint,
+            "status_code": response.status_code,
+            "content_type": response.content_type,
+            "response_body": response.get_data(as_text=True),
+        }
+        stmt = insert(IdempotencyKey).values(
+            scope=scope, key=key, expires_at=func.now() + self.ttl, **record
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.scope, IdempotencyKey.key], set_=record
+        )
+        session.execute(stmt)
+        session.commit()
+        self.purge(session)
+
+    def release(self, session, scope, key):
+        session.rollback()
+        session.execute(
+            delete(IdempotencyKey).where(
+                IdempotencyKey.scope == scope,
+                IdempotencyKey.key == key,
+                IdempotencyKey.status_code.is_(None),
+            )
+        )
+        session.commit()
+
+    def purge(self, session, force: bool = False) -> int:
+        now = time.monotonic()
+        if not force and now - self._purged_at < PURGE_INTERVAL:
+            return 0
+        self._purged_at = now
+        result = session.execute(
+            delete(IdempotencyKey).where(IdempotencyKey.expires_at <= func.now())
+        )
+        session.commit()
+        return result.rowcount
+
+
+class MemoryBackend:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._records: Dict[Tuple[str, str], Tuple[float, Record]] = {}
+        self._purged_at = 0.0
+
+    def claim(self, session, scope, key, fingerprint) -> Optional[Record]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._records.get((scope, key))
+            if entry and entry[0] > now:
+                return entry[1]
+            self._records[(scope, key)] = (now + self.ttl, Record(fingerprint))
+        return None
+
+    def complete(self, session, scope, key, fingerprint, response):
+        record = Record(
+            fingerprint,
+            response.status_code,
+            response.content_type,
+            response.get_data(as_text=True),
+        )
+        with self._lock:
+            self._records[(scope, key)] = (time.monotonic() + self.ttl, record)
+        self.purge(session)
+
+    def release(self, session, scope, key):
+        with self._lock:
+            entry = self._records.get((scope, key))
+            if entry and not entry[1].done:
+                del self._records[(scope, key)]
+
+    def purge(self, session, force: bool = False) -> int:
+        now = time.monotonic()
+        if not force and now - self._purged_at < PURGE_INTERVAL:
+            return 0
+        self._purged_at = now
+        with self._lock:
+            expired = [k for k, (expires, _) in self._records.items() if expires <= now]
+            for k in expired:
+                del self._records[k]
+        return len(expired)
+
+
+def request_fingerprint() -> str:
+    body = request.get_json(silent=True)
+    if body is not None:
+        data = json.dumps(body, sort_keys=True, separators=(",", ":")).encode()
+    else:
+        data = request.get_data()
+    return hashlib.sha256(data).hexdigest()
+
+
+def request_scope() -> str:
+    verify_jwt_in_request(optional=True)
+    identity = get_jwt_identity()
+    if identity is None:
+        client = f"{request.remote_addr} {request.user_agent.string}"
+        identity = "anon:" + hashlib.sha256(client.encode()).hexdigest()[:16]
+    return f"{request.method} {request.path} {identity}"[:200]
+
+
+class IdempotencyStore:
+    def __init__(self):
+        self.backend = DatabaseBackend(86400)
+
+    def init_app(self, app):
+        ttl = float(app.config.get("IDEMPOTENCY_TTL", 86400))
+        if app.config.get("IDEMPOTENCY_BACKEND", "database") == "memory":
+            self.backend = MemoryBackend(ttl)
+        else:
+            self.backend = DatabaseBackend(ttl)
+
+    def handle(self, view, *args, **kwargs):
+        key = request.headers.get(HEADER, "").strip()
+        if not key or request.method != "POST":
+            return view(*args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{HEADER} is too long"}), 400
+
+        scope = request_scope()
+        fingerprint = request_fingerprint()
+        session = db.session
+        record = self.backend.claim(session, scope, key, fingerprint)
+        if record is not None:
+            session.rollback()
+            if record.fingerprint != fingerprint:
+                return (
+                    jsonify({"error": f"{HEADER} was used for a different request"}),
+                    422,
+                )
+            if not record.done:
+                response = jsonify({"error": "The original request is in progress"})
+                response.headers["Retry-After"] = "1"
+                return response, 409
+            response = make_response(record.body, record.status_code)
+            response.content_type = record.content_type
+            response.headers["Idempotent-Replayed"] = "true"
+            return response
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            self.backend.release(session, scope, key)
+            raise
+        if response.status_code >= 500:
+            self.backend.release(session, scope, key)
+        else:
+            self.backend.complete(session, scope, key, fingerprint, response)
+        return response
+
+
+idempotency_store = IdempotencyStore()
+
+
+def idempotent(view):
+    """Replay the saved response for a repeated `Idempotency-Key`."""
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        return idempotency_store.handle(view, *args, **kwargs)
+
+    return wrapper
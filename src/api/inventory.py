@@ -0,0 +1,151 @@
+"""
+Ingredient stock consumed by orders.
+
+An order uses up its ingredients once, the first time it reaches
+IN_PROGRESS (the kitchen starts it) or DELIVERED (for orders that skip the
+kitchen). `inventory.consume` is called wherever an order's status is set,
+in the caller's transaction:
+
+1. `orders.stock_deducted_at` is set with a conditional `UPDATE`, so when
+   two requests move the same order only the first one deducts; the other
+   waits for its row lock and then finds the column already set.
+2. The order's lines are joined to the `ProductIngredient` recipes and
+   summed per ingredient.
+3. All of the order's ingredients are updated with one
+   `UPDATE ... FROM (VALUES ...)`. The rows are locked in id order first,
+   so concurrent orders sharing ingredients queue behind each other
+   instead of deadlocking, and `stock = stock - quantity` is computed
+   against the committed value, so no deduction is lost.
+
+`Ingredient.stock` is a whole number of the ingredient's unit, so each
+ingredient's total for the order is rounded up. Stock is not given back
+when an order is moved back or deleted afterwards.
+
+Ingredients that drop to or below their `minimum_stock` in the update are
+published as `ingredient.low_stock` events on `order_events` (the kitchen
+stream) once the transaction commits, and relayed to the other workers'
+streams by `order_relay`.
+"""
+
+import math
+from typing import Dict, List
+
+from sqlalchemy import Integer, bindparam, event, func, select, text, update
+from sqlalchemy.orm import Session
+
+from src.api.models import Order, OrderDetail, ProductIngredient, order_status
+from src.api.order_events import order_events
+from src.api.order_relay import order_relay
+
+CONSUMING_STATUSES = (order_status.IN_PROGRESS, order_status.DELIVERED)
+
+LOW_STOCK = "ingredient.low_stock"
+
+DEDUCT = """
+WITH used (id, quantity) AS (VALUES {values}),
+locked AS MATERIALIZED (
+    SELECT ingredients.id FROM ingredients JOIN used USING (id)
+    ORDER BY ingredients.id
+    FOR UPDATE OF ingredients
+)
+UPDATE ingredients SET stock = ingredients.stock - used.quantity
+FROM used JOIN locked USING (id)
+WHERE ingredients.id = used.id
+RETURNING ingredients.id, ingredients.name, ingredients.unit,
+          ingredients.stock, ingredients.minimum_stock, used.quantity
+"""
+
+
+class Inventory:
+    def consume(self, session, order: Order) -> bool:
+        """
+        Deduct the order's ingredients if its status consumes stock and it
+        has not been deducted yet. Returns whether this call deducted.
+        """
+        if order.status not in CONSUMING_STATUSES or order.stock_deducted_at:
+            return False
+        session.flush()
+        claimed = session.execute(
+            update(Order)
+            .where(Order.id == order.id, Order.stock_deducted_at.is_(None))
+            .values(stock_deducted_at=func.now())
+            .returning(Order.id)
+        ).first()
+        if claimed is None:
+            return False
+        totals = self.recipe_totals(session, order.id)
+        if totals:
+            self.deduct(session, totals)
+        return True
+
+    def recipe_totals(self, session, order_id: int) -> Dict[int, int]:
+        """Units of each ingredient the order's lines use, rounded up."""
+        product_id = func.coalesce(OrderDetail.dish_id, OrderDetail.drink_id)
+        rows = session.execute(
+            select(
+                ProductIngredient.ingredient_id,
+                func.sum(ProductIngredient.quantity * OrderDetail.quantity),
+            )
+            .join(OrderDetail, ProductIngredient.product_id == product_id)
+            .where(OrderDetail.order_id == order_id)
+            .group_by(ProductIngredient.ingredient_id)
+        )
+        # Round first so float noise (1.1 * 10) does not add a whole unit
+        return {
+            ingredient_id: math.ceil(round(total, 6))
+            for ingredient_id, total in rows
+            if total > 0
+        }
+
+    def deduct(self, session, totals: Dict[int, int]) -> List[Dict]:
+        """
+        Subtract `totals` (ingredient id to quantity) from the stock in one
+        statement. Returns the ingredients it took to their minimum or
+        below and queues their low-stock events for the commit.
+        """
+        ids = sorted(totals)
+        values = ", ".join(f"(:id_{i}, :quantity_{i})" for i in range(len(ids)))
+        params = {}
+        for i, ingredient_id in enumerate(ids):
+            params[f"id_{i}"] = ingredient_id
+            params[f"quantity_{i}"] = totals[ingredient_id]
+        stmt = text(DEDUCT.format(values=values)).bindparams(
+            *(bindparam(name, type_=Integer) for name in params)
+        )
+        low = []
+        for row in session.execute(stmt, params).mappings():
+            before = row["stock"] + row["quantity"]
+            # Only the order that crosses the minimum reports it
+            if row["stock"] <= row["minimum_stock"] < before:
+                low.append(
+                    {
+                        "id": row["id"],
+                        "name": row["name"],
+                        "stock": row["stock"],
+                        "unit": row["unit"],
+                        "minimum_stock": row["minimum_stock"],
+                    }
+                )
+        for ingredient in low:
+            order_relay.relay(session, LOW_STOCK, ingredient)
+        if low:
+            session.info.setdefault("inventory_events", []).extend(low)
+        return low
+
+
+inventory = Inventory()
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_low_stock(session):
+    for ingredient in session.info.pop("inventory_events", ()):
+        print(
+            f"Low stock: {ingredient['name']} at {ingredient['stock']} "
+            f"{ingredient['unit']} (minimum {ingredient['minimum_stock']})"
+        )
+        order_events.publish(LOW_STOCK, ingredient)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_low_stock(session):
+    session.info.pop("inventory_events", None)
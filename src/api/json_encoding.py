@@ -0,0 +1,101 @@
+"""
+JSON encoding of API responses.
+
+`AppJSONProvider` is the app's `app.json`, so `jsonify` and with it
+`create_api_response` and `create_paginated_response` all encode through
+it. It uses orjson when it is installed (`JSON_ENCODER=auto`, the default,
+or `orjson`) and the standard library otherwise (`JSON_ENCODER=json`).
+Both encoders write the same values:
+
+- Decimal as a number, as the models' `float(...)` did;
+- datetime and date in ISO 8601, as `.isoformat()` did;
+- Enum members as their value, as `.value` did.
+
+so serializers can hand over column values as the database returns them
+instead of converting them one by one.
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Optional
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+ENCODERS = ("auto", "orjson", "json")
+
+
+def default(value: Any) -> Any:
+    """Values the standard library cannot encode; orjson needs only Decimal."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return DefaultJSONProvider.default(value)
+
+
+def pick_encoder(name: str) -> str:
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown JSON_ENCODER {name!r}; use one of {ENCODERS}")
+    if name == "auto":
+        return "orjson" if orjson is not None else "json"
+    if name == "orjson" and orjson is None:
+        raise ValueError("JSON_ENCODER is orjson but orjson is not installed")
+    return name
+
+
+def encode(
+    obj: Any,
+    encoder: str = "orjson",
+    sort_keys: bool = True,
+    indent: Optional[int] = None,
+) -> bytes:
+    if encoder == "orjson":
+        option = orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=default, option=option)
+    separators = None if indent else (",", ":")
+    return json.dumps(
+        obj, default=default, sort_keys=sort_keys, indent=indent, separators=separators
+    ).encode()
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    default = staticmethod(default)
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.encoder = pick_encoder(app.config.get("JSON_ENCODER", "auto"))
+
+    def encode(self, obj: Any, indent: Optional[int] = None) -> bytes:
+        return encode(obj, self.encoder, self.sort_keys, indent)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if set(kwargs) - {"indent", "separators"}:
+            kwargs.setdefault("default", self.default)
+            return json.dumps(obj, **kwargs)
+        return self.encode(obj, kwargs.get("indent")).decode()
+
+    def response(self, *args: Any, **kwargs: Any):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = None
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            indent = 2
+        return self._app.response_class(
+            self.encode(obj, indent) + b"\n", mimetype=self.mimetype
+        )
+
+
+def init_app(app):
+    app.json = AppJSONProvider(app)
@@ -0,0 +1,330 @@
+"""
+Transactional outbox for outgoing email.
+
+Endpoints used to talk SMTP inside the request: a new connection, STARTTLS
+and login for every message, so a slow mail server held reservation and
+contact requests for seconds. `mail_outbox.queue` now only adds an
+`email_outbox` row to the caller's session; it is committed together with
+the rest of the request, and the commit wakes the delivery threads.
+
+Each process runs `MAIL_OUTBOX_WORKERS` delivery threads. A thread claims up
+to `MAIL_OUTBOX_BATCH` due rows with `FOR UPDATE SKIP LOCKED`, so threads in
+other processes never pick the same mail, marks them SENDING with a lease
+and sends the batch over one pooled SMTP connection. Failures are retried
+with exponential backoff until `MAIL_OUTBOX_MAX_ATTEMPTS`; claims left by a
+process that died mid-batch are picked up again once their lease expires.
+"""
+
+import os
+import random
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from email.message import EmailMessage
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, func, select, update
+from sqlalchemy.orm import Session
+
+from src.api.models import EmailOutbox, db, email_status
+
+# Errors that only concern one message; the connection stays usable
+MESSAGE_ERRORS = (
+    smtplib.SMTPRecipientsRefused,
+    smtplib.SMTPSenderRefused,
+    smtplib.SMTPDataError,
+)
+
+
+def build_message(sender, to_email, subject, body, is_html=False) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = sender
+    msg["To"] = to_email
+    if is_html:
+        msg.set_content("Your email client does not support HTML.")
+        msg.add_alternative(body, subtype="html")
+    else:
+        msg.set_content(body)
+    return msg
+
+
+class SMTPConnectionPool:
+    """Keeps logged-in SMTP connections open between batches."""
+
+    def __init__(
+        self,
+        host,
+        port=587,
+        username=None,
+        password=None,
+        use_tls=True,
+        size=2,
+        timeout=30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self._idle: List[smtplib.SMTP] = []
+        self._lock = threading.Lock()
+
+    def _connect(self) -> smtplib.SMTP:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            smtp.starttls()
+        if self.username and self.password:
+            smtp.login(self.username, self.password)
+        return smtp
+
+    def _checkout(self) -> smtplib.SMTP:
+        while True:
+            with self._lock:
+                smtp = self._idle.pop() if self._idle else None
+            if smtp is None:
+                return self._connect()
+            try:
+                # Servers drop idle sessions; a NOOP is cheaper than a failed batch
+                if smtp.noop()[0] == 250:
+                    return smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close(smtp)
+
+    def _close(self, smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            smtp.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded if the block raises."""
+        smtp = self._checkout()
+        try:
+            yield smtp
+        except BaseException:
+            self._close(smtp)
+            raise
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(smtp)
+                return
+        self._close(smtp)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for smtp in idle:
+            self._close(smtp)
+
+
+class MailOutbox:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._pid = None
+        self._app = None
+        self.pool: Optional[SMTPConnectionPool] = None
+        self.sender = None
+        self.workers = 2
+        self.batch_size = 20
+        self.max_attempts = 5
+        self.backoff = 30.0
+        self.max_backoff = 3600.0
+        self.lease = 300.0
+        self.poll_interval = 15.0
+
+    def init_app(self, app):
+        def setting(name, default=None):
+            return app.config.get(name, os.getenv(name, default))
+
+        self._app = app
+        self.workers = int(setting("MAIL_OUTBOX_WORKERS", 2))
+        self.batch_size = int(setting("MAIL_OUTBOX_BATCH", 20))
+        self.max_attempts = int(setting("MAIL_OUTBOX_MAX_ATTEMPTS", 5))
+        self.backoff = float(setting("MAIL_OUTBOX_BACKOFF", 30))
+        self.max_backoff = float(setting("MAIL_OUTBOX_MAX_BACKOFF", 3600))
+        self.lease = float(setting("MAIL_OUTBOX_LEASE", 300))
+        self.poll_interval = float(setting("MAIL_OUTBOX_POLL_INTERVAL", 15))
+
+        self.stop()
+        server = setting("MAIL_SERVER")
+        username = setting("MAIL_USERNAME")
+        self.sender = setting("MAIL_DEFAULT_SENDER") or username
+        self.pool = None
+        if server:
+            self.pool = SMTPConnectionPool(
+                server,
+                int(setting("MAIL_PORT", 587)),
+                username,
+                setting("MAIL_PASSWORD"),
+                use_tls=str(setting("MAIL_USE_TLS", "true")).lower() != "false",
+                size=max(self.workers, 1),
+            )
+        self.start()
+
+    @property
+    def configured(self) -> bool:
+        return self.pool is not None
+
+    def queue(self, session, to_email, subject, body, is_html=False) -> EmailOutbox:
+        """
+        Add a message to `session`; it is sent after the session commits.
+
+        Nothing is sent if the caller rolls back instead.
+        """
+        mail = EmailOutbox(
+            to_email=to_email, subject=subject, body=body, is_html=is_html
+        )
+        session.add(mail)
+        session.info.setdefault("mail_outboxes", set()).add(self)
+        return mail
+
+    def notify(self):
+        self.start()
+        self._wakeup.set()
+
+    def start(self):
+        """Start the delivery threads of this process, if not running."""
+        if not self.configured or self.workers <= 0 or self._app is None:
+            return
+        with self._lock:
+            # Threads do not survive a fork, so a pre-forked worker starts its own
+            if (
+                self._threads
+                and self._pid == os.getpid()
+                and all(t.is_alive() for t in self._threads)
+            ):
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"mail-outbox-{i}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self._threads = []
+        self._wakeup.clear()
+        if self.pool:
+            self.pool.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.clear()
+            try:
+                with self._app.app_context():
+                    processed = self.process_batch(db.session)
+            except Exception as e:
+                print("Error en la cola de correo:", e)
+                processed = 0
+                time.sleep(1)
+            if processed < self.batch_size and not self._stop.is_set():
+                self._wakeup.wait(self.poll_interval)
+
+    def retry_delay(self, attempts: int) -> float:
+        delay = min(self.backoff * 2 ** (attempts - 1), self.max_backoff)
+        return delay * random.uniform(0.8, 1.2)
+
+    def process_batch(self, session) -> int:
+        """Claim, send and record one batch; return how many were claimed."""
+        claimed = session.scalars(
+            select(EmailOutbox)
+            .where(
+                EmailOutbox.status.in_([email_status.PENDING, email_status.SENDING]),
+                EmailOutbox.next_attempt_at <= func.now(),
+            )
+            .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        batch = []
+        for mail in claimed:
+            mail.status = email_status.SENDING
+            mail.attempts += 1
+            mail.next_attempt_at = func.now() + timedelta(seconds=self.lease)
+            batch.append(
+                (mail.id, mail.to_email, mail.subject, mail.body, mail.is_html)
+            )
+        attempts = {mail.id: mail.attempts for mail in claimed}
+        session.commit()
+        if not batch:
+            return 0
+
+        errors = self.deliver(batch)
+
+        sent = [mail_id for mail_id, error in errors.items() if error is None]
+        if sent:
+            session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(sent))
+                .values(status=email_status.SENT, sent_at=func.now(), last_error=None)
+            )
+        for mail_id, error in errors.items():
+            if error is None:
+                continue
+            if attempts[mail_id] >= self.max_attempts:
+                values = {"status": email_status.FAILED}
+                print(
+                    f"❌ Correo {mail_id} descartado tras {attempts[mail_id]} intentos"
+                )
+            else:
+                delay = timedelta(seconds=self.retry_delay(attempts[mail_id]))
+                values = {
+                    "status": email_status.PENDING,
+                    "next_attempt_at": func.now() + delay,
+                }
+            session.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id == mail_id)
+                .values(last_error=error[:1000], **values)
+            )
+        session.commit()
+        return len(batch)
+
+    def deliver(self, batch) -> Dict[int, Optional[str]]:
+        """Send `batch` over one connection; map each id to its error or None."""
+        errors: Dict[int, Optional[str]] = {}
+        try:
+            with self.pool.connection() as smtp:
+                for mail_id, to_email, subject, body, is_html in batch:
+                    msg = build_message(self.sender, to_email, subject, body, is_html)
+                    try:
+                        smtp.send_message(msg)
+                        errors[mail_id] = None
+                    except MESSAGE_ERRORS as e:
+                        errors[mail_id] = repr(e)
+        except (smtplib.SMTPException, OSError) as e:
+            print("❌ Error de conexión SMTP:", e)
+            for mail_id, *_ in batch:
+                errors.setdefault(mail_id, repr(e))
+        return errors
+
+
+mail_outbox = MailOutbox()
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_outboxes(session):
+    for outbox in session.info.pop("mail_outboxes", ()):
+        outbox.notify()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_outboxes(session):
+    session.info.pop("mail_outboxes", None)
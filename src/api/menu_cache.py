@@ -0,0 +1,77 @@
+"""
+Versioned, pre-serialized snapshots of the public menu.
+
+The menu changes a few times a day but is read by every visitor. Each
+worker keeps the JSON bytes of every menu listing it has served together
+with the menu version they were built from. The version lives in the
+`cache_versions` table and is bumped in the same transaction as any product
+write, so all workers agree on it; each worker re-reads it at most once
+every `MENU_VERSION_TTL` seconds. The version doubles as the ETag, which
+lets browsers and proxies revalidate with `If-None-Match` and get a 304.
+"""
+
+import threading
+from typing import Callable, Dict, Tuple
+
+from flask import Response, current_app, request
+
+from src.api.cache_versions import SharedVersion
+
+MENU = "menu"
+
+
+class MenuSnapshotCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshots: Dict[str, Tuple[int, bytes]] = {}
+        self._version = SharedVersion(MENU)
+
+    def init_app(self, app):
+        self._version.ttl = float(app.config.get("MENU_VERSION_TTL", 5))
+        self.clear()
+
+    def clear(self):
+        with self._lock:
+            self._snapshots.clear()
+        self._version.reset()
+
+    def current_version(self, session) -> int:
+        return self._version.current(session)
+
+    def bump(self, session) -> int:
+        """
+        Increment the shared menu version inside the caller's transaction.
+
+        Call this before committing any write that changes the menu.
+        """
+        return self._version.bump(session)
+
+    def snapshot(self, session, key: str, build: Callable[[], object]):
+        """Return `(version, json_bytes)` for `key`, rebuilding if outdated."""
+        version = self.current_version(session)
+        cached = self._snapshots.get(key)
+        if cached and cached[0] == version:
+            return cached
+
+        body = current_app.json.dumps(build()).encode()
+        with self._lock:
+            self._snapshots[key] = (version, body)
+        return version, body
+
+    def response(self, session, key: str, build: Callable[[], object]) -> Response:
+        """A cacheable JSON response for `key`, or 304 if the client is current."""
+        version = self.current_version(session)
+        etag = f"{MENU}-{version}-{key}"
+        if etag in request.if_none_match:
+            response = Response(status=304)
+        else:
+            version, body = self.snapshot(session, key, build)
+            etag = f"{MENU}-{version}-{key}"
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.cache_control.public = True
+        response.cache_control.no_cache = True
+        return response
+
+
+menu_cache = MenuSnapshotCache()
@@ -8,11 +8,15 @@ from sqlalchemy import (
     ForeignKey,
     Text,
     Numeric,
+    Date,
+    Sequence,
+    BigInteger,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from enum import Enum as PyEnum
 from sqlalchemy.sql import func
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 
 db = SQLAlchemy()
 
@@ -52,6 +56,9 @@ class User(db.Model):
         nullable=False,
     )
 
+    # Matches the user listing's sort key
+    __table_args__ = (db.Index("ix_users_created_at_id", "created_at", "id"),)
+
     def serialize(self):
         return {
             "id": self.id,
@@ -84,6 +91,17 @@ class Product(db.Model):
         "polymorphic_on": product_type,
     }
 
+    def serialize(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "price": float(self.price) if self.price is not None else None,
+            "image_url": self.image_url,
+            "is_active": self.is_active,
+            "product_type": self.product_type,
+        }
+
 
 class dish_type(PyEnum):
     APPETIZER = "APPETIZER"
@@ -104,6 +122,13 @@ class Dish(Product):
         "polymorphic_identity": "DISH",
     }
 
+    def serialize(self):
+        return {
+            **super().serialize(),
+            "dish_type": getattr(self.dish_type, "value", self.dish_type),
+            "preparation_time": self.preparation_time,
+        }
+
 
 # Drinks enum and model
 
@@ -128,6 +153,13 @@ class Drink(Product):
         "polymorphic_identity": "DRINK",
     }
 
+    def serialize(self):
+        return {
+            **super().serialize(),
+            "drink_type": getattr(self.drink_type, "value", self.drink_type),
+            "volume": self.volume,
+        }
+
 
 # Reservation status
 class reservation_status(PyEnum):
@@ -164,6 +196,14 @@ class Reservation(db.Model):
     # user = relationship("User", backref="reservations")
     # table = relationship("Table", backref="reservations")
 
+    # Day listings and availability ranges on start_date_time, by status
+    # and per table
+    __table_args__ = (
+        db.Index("ix_reservations_start_id", "start_date_time", "id"),
+        db.Index("ix_reservations_status_start", "status", "start_date_time"),
+        db.Index("ix_reservations_table_start", "table_id", "start_date_time"),
+    )
+
     def serialize(self):
         return {
             "id": self.id,
@@ -214,6 +254,21 @@ class order_status(str, PyEnum):
     CANCELLED = "CANCELLED"
 
 
+# Orders the kitchen and floor staff still have to act on
+ACTIVE_ORDER_STATUSES = (
+    order_status.PENDING,
+    order_status.IN_PROGRESS,
+    order_status.READY,
+)
+
+# Order codes are handed out in blocks: each `nextval` reserves the next
+# ORDER_CODE_BLOCK numbers for one worker (see order_codes.py)
+ORDER_CODE_BLOCK = 100
+order_code_seq = Sequence(
+    "order_code_seq", start=1, increment=ORDER_CODE_BLOCK, metadata=db.metadata
+)
+
+
 class Order(db.Model):
     __tablename__ = "orders"
 
@@ -225,7 +280,7 @@ class Order(db.Model):
     status: Mapped[order_status] = mapped_column(
         Enum(order_status, native_enum=False), default=order_status.PENDING
     )
-    total: Mapped[float] = mapped_column(nullable=False)
+    total: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
     take_away: Mapped[bool] = mapped_column(Boolean(), nullable=False, default=False)
     created_at: Mapped[DateTime] = mapped_column(
         DateTime(),
@@ -240,6 +295,8 @@ class Order(db.Model):
         onupdate=func.now(),
         nullable=False,
     )
+    # Set when the order's ingredients are taken out of stock
+    stock_deducted_at: Mapped[DateTime] = mapped_column(DateTime(), nullable=True)
 
     user = relationship("User", foreign_keys=[user_id], backref="orders")
     creator = relationship("User", foreign_keys=[creator_id], backref="created_orders")
@@ -248,6 +305,16 @@ class Order(db.Model):
         "OrderDetail", back_populates="order", cascade="all, delete-orphan"
     )
 
+    # Listings are filtered by one of these columns and ordered newest first
+    # by (created_at, id); the board syncs on updated_at
+    __table_args__ = (
+        db.Index("ix_orders_created_at_id", "created_at", "id"),
+        db.Index("ix_orders_status_created_at", "status", "created_at", "id"),
+        db.Index("ix_orders_user_created_at", "user_id", "created_at", "id"),
+        db.Index("ix_orders_table_created_at", "table_id", "created_at", "id"),
+        db.Index("ix_orders_updated_at", "updated_at"),
+    )
+
     def serialize(self):
         try:
             return {
@@ -265,7 +332,7 @@ class Order(db.Model):
                 ),
                 "table": self.table.serialize() if self.table else None,
                 "status": self.status.value,
-                "total": float(self.total),
+                "total": self.total,
                 "take_away": self.take_away,
                 "date": self.created_at.strftime("%Y-%m-%d"),
                 "details": (
@@ -285,7 +352,7 @@ class Order(db.Model):
                 "creator": "Error loading creator",
                 "table": "Error loading table",
                 "status": self.status.value,
-                "total": float(self.total),
+                "total": self.total,
                 "take_away": self.take_away,
                 "date": self.created_at.strftime("%Y-%m-%d"),
                 "details": [],
@@ -301,19 +368,26 @@ class OrderDetail(db.Model):
     drink_id: Mapped[int] = mapped_column(ForeignKey("drinks.id"), nullable=True)
     product_name: Mapped[str] = mapped_column(String(120), nullable=False)
     quantity: Mapped[int] = mapped_column(nullable=False)
-    unit_price: Mapped[float] = mapped_column(nullable=False)
+    unit_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
 
     order = relationship("Order", back_populates="details")
     dish = relationship("Dish", foreign_keys=[dish_id])
     drink = relationship("Drink", foreign_keys=[drink_id])
 
+    # Postgres does not index foreign keys; orders load their details by
+    # order_id, and the bar view looks for drink lines
+    __table_args__ = (
+        db.Index("ix_order_details_order_id", "order_id"),
+        db.Index("ix_order_details_drink_id", "drink_id"),
+    )
+
     def serialize(self):
         return {
             "id": self.id,
             "name": self.product_name,
             "quantity": self.quantity,
             "price": self.unit_price,
-            "subtotal": round(self.unit_price * self.quantity, 2),
+            "subtotal": self.unit_price * self.quantity,
             "type": "FOOD" if self.dish_id else "DRINK",
         }
 
@@ -357,3 +431,119 @@ class ProductIngredient(db.Model):
             "quantity": self.quantity,
             "unit": self.unit,
         }
+
+
+class CacheVersion(db.Model):
+    """Shared version counters for caches kept in each worker's memory."""
+
+    __tablename__ = "cache_versions"
+    name: Mapped[str] = mapped_column(String(50), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    updated_at: Mapped[DateTime] = mapped_column(
+        DateTime(),
+        default=func.now(),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+
+class DailySales(db.Model):
+    """Per-day order count and revenue, maintained by `sales_rollup`."""
+
+    __tablename__ = "daily_sales"
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sales: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+    def serialize(self):
+        return {
+            "date": self.day.isoformat(),
+            "orders": self.orders,
+            "sales": float(self.sales),
+        }
+
+
+class DailySalesDelta(db.Model):
+    """Signed order contributions not yet folded into `daily_sales`."""
+
+    __tablename__ = "daily_sales_deltas"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    day: Mapped[date] = mapped_column(Date, nullable=False)
+    orders: Mapped[int] = mapped_column(Integer, nullable=False)
+    sales: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+
+    __table_args__ = (db.Index("ix_daily_sales_deltas_day", "day"),)
+
+
+class email_status(str, PyEnum):
+    PENDING = "PENDING"
+    SENDING = "SENDING"
+    SENT = "SENT"
+    FAILED = "FAILED"
+
+
+class EmailOutbox(db.Model):
+    """Outgoing mail, written with the request and delivered by `mail_outbox`."""
+
+    __tablename__ = "email_outbox"
+    id: Mapped[int] = mapped_column(primary_key=True)
+    to_email: Mapped[str] = mapped_column(String(254), nullable=False)
+    subject: Mapped[str] = mapped_column(String(255), nullable=False)
+    body: Mapped[str] = mapped_column(Text, nullable=False)
+    is_html: Mapped[bool] = mapped_column(Boolean(), nullable=False, default=False)
+    status: Mapped[email_status] = mapped_column(
+        Enum(email_status, name="email_status_enum", native_enum=False),
+        nullable=False,
+        default=email_status.PENDING,
+    )
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # When a pending mail may next be tried, or when a SENDING claim expires
+    next_attempt_at: Mapped[DateTime] = mapped_column(
+        DateTime(), default=func.now(), server_default=func.now(), nullable=False
+    )
+    last_error: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(), default=func.now(), server_default=func.now(), nullable=False
+    )
+    sent_at: Mapped[DateTime] = mapped_column(DateTime(), nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+
+class IdempotencyKey(db.Model):
+    """A request seen under an `Idempotency-Key`, and its response once done."""
+
+    __tablename__ = "idempotency_keys"
+    # Method, path and caller the key was used for
+    scope: Mapped[str] = mapped_column(String(200), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64), nullable=False)
+    # NULL while the first request is still running
+    status_code: Mapped[int] = mapped_column(Integer, nullable=True)
+    content_type: Mapped[str] = mapped_column(String(100), nullable=True)
+    response_body: Mapped[str] = mapped_column(Text, nullable=True)
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime(), default=func.now(), server_default=func.now(), nullable=False
+    )
+    expires_at: Mapped[DateTime] = mapped_column(DateTime(), nullable=False)
+
+    __table_args__ = (db.Index("ix_idempotency_keys_expires_at", "expires_at"),)
+
+
+class ChangeLog(db.Model):
+    """One row per insert, update or delete of a synced row (see change_feed)."""
+
+    __tablename__ = "change_log"
+    seq: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    entity: Mapped[str] = mapped_column(String(30), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    deleted: Mapped[bool] = mapped_column(Boolean(), nullable=False, default=False)
+    # Statement time rather than transaction start, see change_feed
+    changed_at: Mapped[DateTime] = mapped_column(
+        DateTime(), server_default=func.clock_timestamp(), nullable=False
+    )
+
+    __table_args__ = (db.Index("ix_change_log_changed_at", "changed_at"),)
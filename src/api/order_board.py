@@ -0,0 +1,209 @@
+"""
+In-memory board of active orders (PENDING, IN_PROGRESS, READY).
+
+Kitchen and waiter screens only care about orders that are still moving, so
+instead of querying the whole `orders` table on every read they read from
+this board. It is loaded once per process and then maintained incrementally:
+
+- write paths in this process publish their changes to `order_events`
+  after committing, and the board applies them as a listener;
+- writes made by other workers arrive through `order_relay` once its
+  listener runs, and are also picked up by `sync()`, which reads only the
+  orders touched since the last sync and runs at most once every
+  `ORDER_BOARD_SYNC_SECONDS`, plus a full reload every
+  `ORDER_BOARD_RELOAD_SECONDS` to catch deletes.
+
+`check()` compares the board with the database and reports any drift.
+"""
+
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select, func
+
+from src.api.models import Order, order_status, ACTIVE_ORDER_STATUSES
+from src.api.order_events import order_events
+from src.api.order_queries import select_orders, load_orders
+
+# Re-read this much history on incremental syncs so transactions that
+# committed late (their updated_at is their start time) are not missed
+SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class ActiveOrderBoard:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._orders: Dict[int, Dict[str, Any]] = {}
+        self._statuses: Dict[int, order_status] = {}
+        self._tables: Dict[int, Optional[int]] = {}
+        self._by_status: Dict[order_status, set] = {
+            status: set() for status in ACTIVE_ORDER_STATUSES
+        }
+        self._by_table: Dict[Optional[int], set] = {}
+        self._watermark = None
+        self._loaded = False
+        self._last_sync = 0.0
+        self._last_reload = 0.0
+        self.sync_interval = 2.0
+        self.reload_interval = 60.0
+
+    def init_app(self, app, session=None):
+        self.sync_interval = float(app.config.get("ORDER_BOARD_SYNC_SECONDS", 2))
+        self.reload_interval = float(app.config.get("ORDER_BOARD_RELOAD_SECONDS", 60))
+        order_events.add_listener(self.handle_event)
+        if session is not None:
+            self.load(session)
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    # Maintenance
+
+    def load(self, session):
+        """Replace the board with the active orders currently in the database."""
+        orders = load_orders(
+            session, select_orders(Order.status.in_(ACTIVE_ORDER_STATUSES))
+        )
+        watermark = session.scalar(select(func.max(Order.updated_at)))
+        serialized = [order.serialize() for order in orders]
+
+        with self._lock:
+            self._orders.clear()
+            self._statuses.clear()
+            self._tables.clear()
+            self._by_table.clear()
+            for ids in self._by_status.values():
+                ids.clear()
+            for data in serialized:
+                self._insert(data)
+            self._watermark = watermark
+            self._loaded = True
+            self._last_sync = self._last_reload = time.monotonic()
+
+    def sync(self, session, force: bool = False):
+        """Pull in changes made by other processes since the last sync."""
+        now = time.monotonic()
+        if not self._loaded or now - self._last_reload >= self.reload_interval:
+            self.load(session)
+            return
+        if not force and now - self._last_sync < self.sync_interval:
+            return
+
+        stmt = select_orders()
+        if self._watermark is not None:
+            stmt = stmt.where(Order.updated_at > self._watermark - SYNC_OVERLAP)
+        orders = load_orders(session, stmt)
+        changes = [(order.updated_at, order.serialize()) for order in orders]
+
+        with self._lock:
+            for updated_at, data in changes:
+                self.apply(data)
+                if self._watermark is None or updated_at > self._watermark:
+                    self._watermark = updated_at
+            self._last_sync = now
+
+    def handle_event(self, event):
+        if event.type == "order.deleted":
+            self.discard(event.payload["id"])
+        elif event.type.startswith("order."):
+            self.apply(event.payload)
+
+    def apply(self, data: Dict[str, Any]):
+        """Record the committed state of a serialized order."""
+        with self._lock:
+            self._remove(data["id"])
+            if order_status(data["status"]) in ACTIVE_ORDER_STATUSES:
+                self._insert(data)
+
+    def discard(self, order_id: int):
+        with self._lock:
+            self._remove(order_id)
+
+    def _insert(self, data: Dict[str, Any]):
+        order_id = data["id"]
+        status = order_status(data["status"])
+        table_id = data["table"]["id"] if isinstance(data.get("table"), dict) else None
+        self._orders[order_id] = data
+        self._statuses[order_id] = status
+        self._tables[order_id] = table_id
+        self._by_status[status].add(order_id)
+        self._by_table.setdefault(table_id, set()).add(order_id)
+
+    def _remove(self, order_id: int):
+        if self._orders.pop(order_id, None) is None:
+            return
+        self._by_status[self._statuses.pop(order_id)].discard(order_id)
+        table_id = self._tables.pop(order_id)
+        ids = self._by_table.get(table_id)
+        if ids is not None:
+            ids.discard(order_id)
+            if not ids:
+                del self._by_table[table_id]
+
+    # Reads
+
+    def orders(
+        self,
+        statuses: Optional[Iterable[order_status]] = None,
+        table_id: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """Serialized active orders, newest first."""
+        with self._lock:
+            if table_id is not None:
+                ids = set(self._by_table.get(table_id, ()))
+                if statuses is not None:
+                    ids = {i for i in ids if self._statuses[i] in statuses}
+            else:
+                ids = set()
+                for status in statuses or ACTIVE_ORDER_STATUSES:
+                    ids |= self._by_status.get(status, set())
+            return [self._orders[i] for i in sorted(ids, reverse=True)]
+
+    def count(self, statuses: Optional[Iterable[order_status]] = None) -> int:
+        with self._lock:
+            return sum(
+                len(self._by_status.get(status, ()))
+                for status in statuses or ACTIVE_ORDER_STATUSES
+            )
+
+    # Verification
+
+    def check(self, session) -> Dict[str, Any]:
+        """
+        Compare the board with the database.
+
+        Returns the ids missing from the board, the ids the board holds but
+        the database no longer considers active, and the ids whose status
+        differs.
+        """
+        rows = session.execute(
+            select(Order.id, Order.status).where(
+                Order.status.in_(ACTIVE_ORDER_STATUSES)
+            )
+        ).all()
+        expected = {row.id: row.status for row in rows}
+
+        with self._lock:
+            actual = dict(self._statuses)
+
+        missing = sorted(set(expected) - set(actual))
+        stale = sorted(set(actual) - set(expected))
+        mismatched = sorted(
+            order_id
+            for order_id in set(expected) & set(actual)
+            if expected[order_id] != actual[order_id]
+        )
+        return {
+            "consistent": not (missing or stale or mismatched),
+            "board_size": len(actual),
+            "database_size": len(expected),
+            "missing": missing,
+            "stale": stale,
+            "mismatched": mismatched,
+        }
+
+
+order_board = ActiveOrderBoard()
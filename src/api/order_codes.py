@@ -0,0 +1,55 @@
+"""
+Order codes: `ORD` followed by a number from a Postgres sequence.
+
+`order_code_seq` counts in steps of ORDER_CODE_BLOCK, so each `nextval`
+reserves a whole block of numbers for the worker that called it; the
+worker then hands codes out of its block in memory. `nextval` never
+blocks and is never rolled back, so workers share nothing but that call,
+made once per block, and no two of them can get the same number.
+
+Numbers left in a block when a worker exits are skipped, which only leaves
+gaps. Codes grow over time but are not ordered across workers.
+"""
+
+import os
+import threading
+
+from sqlalchemy import select
+
+from src.api.models import ORDER_CODE_BLOCK, order_code_seq
+
+PREFIX = "ORD"
+
+
+def format_code(number: int) -> str:
+    return f"{PREFIX}{number:08d}"
+
+
+class OrderCodeGenerator:
+    def __init__(self, block: int = ORDER_CODE_BLOCK):
+        self.block = block
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._pid = None
+
+    def reset(self):
+        with self._lock:
+            self._next = self._end = 0
+
+    def next(self, session) -> str:
+        """A new order code, reserving a block through `session` when needed."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # A forked worker must not reuse its parent's block
+                self._pid = os.getpid()
+                self._next = self._end = 0
+            if self._next >= self._end:
+                start = session.execute(select(order_code_seq.next_value())).scalar()
+                self._next, self._end = start, start + self.block
+            number = self._next
+            self._next += 1
+        return format_code(number)
+
+
+order_codes = OrderCodeGenerator()
@@ -0,0 +1,122 @@
+"""
+In-process order event broker used by the kitchen live feed.
+
+Order writes publish small events into a bounded, sequence-numbered log.
+Stream handlers do not own a queue each: they all wait on one shared
+condition and keep only the sequence number of the last event they sent,
+so an idle kitchen screen costs a sleeping thread and an integer.
+Changes made by other workers are published here by `order_relay`.
+"""
+
+import json
+import threading
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from src.api.json_encoding import default
+
+
+class OrderEvent:
+    __slots__ = ("seq", "type", "payload")
+
+    def __init__(self, seq: int, type: str, payload: Dict[str, Any]):
+        self.seq = seq
+        self.type = type
+        self.payload = payload
+
+
+class OrderEventBroker:
+    def __init__(self, maxlen: int = 1000):
+        self._events = deque(maxlen=maxlen)
+        self._seq = 0
+        self._condition = threading.Condition()
+        self._listeners = []
+        # Sequence numbers are per process; the epoch lets a reconnecting
+        # client that was served by another worker be told to resync.
+        self.epoch = uuid.uuid4().hex[:8]
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        epoch, _, seq = (event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def to_sse(self, event: OrderEvent) -> str:
+        return format_sse(event.type, event.payload, self.event_id(event.seq))
+
+    def add_listener(self, callback: Callable[[OrderEvent], None]):
+        """Call `callback` synchronously for every event published here."""
+        if callback not in self._listeners:
+            self._listeners.append(callback)
+
+    def publish(self, type: str, payload: Dict[str, Any]) -> int:
+        with self._condition:
+            self._seq += 1
+            event = OrderEvent(self._seq, type, payload)
+            self._events.append(event)
+            self._condition.notify_all()
+        for callback in self._listeners:
+            callback(event)
+        return event.seq
+
+    def events_since(self, seq: int) -> Optional[List[OrderEvent]]:
+        """
+        Return the events published after `seq`.
+
+        Returns None when `seq` is older than the retained window (or comes
+        from another process), meaning the caller must resync from a fresh
+        snapshot.
+        """
+        with self._condition:
+            return self._events_since(seq)
+
+    def wait_for_events(
+        self, seq: int, timeout: Optional[float] = None
+    ) -> Optional[List[OrderEvent]]:
+        """
+        Block until events newer than `seq` exist or `timeout` elapses.
+
+        Returns an empty list on timeout and None when a resync is needed.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq != seq, timeout=timeout)
+            return self._events_since(seq)
+
+    def _events_since(self, seq: int) -> Optional[List[OrderEvent]]:
+        if seq == self._seq:
+            return []
+        if seq > self._seq:
+            return None
+        if not self._events or self._events[0].seq > seq + 1:
+            return None
+        start = seq + 1 - self._events[0].seq
+        return [self._events[i] for i in range(start, len(self._events))]
+
+
+def format_sse(event: str, data: Any, event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=default, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+order_events = OrderEventBroker()
+
+
+def publish_order_change(order, event: str = "order.updated") -> int:
+    """Publish a committed order change. Call after `db.session.commit()`."""
+    return order_events.publish(event, order.serialize())
+
+
+def publish_order_deleted(order_id: int) -> int:
+    return order_events.publish("order.deleted", {"id": order_id})
@@ -0,0 +1,152 @@
+"""
+Order intake: turn the line items a client sends into a priced order.
+
+Clients only say what they want and how many; prices come from the menu.
+Every referenced product is fetched with one `IN` query, line prices and
+the total are computed with `Decimal` and rounded to cents, and the order
+and its details are written in one flush. Prices and totals are stored as
+`Numeric(10, 2)` and serialized as `Decimal`, so amounts are exact from the
+menu price to the response. SQLAlchemy sends all detail rows as a single
+multi-row `INSERT`, so an order costs the same number of round trips
+whether it has two lines or two hundred.
+"""
+
+from dataclasses import dataclass
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List
+
+from sqlalchemy import select
+
+from src.api.models import Order, OrderDetail, Product, order_status
+from src.api.order_codes import order_codes
+
+CENTS = Decimal("0.01")
+
+# Group orders are big, but not this big
+MAX_LINES = 200
+MAX_QUANTITY = 100
+
+
+class OrderIntakeError(Exception):
+    def __init__(self, message, status_code=400):
+        Exception.__init__(self, message)
+        self.message = message
+        self.status_code = status_code
+
+
+@dataclass
+class PricedLine:
+    product_id: int
+    product_type: str
+    name: str
+    quantity: int
+    unit_price: Decimal
+
+    @property
+    def subtotal(self) -> Decimal:
+        return self.unit_price * self.quantity
+
+    def detail(self) -> OrderDetail:
+        is_drink = self.product_type == "DRINK"
+        return OrderDetail(
+            dish_id=None if is_drink else self.product_id,
+            drink_id=self.product_id if is_drink else None,
+            product_name=self.name,
+            quantity=self.quantity,
+            unit_price=self.unit_price,
+        )
+
+
+def parse_lines(items, id_key: str = "product_id") -> Dict[int, int]:
+    """
+    Quantities by product id, in the order products first appear.
+
+    Repeated products are merged into one line.
+    """
+    if not isinstance(items, list) or not items:
+        raise OrderIntakeError("Order must contain at least one product")
+    if len(items) > MAX_LINES:
+        raise OrderIntakeError(f"An order can have at most {MAX_LINES} lines")
+
+    quantities: Dict[int, int] = {}
+    for item in items:
+        try:
+            product_id = int(item[id_key])
+            quantity = int(item.get("quantity", 1))
+        except KeyError as e:
+            raise OrderIntakeError(f"Missing required field: {e}")
+        except (TypeError, ValueError, AttributeError):
+            raise OrderIntakeError("Product ids and quantities must be integers")
+        if not 0 < quantity <= MAX_QUANTITY:
+            raise OrderIntakeError(f"Quantities must be between 1 and {MAX_QUANTITY}")
+        quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities
+
+
+def price_lines(session, quantities: Dict[int, int]) -> List[PricedLine]:
+    """Price every line from the menu with a single query."""
+    rows = session.execute(
+        select(
+            Product.id,
+            Product.product_type,
+            Product.name,
+            Product.price,
+            Product.is_active,
+        ).where(Product.id.in_(quantities))
+    ).all()
+    products = {row.id: row for row in rows}
+
+    missing = [product_id for product_id in quantities if product_id not in products]
+    if missing:
+        raise OrderIntakeError(f"Products not found: {missing}", 404)
+    inactive = [
+        pid
+        for pid in quantities
+        if not products[pid].is_active
+        or products[pid].product_type not in ("DISH", "DRINK")
+    ]
+    if inactive:
+        raise OrderIntakeError(f"Products not available: {inactive}")
+
+    return [
+        PricedLine(
+            product_id=product_id,
+            product_type=products[product_id].product_type,
+            name=products[product_id].name,
+            quantity=quantity,
+            unit_price=Decimal(products[product_id].price).quantize(CENTS),
+        )
+        for product_id, quantity in quantities.items()
+    ]
+
+
+def order_total(lines: Iterable[PricedLine]) -> Decimal:
+    return sum((line.subtotal for line in lines), Decimal("0")).quantize(
+        CENTS, rounding=ROUND_HALF_UP
+    )
+
+
+def set_details(order: Order, lines: List[PricedLine]):
+    """Replace the order's details and total with the priced lines."""
+    order.details = [line.detail() for line in lines]
+    order.total = order_total(lines)
+
+
+def create_order(session, items, id_key: str = "product_id", **fields) -> Order:
+    """
+    Price `items` and add a pending order with its details to `session`.
+
+    The order is flushed, not committed. Raises OrderIntakeError for lines
+    that cannot be ordered.
+    """
+    lines = price_lines(session, parse_lines(items, id_key))
+    order = Order(
+        order_code=order_codes.next(session),
+        status=order_status.PENDING,
+        total=0,
+        **fields,
+    )
+    set_details(order, lines)
+    session.add(order)
+    session.flush()
+    return order
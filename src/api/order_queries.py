@@ -0,0 +1,168 @@
+"""
+Shared loading for orders that are going to be serialized.
+
+`Order.serialize` touches `user`, `creator`, `table` and `details`. Loading
+those lazily costs four extra queries per order, so every endpoint that
+returns orders builds its statement here: each relationship is fetched with
+one batched `SELECT ... WHERE id IN (...)` per page instead.
+
+Listings that only serialize can skip the ORM altogether: `select_order_rows`
+selects the columns `Order.serialize` reads, with the customer, creator and
+table joined in, and `serialize_order_rows` builds the same dicts from those
+tuples plus one query for the page's details. Nothing is added to the
+session's identity map, and values go to the JSON encoder as the database
+returns them (enums, dates; see json_encoding).
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, select
+from sqlalchemy.orm import aliased, selectinload
+
+from src.api.models import Order, OrderDetail, Table, User
+from src.api.pagination import count_rows
+
+# Sort key for order listings, newest first; `id` breaks created_at ties
+ORDER_SORT_KEY = (Order.created_at, Order.id)
+
+
+def order_load_options():
+    return (
+        selectinload(Order.user),
+        selectinload(Order.creator),
+        selectinload(Order.table),
+        selectinload(Order.details),
+    )
+
+
+def select_orders(*criteria) -> Select:
+    """`SELECT orders` with everything `Order.serialize` needs preloaded."""
+    stmt = select(Order).options(*order_load_options())
+    if criteria:
+        stmt = stmt.where(*criteria)
+    return stmt
+
+
+def load_orders(session, stmt: Select) -> List[Order]:
+    return list(session.scalars(stmt).unique())
+
+
+def load_order(session, order_id: int) -> Optional[Order]:
+    """Fetch a single order ready to be serialized, or None."""
+    return session.scalars(select_orders(Order.id == order_id)).first()
+
+
+def paginate_orders(
+    session, stmt: Select, page: int, per_page: int, oldest_first: bool = False
+) -> Tuple[List[Order], int]:
+    """
+    Return one page of `stmt` (newest first by default) and the total count.
+
+    A page always costs the same number of queries: the count, the page
+    itself and one batched load per relationship.
+    """
+    total = count_rows(session, stmt)
+    if oldest_first:
+        stmt = stmt.order_by(Order.created_at.asc(), Order.id.asc())
+    else:
+        stmt = stmt.order_by(Order.created_at.desc(), Order.id.desc())
+    stmt = stmt.offset((page - 1) * per_page).limit(per_page)
+    return load_orders(session, stmt), total
+
+
+Customer = aliased(User, name="customer")
+Creator = aliased(User, name="creator")
+
+
+def select_order_rows(*criteria) -> Select:
+    """Column tuples with what `serialize_order_rows` needs, one per order."""
+    stmt = (
+        select(
+            Order.id,
+            Order.order_code,
+            Order.user_id,
+            Order.creator_id,
+            Order.status,
+            Order.total,
+            Order.take_away,
+            Order.created_at,
+            Customer.name.label("customer_name"),
+            Customer.last_name.label("customer_last_name"),
+            Creator.name.label("creator_name"),
+            Creator.last_name.label("creator_last_name"),
+            Table.id.label("table_id"),
+            Table.number.label("table_number"),
+            Table.chairs.label("table_chairs"),
+            Table.status.label("table_status"),
+        )
+        .select_from(Order)
+        .outerjoin(Customer, Order.user_id == Customer.id)
+        .outerjoin(Creator, Order.creator_id == Creator.id)
+        .outerjoin(Table, Order.table_id == Table.id)
+    )
+    if criteria:
+        stmt = stmt.where(*criteria)
+    return stmt
+
+
+def serialize_order_rows(session, rows: Sequence) -> List[Dict]:
+    """`Order.serialize()` for rows of `select_order_rows`, in their order."""
+    details: Dict[int, List[Dict]] = {row.id: [] for row in rows}
+    if details:
+        lines = session.execute(
+            select(
+                OrderDetail.order_id,
+                OrderDetail.id,
+                OrderDetail.product_name,
+                OrderDetail.quantity,
+                OrderDetail.unit_price,
+                OrderDetail.dish_id,
+            )
+            .where(OrderDetail.order_id.in_(list(details)))
+            .order_by(OrderDetail.id)
+        )
+        for line in lines:
+            details[line.order_id].append(
+                {
+                    "id": line.id,
+                    "name": line.product_name,
+                    "quantity": line.quantity,
+                    "price": line.unit_price,
+                    "subtotal": line.unit_price * line.quantity,
+                    "type": "FOOD" if line.dish_id else "DRINK",
+                }
+            )
+    return [
+        {
+            "id": row.id,
+            "orderId": row.order_code,
+            "userId": row.user_id,
+            "creatorId": row.creator_id,
+            "customer": (
+                f"{row.customer_name} {row.customer_last_name}"
+                if row.customer_name is not None
+                else "Guest"
+            ),
+            "creator": (
+                f"{row.creator_name} {row.creator_last_name}"
+                if row.creator_name is not None
+                else "Guest"
+            ),
+            "table": (
+                {
+                    "id": row.table_id,
+                    "number": row.table_number,
+                    "chairs": row.table_chairs,
+                    "status": row.table_status,
+                }
+                if row.table_id is not None
+                else None
+            ),
+            "status": row.status,
+            "total": row.total,
+            "take_away": row.take_away,
+            "date": row.created_at.date(),
+            "details": details[row.id],
+        }
+        for row in rows
+    ]
@@ -0,0 +1,128 @@
+"""
+Order changes relayed between worker processes.
+
+`order_events` is per process, so a kitchen stream served by one worker
+does not see orders another worker changes. Every flush that writes orders
+or order lines sends `pg_notify` on the `order_changes` channel with the
+ids it created, updated and deleted; Postgres delivers it when the
+transaction commits and drops it on rollback.
+
+Each worker's listener, started by its first kitchen stream, loads the
+orders it is told about and publishes them on its own `order_events`,
+which feeds its streams and keeps its `order_board` current. Notifications
+from the worker's own process are skipped: the route that made the change
+publishes it itself after committing. Orders that no longer exist when the
+notification arrives are published as deleted.
+
+Other kitchen events (`ingredient.low_stock`) are sent whole with `relay`
+and published as they are.
+"""
+
+import json
+import os
+from typing import Dict, List, Set
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from src.api.models import Order, OrderDetail
+from src.api.order_events import order_events
+from src.api.order_queries import load_orders, select_orders
+from src.api.pg_listener import ChannelListener
+
+CHANNEL = "order_changes"
+# Ids per notification; payloads over 8000 bytes fail the transaction
+IDS_PER_MESSAGE = 500
+
+
+def flushed_changes(session) -> Dict[str, List[int]]:
+    """Ids of the orders this flush creates, updates and deletes."""
+    created: Set[int] = set()
+    updated: Set[int] = set()
+    deleted: Set[int] = set()
+    for instance in session.new:
+        if isinstance(instance, Order):
+            created.add(instance.id)
+        elif isinstance(instance, OrderDetail):
+            updated.add(instance.order_id)
+    for instance in session.dirty:
+        if isinstance(instance, Order) and session.is_modified(instance):
+            updated.add(instance.id)
+        elif isinstance(instance, OrderDetail) and session.is_modified(instance):
+            updated.add(instance.order_id)
+    for instance in session.deleted:
+        if isinstance(instance, Order):
+            deleted.add(instance.id)
+        elif isinstance(instance, OrderDetail):
+            updated.add(instance.order_id)
+    updated -= created | deleted
+    updated.discard(None)
+    return {
+        "created": sorted(created),
+        "updated": sorted(updated),
+        "deleted": sorted(deleted),
+    }
+
+
+class OrderRelay:
+    def __init__(self):
+        self.listen = True
+        self._engine = None
+        self._listener = ChannelListener(CHANNEL, self._receive, "order")
+
+    def init_app(self, app):
+        # pgbouncer in transaction mode does not deliver notifications
+        self.listen = bool(
+            app.config.get("ORDER_LISTEN", not app.config.get("DB_PGBOUNCER"))
+        )
+
+    def start_listener(self, engine):
+        """Follow other workers' order changes; started by the first stream."""
+        if self.listen:
+            self._engine = engine
+            self._listener.start(engine)
+
+    def stop_listener(self):
+        self._listener.stop()
+
+    def relay(self, session, type: str, payload: Dict):
+        """Publish an event on the other workers once `session` commits."""
+        message = {"pid": os.getpid(), "event": type, "payload": payload}
+        session.execute(select(func.pg_notify(CHANNEL, json.dumps(message))))
+
+    def _receive(self, message: str):
+        data = json.loads(message)
+        if data.get("pid") == os.getpid():
+            return
+        if "event" in data:
+            order_events.publish(data["event"], data["payload"])
+            return
+        ids = data["created"] + data["updated"]
+        orders = {}
+        if ids:
+            with Session(self._engine) as session:
+                for order in load_orders(session, select_orders(Order.id.in_(ids))):
+                    orders[order.id] = order.serialize()
+        for kind in ("created", "updated"):
+            for id in data[kind]:
+                if id in orders:
+                    order_events.publish(f"order.{kind}", orders[id])
+        gone = [id for id in ids if id not in orders]
+        for id in data["deleted"] + gone:
+            order_events.publish("order.deleted", {"id": id})
+
+
+order_relay = OrderRelay()
+
+
+@event.listens_for(Session, "after_flush")
+def _notify_order_changes(session, flush_context):
+    changes = flushed_changes(session)
+    for kind, ids in changes.items():
+        for start in range(0, len(ids), IDS_PER_MESSAGE):
+            end = start + IDS_PER_MESSAGE
+            message = {"pid": os.getpid(), "created": [], "updated": [], "deleted": []}
+            message[kind] = ids[start:end]
+            session.connection().execute(
+                select(func.pg_notify(CHANNEL, json.dumps(message)))
+            )
@@ -0,0 +1,195 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Offset pagination makes the database walk and discard every row before the
+requested page, and each page also pays for a `count(*)` over the filtered
+set. Keyset pagination instead remembers the sort key of the last row it
+returned and asks for rows strictly after it, which an index on the sort
+columns answers directly no matter how deep the page is.
+
+Listings opt in by passing `cursor` (empty for the first page). Responses
+then carry opaque `next_cursor` / `prev_cursor` tokens, and
+`include_total=false` skips the count query entirely.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from sqlalchemy import Select, select, func, tuple_
+
+MAX_PER_PAGE = 100
+
+
+@dataclass
+class PaginationArgs:
+    page: int
+    per_page: int
+    cursor: Optional[str]
+    include_total: bool
+
+    @property
+    def use_cursor(self) -> bool:
+        return self.cursor is not None
+
+
+@dataclass
+class Page:
+    items: List[Any]
+    total: Optional[int]
+    page: Optional[int]
+    per_page: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+    @property
+    def pages(self) -> Optional[int]:
+        if self.total is None:
+            return None
+        return (self.total + self.per_page - 1) // self.per_page
+
+
+def parse_pagination_args(args) -> PaginationArgs:
+    """
+    Read page/per_page/cursor/include_total from request args.
+
+    Raises ValueError for malformed values, like `decode_cursor`.
+    """
+    page = max(int(args.get("page", 1)), 1)
+    per_page = min(max(int(args.get("per_page", 10)), 1), MAX_PER_PAGE)
+    return PaginationArgs(
+        page=page,
+        per_page=per_page,
+        cursor=args.get("cursor"),
+        include_total=args.get("include_total", "true").lower() != "false",
+    )
+
+
+def encode_cursor(values: Sequence[Any], direction: str = "next") -> str:
+    key = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps({"k": key, "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str):
+    """Return `(values, direction)` for a cursor produced by `encode_cursor`."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [
+            datetime.fromisoformat(v) if i == 0 and isinstance(v, str) else v
+            for i, v in enumerate(data["k"])
+        ]
+        direction = data["d"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+    if direction not in ("next", "prev"):
+        raise ValueError("Invalid cursor")
+    return values, direction
+
+
+def count_rows(session, stmt: Select) -> int:
+    return session.scalar(
+        select(func.count()).select_from(stmt.order_by(None).subquery())
+    )
+
+
+def fetch(session, stmt: Select, rows: bool = False) -> List[Any]:
+    """Objects of a `select(Model)`, or with `rows`, the column tuples."""
+    if rows:
+        return list(session.execute(stmt).all())
+    return list(session.scalars(stmt).unique())
+
+
+def keyset_paginate(
+    session,
+    stmt: Select,
+    sort_columns: Sequence,
+    cursor: Optional[str],
+    per_page: int,
+    rows: bool = False,
+) -> Page:
+    """
+    Fetch one page of `stmt` after `cursor`, sorted descending by `sort_columns`.
+
+    `sort_columns` must end with a unique column (usually the primary key)
+    so the key identifies exactly one row, and with `rows` be selected
+    under their own names. An empty `cursor` returns the first page.
+    """
+    key = tuple_(*sort_columns)
+    direction = "next"
+    if cursor:
+        values, direction = decode_cursor(cursor)
+        if len(values) != len(sort_columns):
+            raise ValueError("Invalid cursor")
+        if direction == "next":
+            stmt = stmt.where(key < tuple_(*values))
+        else:
+            stmt = stmt.where(key > tuple_(*values))
+
+    if direction == "next":
+        stmt = stmt.order_by(*[c.desc() for c in sort_columns])
+    else:
+        stmt = stmt.order_by(*[c.asc() for c in sort_columns])
+
+    items = fetch(session, stmt.limit(per_page + 1), rows)
+    has_more = len(items) > per_page
+    items = items[:per_page]
+    if direction == "prev":
+        items.reverse()
+
+    def key_of(row):
+        return [getattr(row, c.key) for c in sort_columns]
+
+    if direction == "next":
+        has_next, has_prev = has_more, bool(cursor)
+    else:
+        has_next, has_prev = True, has_more
+
+    return Page(
+        items=items,
+        total=None,
+        page=None,
+        per_page=per_page,
+        next_cursor=(
+            encode_cursor(key_of(items[-1]), "next") if items and has_next else None
+        ),
+        prev_cursor=(
+            encode_cursor(key_of(items[0]), "prev") if items and has_prev else None
+        ),
+    )
+
+
+def paginate(
+    session,
+    stmt: Select,
+    sort_columns: Sequence,
+    args: PaginationArgs,
+    rows: bool = False,
+):
+    """
+    Page through `stmt` newest first, by offset or by cursor per `args`.
+
+    The total is always counted for offset pages; cursor pages only count
+    it when `include_total` is set. With `rows`, items are column tuples
+    instead of ORM objects.
+    """
+    if args.use_cursor:
+        total = count_rows(session, stmt) if args.include_total else None
+        page = keyset_paginate(
+            session, stmt, sort_columns, args.cursor, args.per_page, rows
+        )
+        page.total = total
+        return page
+
+    total = count_rows(session, stmt)
+    stmt = (
+        stmt.order_by(*[c.desc() for c in sort_columns])
+        .offset((args.page - 1) * args.per_page)
+        .limit(args.per_page)
+    )
+    items = fetch(session, stmt, rows)
+    return Page(items=items, total=total, page=args.page, per_page=args.per_page)
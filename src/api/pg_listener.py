@@ -0,0 +1,77 @@
+"""
+Background `LISTEN` on a Postgres channel.
+
+Each worker process runs at most one thread per channel. It holds its own
+connection outside the pool in autocommit mode, waits on the socket for up
+to `LISTEN_TIMEOUT` seconds at a time so it notices shutdown, and passes
+each notification's payload to a callback. A notification the callback
+fails on is logged and dropped; a lost connection ends the thread, and the
+next `start` opens a new one.
+"""
+
+import os
+import select as io_select
+import threading
+from typing import Callable
+
+# Seconds a listener waits for notifications before checking for shutdown
+LISTEN_TIMEOUT = 5
+
+
+class ChannelListener:
+    def __init__(self, channel: str, receive: Callable[[str], None], name: str):
+        self.channel = channel
+        self.receive = receive
+        self.name = name
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+        self._stopping = threading.Event()
+
+    def start(self, engine):
+        """Start listening in this process unless already running."""
+        with self._lock:
+            if self._thread and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stopping.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._listen,
+                args=(engine,),
+                name=f"{self.name}-listener",
+                daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread:
+            self._thread.join(LISTEN_TIMEOUT + 1)
+        self._thread = None
+
+    def _listen(self, engine):
+        label = self.name.capitalize()
+        try:
+            connection = engine.raw_connection()
+        except Exception as e:
+            print(f"{label} listener could not connect:", e)
+            return
+        try:
+            dbapi = connection.dbapi_connection
+            dbapi.autocommit = True
+            with dbapi.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            while not self._stopping.is_set():
+                if io_select.select([dbapi], [], [], LISTEN_TIMEOUT) == ([], [], []):
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    notify = dbapi.notifies.pop(0)
+                    try:
+                        self.receive(notify.payload)
+                    except Exception as e:
+                        print(f"{label} listener dropped a notification:", e)
+        except Exception as e:
+            print(f"{label} listener stopped:", e)
+        finally:
+            connection.invalidate()
@@ -0,0 +1,170 @@
+"""
+Column-level queries for the merged dish/drink menu listing.
+
+The listing shows dishes and drinks together, so it reads the `products`
+table joined to both subtype tables in one statement. Filtering, ordering
+and paging happen in SQL, the total comes from a `count(*) OVER ()` window
+on the same rows, and only the columns the listing renders are selected.
+
+`page_menu_search` is the ranked, typo-tolerant variant; see
+`product_search` for the index behind it.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, or_, case, literal
+
+from src.api.models import Product, Dish, Drink
+from src.api.product_search import (
+    SIMILARITY_THRESHOLD,
+    product_search,
+    search_document,
+)
+
+products = Product.__table__
+dishes = Dish.__table__
+drinks = Drink.__table__
+
+# Listing `tipo` values and the polymorphic identity they map to
+PRODUCT_TYPES = {"PLATO": "DISH", "BEBIDA": "DRINK"}
+LISTING_TYPES = {identity: tipo for tipo, identity in PRODUCT_TYPES.items()}
+
+
+def select_menu_listing(search: str = "", tipo: Optional[str] = None):
+    """Active products as listing rows, dishes first, then by id."""
+    stmt = (
+        select(
+            products.c.id,
+            products.c.name,
+            products.c.description,
+            products.c.image_url,
+            products.c.price,
+            products.c.product_type,
+            products.c.is_active,
+            dishes.c.dish_type,
+            drinks.c.drink_type,
+            func.count().over().label("total"),
+        )
+        .select_from(
+            products.outerjoin(dishes, dishes.c.id == products.c.id).outerjoin(
+                drinks, drinks.c.id == products.c.id
+            )
+        )
+        .where(
+            products.c.is_active.is_(True),
+            products.c.product_type.in_(
+                [PRODUCT_TYPES[tipo]] if tipo in PRODUCT_TYPES else list(LISTING_TYPES)
+            ),
+            or_(dishes.c.id.isnot(None), drinks.c.id.isnot(None)),
+        )
+        .order_by(
+            case((products.c.product_type == "DISH", 0), else_=1),
+            products.c.id,
+        )
+    )
+
+    if search:
+        stmt = stmt.where(
+            or_(
+                products.c.name.ilike(f"%{search}%"),
+                products.c.description.ilike(f"%{search}%"),
+            )
+        )
+
+    return stmt
+
+
+def listing_item(row, score: Optional[float] = None) -> Dict[str, Any]:
+    tipo = LISTING_TYPES[row.product_type]
+    item = {
+        "id": f"{tipo}-{row.id}",
+        "name": row.name,
+        "description": row.description,
+        "image_url": row.image_url,
+        "price": row.price,
+        "tipo": tipo,
+        "type": row.dish_type if tipo == "PLATO" else row.drink_type,
+        "is_active": row.is_active,
+    }
+    if score is not None:
+        item["score"] = round(float(score), 4)
+    return item
+
+
+def page_menu_listing(
+    session, stmt, page: int, per_page: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    """Return one page of listing items and the total matching count."""
+    rows = session.execute(stmt.offset((page - 1) * per_page).limit(per_page)).all()
+    if rows:
+        total = rows[0].total
+    elif page > 1:
+        # Past the last page the window has no row to report the total on
+        total = session.scalar(
+            select(func.count()).select_from(
+                stmt.with_only_columns(products.c.id).order_by(None).subquery()
+            )
+        )
+    else:
+        total = 0
+    return [listing_item(row, getattr(row, "score", None)) for row in rows], total
+
+
+def page_menu_search(
+    session, search: str, tipo: Optional[str], page: int, per_page: int
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Return one page of listing items matching `search`, most relevant first.
+
+    Uses the pg_trgm index when the database has it, otherwise ranks ids
+    with the in-memory fallback index and loads only the requested page.
+    """
+    if product_search.trigram_available(session):
+        # `<%` filters by pg_trgm.word_similarity_threshold (0.6 by default),
+        # which rejects most single-letter typos
+        session.execute(
+            select(
+                func.set_config(
+                    "pg_trgm.word_similarity_threshold",
+                    str(SIMILARITY_THRESHOLD),
+                    True,
+                )
+            )
+        )
+        score = func.word_similarity(search, search_document)
+        stmt = (
+            select_menu_listing(tipo=tipo)
+            .add_columns(score.label("score"))
+            # `<%` and `||` share a precedence level in Postgres
+            .where(literal(search).op("<%")(search_document.self_group()))
+            .order_by(None)
+            .order_by(score.desc(), products.c.id)
+        )
+        return page_menu_listing(session, stmt, page, per_page)
+
+    ranked = product_search.fallback_index(session).search(search)
+    if not ranked:
+        return [], 0
+    scores = dict(ranked)
+    # Inactive products and other types are still filtered in SQL
+    ids = session.scalars(
+        select_menu_listing(tipo=tipo)
+        .with_only_columns(products.c.id)
+        .where(products.c.id.in_(scores))
+    ).all()
+    ids.sort(key=lambda product_id: (-scores[product_id], product_id))
+    start = (page - 1) * per_page
+    end = start + per_page
+    page_ids = ids[start:end]
+    if not page_ids:
+        return [], len(ids)
+
+    rows = {
+        row.id: row
+        for row in session.execute(
+            select_menu_listing(tipo=tipo).where(products.c.id.in_(page_ids))
+        )
+    }
+    return [
+        listing_item(rows[product_id], scores[product_id]) for product_id in page_ids
+    ], len(ids)
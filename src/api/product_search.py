@@ -0,0 +1,180 @@
+"""
+Ranked, typo-tolerant product search.
+
+On Postgres with the `pg_trgm` extension, products carry a GIN trigram
+index over `name || ' ' || description` and fuzzy searches use the
+word-similarity operator (`term <% document`), which the index serves, and
+rank by `word_similarity()`.
+
+Databases without `pg_trgm` (the test database, for instance) fall back to
+`TrigramIndex`, a small in-memory index with the same trigram scoring. It
+is rebuilt whenever the menu version from `menu_cache` changes.
+"""
+
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import DDL, event, literal_column, select, text, func
+
+from src.api.menu_cache import menu_cache
+from src.api.models import Product
+
+SIMILARITY_THRESHOLD = 0.3
+SEARCH_INDEX_NAME = "ix_products_search_trgm"
+
+products = Product.__table__
+
+# Must match the indexed expression exactly for the planner to use the index
+search_document = (
+    products.c.name
+    + literal_column("' '")
+    + func.coalesce(products.c.description, literal_column("''"))
+)
+
+_WORD = re.compile(r"[^\W_]+")
+
+
+def trigrams(word: str) -> Set[str]:
+    """Trigrams of one word, padded the way pg_trgm pads them."""
+    padded = f"  {word} "
+    grams = set()
+    for start in range(len(padded) - 2):
+        end = start + 3
+        grams.add(padded[start:end])
+    return grams
+
+
+def words(text_value: Optional[str]) -> List[str]:
+    return _WORD.findall((text_value or "").lower())
+
+
+def similarity(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    shared = len(a & b)
+    return shared / (len(a) + len(b) - shared)
+
+
+class TrigramIndex:
+    """
+    In-memory trigram index over product documents.
+
+    Trigrams point at vocabulary words, and words point at documents, so a
+    query only scores words sharing at least one trigram with it. A
+    document's score is the mean, over query words, of the best similarity
+    between that query word and any word of the document.
+    """
+
+    def __init__(self, documents: Iterable[Tuple[int, str]] = ()):
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._word_trigrams: Dict[str, Set[str]] = {}
+        self._word_docs: Dict[str, Set[int]] = defaultdict(set)
+        for doc_id, document in documents:
+            self.add(doc_id, document)
+
+    def add(self, doc_id: int, document: str):
+        for word in words(document):
+            if word not in self._word_trigrams:
+                grams = trigrams(word)
+                self._word_trigrams[word] = grams
+                for gram in grams:
+                    self._postings[gram].add(word)
+            self._word_docs[word].add(doc_id)
+
+    def search(
+        self, query: str, threshold: float = SIMILARITY_THRESHOLD
+    ) -> List[Tuple[int, float]]:
+        """Return `(doc_id, score)` pairs above `threshold`, best first."""
+        query_words = words(query)
+        if not query_words:
+            return []
+
+        scores: Dict[int, float] = defaultdict(float)
+        for query_word in query_words:
+            grams = trigrams(query_word)
+            candidates = set()
+            for gram in grams:
+                candidates |= self._postings.get(gram, set())
+
+            best: Dict[int, float] = {}
+            for word in candidates:
+                score = similarity(grams, self._word_trigrams[word])
+                if score < threshold:
+                    continue
+                for doc_id in self._word_docs[word]:
+                    if score > best.get(doc_id, 0.0):
+                        best[doc_id] = score
+            for doc_id, score in best.items():
+                scores[doc_id] += score
+
+        ranked = [
+            (doc_id, total / len(query_words))
+            for doc_id, total in scores.items()
+            if total / len(query_words) >= threshold
+        ]
+        ranked.sort(key=lambda item: (-item[1], item[0]))
+        return ranked
+
+
+class ProductSearch:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._trgm_available: Optional[bool] = None
+        self._fallback: Tuple[Optional[int], Optional[TrigramIndex]] = (None, None)
+
+    def init_app(self, app):
+        with self._lock:
+            self._trgm_available = None
+            self._fallback = (None, None)
+
+    def trigram_available(self, session) -> bool:
+        """Whether the database has pg_trgm installed; checked once."""
+        if self._trgm_available is None:
+            self._trgm_available = bool(
+                session.scalar(
+                    text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                )
+            )
+        return self._trgm_available
+
+    def fallback_index(self, session) -> TrigramIndex:
+        """The in-memory index for the current menu version."""
+        version = menu_cache.current_version(session)
+        cached_version, index = self._fallback
+        if index is None or cached_version != version:
+            rows = session.execute(select(products.c.id, search_document)).all()
+            index = TrigramIndex(rows)
+            with self._lock:
+                self._fallback = (version, index)
+        return index
+
+
+product_search = ProductSearch()
+
+
+def create_search_index(target, connection, **kw):
+    """
+    Create pg_trgm and the product search index when the server allows it.
+
+    Runs after `products` is created; a server without the extension keeps
+    working with the in-memory fallback.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    try:
+        with connection.begin_nested():
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except Exception as e:
+        print("pg_trgm unavailable, product search uses the fallback index:", e)
+        return
+    connection.execute(
+        DDL(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_INDEX_NAME} ON products "
+            "USING gin ((name || ' ' || coalesce(description, '')) gin_trgm_ops)"
+        )
+    )
+
+
+event.listen(products, "after_create", create_search_index)
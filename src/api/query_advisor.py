@@ -0,0 +1,140 @@
+"""
+EXPLAIN the query shapes behind the hot listing endpoints.
+
+Each shape is built the way its endpoint builds it, run through
+`EXPLAIN (FORMAT JSON)`, and every `Seq Scan` node in the plan is flagged.
+Development databases are small enough that the planner would rather scan
+than use any index, so by default sequential scans are disabled for the
+EXPLAIN: a shape that still scans has no usable index. `planner_choice`
+keeps the planner's real choice instead.
+
+Run it with `flask explain-queries`.
+"""
+
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from sqlalchemy import Select, select, text
+
+from src.api.models import (
+    Order,
+    OrderDetail,
+    Reservation,
+    User,
+    ACTIVE_ORDER_STATUSES,
+    reservation_status,
+)
+from src.api.date_windows import date_windows, within
+from src.api.order_queries import ORDER_SORT_KEY, select_orders
+
+PAGE_SIZE = 10
+
+
+def newest_first(stmt: Select, sort_key) -> Select:
+    """The ordering and limit `paginate` adds to a listing."""
+    return stmt.order_by(*[c.desc() for c in sort_key]).limit(PAGE_SIZE)
+
+
+def query_shapes() -> Dict[str, Callable[[], Select]]:
+    now = datetime(2026, 1, 1, 20, 0)
+    reservation_key = (Reservation.start_date_time, Reservation.id)
+    return {
+        "orders, newest first": lambda: newest_first(select_orders(), ORDER_SORT_KEY),
+        "orders by status": lambda: newest_first(
+            select_orders(Order.status.in_(ACTIVE_ORDER_STATUSES)), ORDER_SORT_KEY
+        ),
+        "orders by user": lambda: newest_first(
+            select_orders(Order.user_id == 1), ORDER_SORT_KEY
+        ),
+        "orders by table": lambda: newest_first(
+            select_orders(Order.table_id == 1), ORDER_SORT_KEY
+        ),
+        "orders changed since (board sync)": lambda: select_orders(
+            Order.updated_at > now
+        ),
+        "order details for a page of orders": lambda: select(OrderDetail).where(
+            OrderDetail.order_id.in_([1, 2, 3])
+        ),
+        "orders with drinks (bar)": lambda: newest_first(
+            select_orders(Order.details.any(OrderDetail.drink_id.isnot(None))),
+            ORDER_SORT_KEY,
+        ),
+        "reservations on a day": lambda: newest_first(
+            select(Reservation).where(
+                within(Reservation.start_date_time, date_windows.day(now.date()))
+            ),
+            reservation_key,
+        ),
+        "reservations by status": lambda: newest_first(
+            select(Reservation).where(Reservation.status == reservation_status.PENDING),
+            reservation_key,
+        ),
+        "reservations of a table around a time": lambda: select(Reservation.id).where(
+            Reservation.table_id == 1,
+            Reservation.start_date_time > now - timedelta(hours=2),
+            Reservation.start_date_time < now + timedelta(hours=2),
+        ),
+        "users, newest first": lambda: newest_first(
+            select(User), (User.created_at, User.id)
+        ),
+    }
+
+
+def seq_scans(plan: dict) -> List[str]:
+    """
+    Relations read whole anywhere in `plan`.
+
+    Besides `Seq Scan`, an index scan with a filter but no index condition
+    walks the entire index only for its order, which is what a filter on an
+    expression such as `date(column)` turns into once scans are disabled.
+    """
+    found = []
+    node = plan.get("Node Type", "")
+    if node == "Seq Scan":
+        found.append(plan.get("Relation Name"))
+    elif node.startswith("Index") and "Filter" in plan and "Index Cond" not in plan:
+        found.append(f"{plan.get('Relation Name')} (via {plan.get('Index Name')})")
+    for child in plan.get("Plans", ()):
+        found.extend(seq_scans(child))
+    return found
+
+
+def indexes_used(plan: dict) -> List[str]:
+    found = [plan["Index Name"]] if "Index Name" in plan else []
+    for child in plan.get("Plans", ()):
+        found.extend(indexes_used(child))
+    return found
+
+
+def explain(session, stmt: Select) -> dict:
+    # The shapes only hold literals, and inlining them keeps enum and date
+    # values typed the way the endpoints send them
+    sql = stmt.compile(
+        dialect=session.get_bind().dialect,
+        compile_kwargs={"literal_binds": True},
+    )
+    result = session.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    return result.scalar()[0]["Plan"]
+
+
+def advise(session, planner_choice: bool = False) -> List[Dict]:
+    """
+    EXPLAIN every shape; returns one report per shape.
+
+    Runs in the caller's transaction and leaves it to be rolled back.
+    """
+    if not planner_choice:
+        session.execute(text("SET LOCAL enable_seqscan = off"))
+
+    reports = []
+    for name, build in query_shapes().items():
+        plan = explain(session, build())
+        reports.append(
+            {
+                "query": name,
+                "seq_scans": seq_scans(plan),
+                "indexes": indexes_used(plan),
+                "cost": plan.get("Total Cost"),
+            }
+        )
+    return reports
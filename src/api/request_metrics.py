@@ -0,0 +1,265 @@
+"""
+Per-request timing: latency, SQL statements and JSON serialization.
+
+Every request gets a `RequestStats` in a context variable. Engine events
+count the statements it runs and the time spent in them, and the app's
+JSON provider adds up the time spent encoding. When the request ends the
+numbers are:
+
+- sent back in a `Server-Timing` header (`SERVER_TIMING`), which browser
+  dev tools show next to the request;
+- added to Prometheus-style histograms and counters, labelled by method,
+  URL rule and status, which admins read from `GET /api/admin/metrics`;
+- printed as a slow request line when the request took longer than
+  `SLOW_REQUEST_MS` milliseconds.
+
+Streamed responses (exports, event streams) are measured up to the point
+the view returns, not until the last byte is sent. Statements run on
+threads of their own (listeners, `COPY`) are not counted. Metrics are
+kept per worker process; the `worker` label keeps workers apart.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, Optional, Sequence, Tuple
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.api.json_encoding import AppJSONProvider
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class RequestStats:
+    __slots__ = ("start", "queries", "sql_time", "serialize_time")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serialize_time = 0.0
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current.get() is not None:
+        context._request_metrics_start = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    start = getattr(context, "_request_metrics_start", None)
+    if stats is None or start is None:
+        return
+    stats.queries += 1
+    stats.sql_time += time.perf_counter() - start
+
+
+class TimedJSONProvider(AppJSONProvider):
+    """The app's JSON provider, adding encoding time to the request's stats."""
+
+    def encode(self, obj, indent=None):
+        stats = _current.get()
+        if stats is None:
+            return super().encode(obj, indent)
+        start = time.perf_counter()
+        try:
+            return super().encode(obj, indent)
+        finally:
+            stats.serialize_time += time.perf_counter() - start
+
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        value = value.replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.values: Dict[Tuple, float] = {}
+
+    def inc(self, labels: Tuple, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.labels, labels)} {value:g}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self.values: Dict[Tuple, list] = {}
+
+    def observe(self, labels: Tuple, value: float):
+        counts = self.values.get(labels)
+        if counts is None:
+            counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labels + ("le",)
+        for labels, counts in sorted(self.values.items()):
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                le = bound if isinstance(bound, str) else f"{bound:g}"
+                yield f"{self.name}_bucket{_labels(names, labels + (le,))} {total}"
+            label_text = _labels(self.labels, labels)
+            yield f"{self.name}_sum{label_text} {counts[-1]:g}"
+            yield f"{self.name}_count{label_text} {total}"
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.enabled = True
+        self.server_timing = True
+        self.slow_request_ms: Optional[float] = 500
+        self._lock = threading.Lock()
+        self.clear()
+
+    def init_app(self, app):
+        self.enabled = bool(app.config.get("REQUEST_METRICS", True))
+        self.server_timing = bool(app.config.get("SERVER_TIMING", True))
+        slow = app.config.get("SLOW_REQUEST_MS", 500)
+        self.slow_request_ms = float(slow) if slow is not None else None
+        self.clear()
+        if not self.enabled:
+            return
+        app.json = TimedJSONProvider(app)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+
+    def clear(self):
+        labels = ("method", "endpoint", "status", "worker")
+        with self._lock:
+            self.duration = Histogram(
+                "http_request_duration_seconds",
+                "Time from the start of the request until the view returned.",
+                labels,
+                DURATION_BUCKETS,
+            )
+            self.queries = Histogram(
+                "http_request_sql_queries",
+                "SQL statements run per request.",
+                labels,
+                QUERY_BUCKETS,
+            )
+            self.sql_seconds = Counter(
+                "http_request_sql_seconds_total",
+                "Time spent running SQL statements.",
+                labels,
+            )
+            self.serialize_seconds = Counter(
+                "http_request_serialize_seconds_total",
+                "Time spent encoding JSON.",
+                labels,
+            )
+            self.slow = Counter(
+                "http_slow_requests_total",
+                "Requests slower than SLOW_REQUEST_MS.",
+                labels,
+            )
+
+    def _start(self):
+        request.environ["request_metrics.token"] = _current.set(RequestStats())
+
+    def _finish(self, response):
+        stats = _current.get()
+        if stats is None:
+            return response
+        elapsed = stats.elapsed
+        if self.server_timing:
+            response.headers["Server-Timing"] = server_timing(stats, elapsed)
+        endpoint = request.url_rule.rule if request.url_rule else "<unmatched>"
+        labels = (request.method, endpoint, str(response.status_code), os.getpid())
+        slow = (
+            self.slow_request_ms is not None and elapsed * 1000 > self.slow_request_ms
+        )
+        self.record(labels, stats, elapsed, slow)
+        if slow:
+            print(
+                f"Slow request: {request.method} {request.full_path.rstrip('?')} "
+                f"{response.status_code} {elapsed * 1000:.1f} ms, "
+                f"{stats.queries} queries ({stats.sql_time * 1000:.1f} ms SQL), "
+                f"{stats.serialize_time * 1000:.1f} ms JSON"
+            )
+        return response
+
+    def _teardown(self, exc):
+        token = request.environ.pop("request_metrics.token", None)
+        if token is not None:
+            _current.reset(token)
+
+    def record(
+        self, labels: Tuple, stats: RequestStats, elapsed: float, slow: bool = False
+    ):
+        with self._lock:
+            self.duration.observe(labels, elapsed)
+            self.queries.observe(labels, stats.queries)
+            self.sql_seconds.inc(labels, stats.sql_time)
+            self.serialize_seconds.inc(labels, stats.serialize_time)
+            if slow:
+                self.slow.inc(labels)
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = []
+            for metric in (
+                self.duration,
+                self.queries,
+                self.sql_seconds,
+                self.serialize_seconds,
+                self.slow,
+            ):
+                lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def server_timing(stats: RequestStats, elapsed: float) -> str:
+    return (
+        f"app;dur={elapsed * 1000:.1f}, "
+        f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.queries} queries", '
+        f"json;dur={stats.serialize_time * 1000:.1f}"
+    )
+
+
+request_metrics = RequestMetrics()
@@ -9,6 +9,7 @@ from .orders import orders_api
 from .products import products_api
 from .public import public_api
 from .reservations import reservations_api
+from .sync import sync_api
 from .tables import tables_api
 from .waiter import waiter_api
 
@@ -29,5 +30,6 @@ def register_routes(app: Flask):
     app.register_blueprint(products_api, url_prefix="/api/products")
     app.register_blueprint(public_api, url_prefix="/api/public")
     app.register_blueprint(reservations_api, url_prefix="/api/reservations")
+    app.register_blueprint(sync_api, url_prefix="/api/sync")
     app.register_blueprint(tables_api, url_prefix="/api/tables")
     app.register_blueprint(waiter_api, url_prefix="/api/waiter")
@@ -2,8 +2,9 @@
 Admin routes for restaurant management.
 """
 
-from flask import Blueprint, jsonify, request
-from src.api import db
+from flask import Blueprint, Response, current_app, jsonify, request
+from src.api import db, exports, order_intake, sales_rollup
+from src.api.authz import admin_required
 from src.api.models import (
     Product,
     Order,
@@ -11,29 +12,29 @@ from src.api.models import (
     Dish,
     Drink,
     order_status,
-    User,
     ProductIngredient,
     Ingredient,
+    table_status,
 )
+from src.api.date_windows import date_windows
+from src.api.db_pool import pool_metrics, server_connections
+from src.api.demand_forecast import MAX_DAYS, MAX_HORIZON, demand_forecast
+from src.api.floor_state import TableStateError, floor_state
+from src.api.inventory import inventory
+from src.api.menu_cache import menu_cache
+from src.api.order_board import order_board
+from src.api.order_events import publish_order_change, publish_order_deleted
+from src.api.order_queries import select_orders, paginate_orders
+from src.api.request_metrics import CONTENT_TYPE, request_metrics
 from datetime import datetime, timedelta
-from sqlalchemy import func
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy.orm import joinedload
+from sqlalchemy import func, select
 
 admin_api = Blueprint("admin_api", __name__)
 
 
-# Admin Authentication Check
-def admin_required(f):
-    def wrapper(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(email=current_user_id).first()
-        if not user or user.role != "ADMIN":
-            return jsonify({"error": "Admin privileges required"}), 403
-        return f(*args, **kwargs)
-
-    wrapper.__name__ = f.__name__
-    return jwt_required()(wrapper)
+def has_beverages_clause():
+    """True for orders with at least one drink line."""
+    return Order.details.any(OrderDetail.drink_id.isnot(None))
 
 
 # Analytics Routes
@@ -41,28 +42,20 @@ def admin_required(f):
 @admin_required
 def get_sales_analytics():
     # Get sales data for the last 30 days
-    end_date = datetime.utcnow()
+    end_date = datetime.utcnow().date()
     start_date = end_date - timedelta(days=30)
 
-    sales_data = (
-        db.session.query(
-            func.date(Order.created_at).label("date"),
-            func.count(Order.id).label("orders"),
-            func.sum(Order.total).label("sales"),
-        )
-        .filter(Order.created_at.between(start_date, end_date))
-        .group_by(func.date(Order.created_at))
-        .all()
-    )
+    days = db.session.execute(sales_rollup.daily_totals(start_date, end_date))
 
     return jsonify(
         [
             {
-                "date": str(data.date),
-                "orders": data.orders,
-                "sales": float(data.sales) if data.sales else 0,
+                "date": day.day.isoformat(),
+                "orders": day.orders,
+                "sales": float(day.sales),
             }
-            for data in sales_data
+            for day in days
+            if day.orders > 0
         ]
     )
 
@@ -70,8 +63,13 @@ def get_sales_analytics():
 @admin_api.route("/analytics/stats", methods=["GET"])
 @admin_required
 def get_stats():
-    total_orders = Order.query.count()
-    total_revenue = db.session.query(func.sum(Order.total)).scalar() or 0
+    days = sales_rollup.daily_totals().subquery()
+    total_orders, total_revenue = db.session.execute(
+        select(
+            func.coalesce(func.sum(days.c.orders), 0),
+            func.coalesce(func.sum(days.c.sales), 0),
+        )
+    ).one()
     average_order = total_revenue / total_orders if total_orders > 0 else 0
     total_products = Product.query.count()
 
@@ -92,29 +90,27 @@ def get_all_orders():
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 10, type=int)
     status = request.args.get("status")
-    has_beverages = request.args.get("has_beverages", type=bool)
+    has_beverages = request.args.get("has_beverages")
 
-    query = Order.query.options(
-        joinedload(Order.user),
-        joinedload(Order.items).joinedload(OrderDetail.product),
-    )
+    stmt = select_orders()
 
     if status:
-        query = query.filter(Order.status == status)
+        stmt = stmt.where(Order.status == status)
 
     if has_beverages is not None:
-        query = query.filter(Order.has_beverages == has_beverages)
+        if has_beverages.lower() == "true":
+            stmt = stmt.where(has_beverages_clause())
+        else:
+            stmt = stmt.where(~has_beverages_clause())
 
-    orders = query.order_by(Order.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    orders, total = paginate_orders(db.session, stmt, page, per_page)
 
     return jsonify(
         {
-            "items": [order.to_dict() for order in orders.items],
-            "total": orders.total,
-            "pages": orders.pages,
-            "current_page": orders.page,
+            "items": [order.serialize() for order in orders],
+            "total": total,
+            "pages": (total + per_page - 1) // per_page,
+            "current_page": page,
         }
     )
 
@@ -126,37 +122,25 @@ def admin_update_order(id):
     data = request.get_json()
 
     if "status" in data:
-        order.status = data["status"]
-
-    if "has_beverages" in data:
-        order.has_beverages = data["has_beverages"]
+        status_str = str(data["status"]).upper()
+        if status_str not in order_status.__members__:
+            return jsonify({"error": "Invalid status"}), 400
+        order.status = order_status[status_str]
 
     if "items" in data:
-        # Remove existing items
-        OrderDetail.query.filter_by(order_id=order.id).delete()
-
-        # Add new items
-        total = 0
-        has_beverages = False
-        for item_data in data["items"]:
-            product = Product.query.get(item_data["product_id"])
-            if product and product.type == "BEBIDA":
-                has_beverages = True
-
-            item = OrderDetail(
-                order_id=order.id,
-                product_id=item_data["product_id"],
-                quantity=item_data["quantity"],
-                price=item_data["price"],
+        try:
+            lines = order_intake.price_lines(
+                db.session, order_intake.parse_lines(data["items"])
             )
-            total += item.price * item.quantity
-            db.session.add(item)
-
-        order.total = total
-        order.has_beverages = has_beverages
+        except order_intake.OrderIntakeError as e:
+            db.session.rollback()
+            return jsonify({"error": e.message}), e.status_code
+        order_intake.set_details(order, lines)
 
+    inventory.consume(db.session, order)
     db.session.commit()
-    return jsonify(order.to_dict())
+    publish_order_change(order)
+    return jsonify(order.serialize())
 
 
 @admin_api.route("/orders/<int:id>", methods=["DELETE"])
@@ -165,14 +149,85 @@ def admin_delete_order(id):
     order = Order.query.get_or_404(id)
 
     # Free up the table if the order is being deleted
-    if order.table:
-        order.table.status = "LIBRE"
+    if order.table_id:
+        try:
+            floor_state.transition(db.session, order.table_id, table_status.FREE)
+        except TableStateError as e:
+            db.session.rollback()
+            return jsonify({"error": e.message}), e.status_code
 
     db.session.delete(order)
     db.session.commit()
+    publish_order_deleted(id)
     return "", 204
 
 
+@admin_api.route("/orders/board/check", methods=["GET"])
+@admin_required
+def check_order_board():
+    """Compare the in-memory active-order board with the database."""
+    report = order_board.check(db.session)
+    if not report["consistent"] and request.args.get("repair") == "true":
+        order_board.load(db.session)
+        report["repaired"] = True
+    return jsonify(report)
+
+
+@admin_api.route("/metrics", methods=["GET"])
+@admin_required
+def get_request_metrics():
+    """Request latency, SQL counts and pool usage of this worker, for Prometheus."""
+    body = request_metrics.render() + pool_metrics.render(
+        server_connections(db.session)
+    )
+    return Response(body, content_type=CONTENT_TYPE)
+
+
+# Exports
+@admin_api.route("/exports/<name>", methods=["GET"])
+@admin_required
+def export_rows(name):
+    """
+    Stream a whole table as CSV (default) or NDJSON (`format=ndjson`).
+
+    Filter with `date`, `week` or `from`/`to` (see date_windows) and
+    `status=A,B`; users filter by role instead.
+    """
+    export = exports.EXPORTS.get(name)
+    if export is None:
+        return (
+            jsonify({"error": f"Unknown export. Use one of: {list(exports.EXPORTS)}"}),
+            404,
+        )
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in exports.FORMATS:
+        return (
+            jsonify({"error": f"Unknown format. Use one of: {list(exports.FORMATS)}"}),
+            400,
+        )
+    try:
+        window = date_windows.from_args(request.args)
+        statuses = exports.parse_statuses(export, request.args.get("status", ""))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    stream = exports.export_stream(
+        db.engine,
+        name,
+        fmt,
+        window,
+        statuses,
+        use_copy=current_app.config.get("EXPORT_COPY", True),
+        chunk_rows=int(current_app.config.get("EXPORT_CHUNK_ROWS", 2000)),
+    )
+    filename = f"{name}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    return Response(
+        stream,
+        mimetype=exports.FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
 # Bar Orders Route
 @admin_api.route("/bar/orders", methods=["GET"])
 @admin_required
@@ -180,25 +235,19 @@ def get_bar_orders():
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 10, type=int)
 
-    # Get orders that have beverages and are in PENDIENTE or EN_PROCESO status
-    query = Order.query.filter(
-        Order.has_beverages.is_(True),
-        Order.status.in_([order_status.PENDIENTE, order_status.EN_PROCESO]),
-    ).options(
-        joinedload(Order.user),
-        joinedload(Order.items).joinedload(OrderDetail.product),
-    )
-
-    orders = query.order_by(Order.created_at.asc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    # Get orders that have beverages and are in PENDING or IN_PROGRESS status
+    stmt = select_orders(
+        has_beverages_clause(),
+        Order.status.in_([order_status.PENDING, order_status.IN_PROGRESS]),
     )
+    orders, total = paginate_orders(db.session, stmt, page, per_page, oldest_first=True)
 
     return jsonify(
         {
-            "items": [order.to_dict() for order in orders.items],
-            "total": orders.total,
-            "pages": orders.pages,
-            "current_page": orders.page,
+            "items": [order.serialize() for order in orders],
+            "total": total,
+            "pages": (total + per_page - 1) // per_page,
+            "current_page": page,
         }
     )
 
@@ -249,6 +298,7 @@ def create_dish():
             )
             db.session.add(product_ingredient)
 
+    menu_cache.bump(db.session)
     db.session.commit()
     return jsonify(product.serialize()), 201
 
@@ -284,6 +334,7 @@ def create_drink():
             )
             db.session.add(product_ingredient)
 
+    menu_cache.bump(db.session)
     db.session.commit()
     return jsonify(product.serialize()), 201
 
@@ -316,6 +367,7 @@ def update_product(id):
             )
             db.session.add(product_ingredient)
 
+    menu_cache.bump(db.session)
     db.session.commit()
     return jsonify(product.serialize())
 
@@ -332,6 +384,7 @@ def delete_product(id):
     # Delete product and its ingredients
     ProductIngredient.query.filter_by(product_id=id).delete()
     db.session.delete(product)
+    menu_cache.bump(db.session)
     db.session.commit()
     return "", 204
 
@@ -353,6 +406,25 @@ def get_low_stock_ingredients():
     return jsonify([ingredient.serialize() for ingredient in ingredients])
 
 
+@admin_api.route("/ingredients/forecast", methods=["GET"])
+@admin_required
+def get_ingredient_forecast():
+    """
+    Expected daily use of every ingredient over the last `days` days (28)
+    and when its stock reaches the minimum and runs out at that rate, with
+    the units to order to cover the next `horizon` days (14).
+    """
+    try:
+        days = int(request.args.get("days", 28))
+        horizon = int(request.args.get("horizon", 14))
+    except ValueError:
+        return jsonify({"error": "days and horizon must be integers"}), 400
+    if not (1 <= days <= MAX_DAYS and 1 <= horizon <= MAX_HORIZON):
+        error = f"days must be 1-{MAX_DAYS} and horizon 1-{MAX_HORIZON}"
+        return jsonify({"error": error}), 400
+    return jsonify(demand_forecast.forecast(db.session, days, horizon))
+
+
 @admin_api.route("/ingredients", methods=["POST"])
 @admin_required
 def create_ingredient():
@@ -4,13 +4,14 @@ from src.api import db, bcrypt
 from flask_jwt_extended import (
     jwt_required,
     create_access_token,
-    get_jwt_identity,
     get_jwt,
 )
-from src.api.utils import send_email
+from src.api.pagination import parse_pagination_args, paginate
+from src.api.utils import queue_email
+from src.api.authz import current_user
 from datetime import timedelta
 import os
-from sqlalchemy import select, func
+from sqlalchemy import select
 
 auth_api = Blueprint("auth_api", __name__)
 
@@ -37,7 +38,7 @@ def send_verification_email(user_email, user_id):
         "email_verification.html",
         verification_url=verification_url,
     )
-    send_email(
+    queue_email(
         user_email,
         "Verify your email address",
         html_body,
@@ -85,8 +86,9 @@ def handle_register():
         )
 
         db.session.add(new_user)
-        db.session.commit()
+        db.session.flush()
         send_verification_email(new_user.email, new_user.id)
+        db.session.commit()
 
         return jsonify({"ok": True, "msg": "Registration successful"}), 201
     except Exception as e:
@@ -153,8 +155,7 @@ def handle_login():
 @auth_api.route("/profile", methods=["GET"])
 @jwt_required()
 def get_profile():
-    user_email = get_jwt_identity()
-    user = db.session.scalar(db.select(User).where(User.email == user_email))
+    user = current_user(db.session)
 
     if user is None:
         return jsonify({"error": "Usuario no encontrado"}), 404
@@ -175,8 +176,7 @@ def get_profile():
 @auth_api.route("/profile", methods=["PUT"])
 @jwt_required()
 def update_profile():
-    user_email = get_jwt_identity()
-    user = db.session.scalar(db.select(User).where(User.email == user_email))
+    user = current_user(db.session)
 
     if user is None:
         return jsonify({"error": "Usuario no encontrado"}), 404
@@ -208,8 +208,7 @@ def handle_verify_email():
 @auth_api.route("/users", methods=["GET"])
 def list_users():
     try:
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 10))
+        pagination = parse_pagination_args(request.args)
         is_active_param = request.args.get("is_active")
         role_param = request.args.get("role")
         email_search = request.args.get("email", "").strip()
@@ -248,33 +247,25 @@ def list_users():
         if email_search:
             stmt_base = stmt_base.where(User.email.ilike(f"%{email_search}%"))
 
-        # Total with filters
-        total = db.session.scalar(
-            select(func.count()).select_from(stmt_base.subquery())
-        )
-
-        # Pagination
-        stmt = (
-            stmt_base.order_by(User.created_at.desc())
-            .offset((page - 1) * per_page)
-            .limit(per_page)
-        )
-
-        users = db.session.scalars(stmt).all()
+        page = paginate(db.session, stmt_base, (User.created_at, User.id), pagination)
 
         return (
             jsonify(
                 {
-                    "total": total,
-                    "page": page,
-                    "per_page": per_page,
-                    "pages": (total + per_page - 1) // per_page,
-                    "items": [user.serialize() for user in users],
+                    "total": page.total,
+                    "page": page.page,
+                    "per_page": page.per_page,
+                    "pages": page.pages,
+                    "items": [user.serialize() for user in page.items],
+                    "next_cursor": page.next_cursor,
+                    "prev_cursor": page.prev_cursor,
                 }
             ),
             200,
         )
 
+    except ValueError as e:
+        return jsonify({"error": "Parámetros de paginación inválidos"}), 400
     except Exception as e:
         print("Error listing users:", e)
         return jsonify({"error": "Error al obtener los usuarios"}), 500
@@ -1,26 +1,24 @@
-from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt
-from src.api.models import Order, order_status
+from flask import Blueprint, Response, jsonify, request
+from src.api.models import Order, order_status, ACTIVE_ORDER_STATUSES
 from src.api import db
+from src.api.authz import kitchen_required
+from src.api.inventory import inventory
+from src.api.order_board import order_board
+from src.api.order_events import order_events, format_sse, publish_order_change
+from src.api.order_relay import order_relay
+from src.api.order_queries import (
+    select_orders,
+    load_order,
+    load_orders,
+    paginate_orders,
+)
 from src.api.utils import create_api_response
-from sqlalchemy import select, func
-import functools
+import os
 
-kitchen_api = Blueprint("kitchen_api", __name__)
-
-
-def kitchen_required(f):
-    @functools.wraps(f)
-    @jwt_required()
-    def wrapper(*args, **kwargs):
-        claims = get_jwt()
-        if claims.get("role") != "KITCHEN":
-            return create_api_response(
-                error="Access denied. Kitchen staff only.", status_code=403
-            )
-        return f(*args, **kwargs)
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT = int(os.getenv("KITCHEN_STREAM_HEARTBEAT", 15))
 
-    return wrapper
+kitchen_api = Blueprint("kitchen_api", __name__)
 
 
 @kitchen_api.route("/kitchen/orders", methods=["GET"])
@@ -31,27 +29,25 @@ def get_kitchen_orders():
         per_page = int(request.args.get("per_page", 10))
         status_filter = request.args.get("status", "").upper()
 
-        # Build base query
-        query = Order.query
-
-        # Apply status filter if provided
-        if status_filter and status_filter in order_status.__members__:
-            query = query.filter(Order.status == order_status[status_filter])
-
-        # Get total count for pagination
-        total = query.count()
-
-        # Apply pagination
-        orders = (
-            query.order_by(Order.created_at.desc())
-            .offset((page - 1) * per_page)
-            .limit(per_page)
-            .all()
-        )
+        status = order_status.__members__.get(status_filter)
+
+        if status is None or status in ACTIVE_ORDER_STATUSES:
+            # Active orders are served from the in-memory board
+            order_board.sync(db.session)
+            orders = order_board.orders([status] if status else None)
+            total = len(orders)
+            start = (page - 1) * per_page
+            end = start + per_page
+            items = orders[start:end]
+        else:
+            orders, total = paginate_orders(
+                db.session, select_orders(Order.status == status), page, per_page
+            )
+            items = [order.serialize() for order in orders]
 
         return create_api_response(
             data={
-                "items": [order.serialize() for order in orders],
+                "items": items,
                 "pagination": {
                     "page": page,
                     "per_page": per_page,
@@ -76,7 +72,7 @@ def get_kitchen_orders():
 def update_order_status(id):
     try:
         data = request.get_json()
-        order = Order.query.get(id)
+        order = load_order(db.session, id)
 
         if not order:
             return create_api_response(error="Order not found", status_code=404)
@@ -105,7 +101,9 @@ def update_order_status(id):
             )
 
         order.status = new_status
+        inventory.consume(db.session, order)
         db.session.commit()
+        publish_order_change(order)
 
         return create_api_response(
             data=order.serialize(), message="Order status updated successfully"
@@ -117,17 +115,77 @@ def update_order_status(id):
         return create_api_response(error=str(e), status_code=500)
 
 
+@kitchen_api.route("/kitchen/orders/stream", methods=["GET"])
+@kitchen_required
+def stream_kitchen_orders():
+    """
+    Server-Sent Events feed for kitchen screens.
+
+    Sends a `snapshot` event with every active order, then one event per
+    order change. Reconnecting clients that send `Last-Event-ID` only get
+    the events they missed; a `resync` event asks them to reconnect for a
+    fresh snapshot.
+    """
+    order_relay.start_listener(db.engine)
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+        "last_event_id"
+    )
+    seq = order_events.parse_event_id(last_event_id)
+    backlog = order_events.events_since(seq) if seq is not None else None
+
+    snapshot = None
+    if backlog is None:
+        # Read the sequence before querying so no change can slip between them
+        seq = order_events.last_seq
+        orders = load_orders(
+            db.session,
+            select_orders(Order.status.in_(ACTIVE_ORDER_STATUSES)).order_by(
+                Order.created_at.asc()
+            ),
+        )
+        snapshot = format_sse(
+            "snapshot",
+            {"items": [order.serialize() for order in orders]},
+            order_events.event_id(seq),
+        )
+        backlog = []
+
+    # Idle streams must not pin a pooled connection
+    db.session.close()
+
+    def generate(seq):
+        if snapshot:
+            yield snapshot
+        for event in backlog:
+            seq = event.seq
+            yield order_events.to_sse(event)
+
+        while True:
+            events = order_events.wait_for_events(seq, timeout=STREAM_HEARTBEAT)
+            if events is None:
+                yield format_sse("resync", {})
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                seq = event.seq
+                yield order_events.to_sse(event)
+
+    return Response(
+        generate(seq),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @kitchen_api.route("/kitchen/orders/pending/count", methods=["GET"])
 @kitchen_required
 def get_pending_orders_count():
     try:
         # Count orders that are either pending or in progress
-        stmt = (
-            select(func.count())
-            .select_from(Order)
-            .where(Order.status.in_([order_status.PENDING, order_status.IN_PROGRESS]))
-        )
-        count = db.session.scalar(stmt)
+        order_board.sync(db.session)
+        count = order_board.count([order_status.PENDING, order_status.IN_PROGRESS])
 
         return create_api_response(
             data={"count": count or 0},
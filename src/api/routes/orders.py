@@ -1,32 +1,37 @@
 from flask import request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from sqlalchemy import select, func
-from sqlalchemy.orm import joinedload
 from src.api import db
-from src.api.models import Order, OrderDetail, order_status, User
+from src.api import order_intake
+from src.api.idempotency import idempotent
+from src.api.inventory import inventory
+from src.api.models import Order, order_status
+from src.api.order_events import publish_order_change, publish_order_deleted
+from src.api.order_queries import (
+    ORDER_SORT_KEY,
+    Customer,
+    load_order,
+    select_order_rows,
+    serialize_order_rows,
+)
+from src.api.pagination import parse_pagination_args, paginate
 from src.api.utils import create_api_response, create_paginated_response
 from flask import Blueprint
 
 orders_api = Blueprint("orders_api", __name__)
-from datetime import datetime
 
 
 @orders_api.route("/orders", methods=["GET"])
 @jwt_required()
 def get_orders():
     try:
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 10))
+        pagination = parse_pagination_args(request.args)
         search = request.args.get("search", "").strip()
         status_filter = request.args.get("status", "").upper().strip()
 
-        stmt = select(Order).options(
-            joinedload(Order.user),
-            joinedload(Order.items).joinedload(OrderDetail.product),
-        )
+        stmt = select_order_rows()
 
         if search:
-            stmt = stmt.join(Order.user).where(User.email.ilike(f"%{search}%"))
+            stmt = stmt.where(Customer.email.ilike(f"%{search}%"))
 
         if status_filter:
             if status_filter in order_status.__members__:
@@ -37,19 +42,15 @@ def get_orders():
                     status_code=400,
                 )
 
-        total = db.session.scalar(select(func.count()).select_from(stmt.subquery()))
-        stmt = (
-            stmt.order_by(Order.created_at.desc())
-            .offset((page - 1) * per_page)
-            .limit(per_page)
-        )
-        orders = db.session.scalars(stmt).unique().all()
+        page = paginate(db.session, stmt, ORDER_SORT_KEY, pagination, rows=True)
 
         return create_paginated_response(
-            items=[order.serialize() for order in orders],
-            total=total,
-            page=page,
-            per_page=per_page,
+            items=serialize_order_rows(db.session, page.items),
+            total=page.total,
+            page=page.page,
+            per_page=page.per_page,
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor,
             message="Orders retrieved successfully",
         )
 
@@ -64,46 +65,23 @@ def get_orders():
 
 @orders_api.route("/orders", methods=["POST"])
 @jwt_required()
+@idempotent
 def create_order():
     try:
         current_user_id = get_jwt_identity()
         data = request.get_json()
 
-        if not data.get("products"):
-            return create_api_response(error="No products provided", status_code=400)
-
-        # Generate a unique order code
-        order_code = f"ORD{datetime.utcnow().strftime('%Y%m%d%H%M%S')}"
-
-        new_order = Order(
-            order_code=order_code,
+        new_order = order_intake.create_order(
+            db.session,
+            data.get("products"),
+            id_key="id",
             user_id=current_user_id,
             creator_id=current_user_id,
             table_id=data.get("table_id"),
-            status=order_status.PENDING,
-            total=0,
             take_away=data.get("take_away", False),  # New field for take-away orders
         )
-
-        db.session.add(new_order)
-        db.session.flush()
-
-        total = 0
-        items = []
-
-        for product_item in data.get("products", []):
-            item = OrderDetail(
-                order_id=new_order.id,
-                product_id=product_item["id"],
-                quantity=product_item.get("quantity", 1),
-                price=product_item["price"],
-            )
-            total += item.price * item.quantity
-            items.append(item)
-
-        new_order.total = total
-        db.session.add_all(items)
         db.session.commit()
+        publish_order_change(new_order, "order.created")
 
         return create_api_response(
             data=new_order.serialize(),
@@ -111,10 +89,9 @@ def create_order():
             status_code=201,
         )
 
-    except KeyError as e:
-        return create_api_response(
-            error=f"Missing required field: {str(e)}", status_code=400
-        )
+    except order_intake.OrderIntakeError as e:
+        db.session.rollback()
+        return create_api_response(error=e.message, status_code=e.status_code)
     except Exception as e:
         db.session.rollback()
         print("Error creating order:", e)
@@ -125,7 +102,7 @@ def create_order():
 @jwt_required()
 def get_order(id):
     try:
-        order = Order.query.get(id)
+        order = load_order(db.session, id)
         if not order:
             return create_api_response(error="Order not found", status_code=404)
 
@@ -142,7 +119,7 @@ def get_order(id):
 def update_order(id):
     try:
         data = request.get_json()
-        order = Order.query.get(id)
+        order = load_order(db.session, id)
 
         if not order:
             return create_api_response(error="Order not found", status_code=404)
@@ -157,8 +134,10 @@ def update_order(id):
         order.status = order_status[status_str]
         if data.get("take_away") is not None:
             order.take_away = data["take_away"]
+        inventory.consume(db.session, order)
 
         db.session.commit()
+        publish_order_change(order)
 
         return create_api_response(
             data=order.serialize(), message="Order updated successfully"
@@ -179,6 +158,7 @@ def delete_order(id):
 
         db.session.delete(order)
         db.session.commit()
+        publish_order_deleted(id)
 
         return create_api_response(message="Order deleted successfully")
 
@@ -192,15 +172,10 @@ def delete_order(id):
 def get_user_orders():
     try:
         user_id = get_jwt_identity()
-        page = int(request.args.get("page", 1))
-        per_page = int(request.args.get("per_page", 10))
+        pagination = parse_pagination_args(request.args)
         status_filter = request.args.get("status", "").upper().strip()
 
-        stmt = (
-            select(Order)
-            .options(joinedload(Order.items).joinedload(OrderDetail.product))
-            .where(Order.user_id == user_id)
-        )
+        stmt = select_order_rows(Order.user_id == user_id)
 
         if status_filter and status_filter != "ALL":
             if status_filter in order_status.__members__:
@@ -211,19 +186,15 @@ def get_user_orders():
                     status_code=400,
                 )
 
-        total = db.session.scalar(select(func.count()).select_from(stmt.subquery()))
-        stmt = (
-            stmt.order_by(Order.created_at.desc())
-            .offset((page - 1) * per_page)
-            .limit(per_page)
-        )
-        orders = db.session.scalars(stmt).unique().all()
+        page = paginate(db.session, stmt, ORDER_SORT_KEY, pagination, rows=True)
 
         return create_paginated_response(
-            items=[order.serialize() for order in orders],
-            total=total,
-            page=page,
-            per_page=per_page,
+            items=serialize_order_rows(db.session, page.items),
+            total=page.total,
+            page=page.page,
+            per_page=page.per_page,
+            next_cursor=page.next_cursor,
+            prev_cursor=page.prev_cursor,
             message="User orders retrieved successfully",
         )
 
@@ -1,7 +1,12 @@
 from flask import request, jsonify, Blueprint
 from src.api import db
 from src.api.models import Dish, Drink, dish_type, drink_type
-from sqlalchemy import select, or_
+from src.api.menu_cache import menu_cache
+from src.api.product_queries import (
+    select_menu_listing,
+    page_menu_listing,
+    page_menu_search,
+)
 
 products_api = Blueprint("products_api", __name__)
 
@@ -14,75 +19,18 @@ def get_productos():
         per_page = int(request.args.get("per_page", 10))
         search = request.args.get("search", "").strip()
         tipo = request.args.get("tipo", "").upper().strip()
+        # "fuzzy" ranks by relevance and tolerates typos; the default keeps
+        # the substring match
+        search_mode = request.args.get("search_mode", "contains").lower()
 
-        # Build base query for dishes
-        dishes_stmt = select(Dish).where(Dish.is_active.is_(True))
-        drinks_stmt = select(Drink).where(Drink.is_active.is_(True))
-
-        # Apply search filter if provided
-        if search:
-            dishes_stmt = dishes_stmt.where(
-                or_(
-                    Dish.name.ilike(f"%{search}%"),
-                    Dish.description.ilike(f"%{search}%"),
-                )
-            )
-            drinks_stmt = drinks_stmt.where(
-                or_(
-                    Drink.name.ilike(f"%{search}%"),
-                    Drink.description.ilike(f"%{search}%"),
-                )
+        if search and search_mode == "fuzzy":
+            paginated_items, total = page_menu_search(
+                db.session, search, tipo, page, per_page
             )
-
-        # Apply type filter if provided
-        if tipo == "PLATO":
-            drinks_stmt = select(Drink).where(False)  # Empty drinks query
-        elif tipo == "BEBIDA":
-            dishes_stmt = select(Dish).where(False)  # Empty dishes query
-
-        # Execute queries
-        dishes = db.session.scalars(dishes_stmt).all()
-        drinks = db.session.scalars(drinks_stmt).all()
-
-        # Combine and format results
-        items = []
-
-        # Add dishes
-        for dish in dishes:
-            items.append(
-                {
-                    "id": f"PLATO-{dish.id}",
-                    "name": dish.name,
-                    "description": dish.description,
-                    "image_url": dish.image_url,
-                    "price": dish.price,
-                    "tipo": "PLATO",
-                    "type": dish.dish_type if hasattr(dish, "dish_type") else None,
-                    "is_active": dish.is_active,
-                }
-            )
-
-        # Add drinks
-        for drink in drinks:
-            items.append(
-                {
-                    "id": f"BEBIDA-{drink.id}",
-                    "name": drink.name,
-                    "description": drink.description,
-                    "image_url": drink.image_url,
-                    "price": drink.price,
-                    "tipo": "BEBIDA",
-                    "type": drink.drink_type if hasattr(drink, "drink_type") else None,
-                    "is_active": drink.is_active,
-                }
-            )
-
-        # Calculate total and pagination
-        total = len(items)
+        else:
+            stmt = select_menu_listing(search, tipo)
+            paginated_items, total = page_menu_listing(db.session, stmt, page, per_page)
         total_pages = (total + per_page - 1) // per_page
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_items = items[start_idx:end_idx]
 
         return (
             jsonify(
@@ -104,8 +52,11 @@ def get_productos():
 @products_api.route("/dishes", methods=["GET"])
 def get_dishes():
     try:
-        dishes = Dish.query.all()
-        return jsonify([dish.serialize() for dish in dishes]), 200
+        return menu_cache.response(
+            db.session,
+            "dishes",
+            lambda: [dish.serialize() for dish in Dish.query.all()],
+        )
     except Exception as e:
         print("Error al obtener platos:", e)
         return jsonify({"error": str(e)}), 500
@@ -114,8 +65,11 @@ def get_dishes():
 @products_api.route("/drinks", methods=["GET"])
 def get_drinks():
     try:
-        drinks = Drink.query.all()
-        return jsonify([drink.serialize() for drink in drinks]), 200
+        return menu_cache.response(
+            db.session,
+            "drinks",
+            lambda: [drink.serialize() for drink in Drink.query.all()],
+        )
     except Exception as e:
         print("Error al obtener bebidas:", e)
         return jsonify({"error": str(e)}), 500
@@ -143,7 +97,7 @@ def crear_producto():
                 name=data["name"],
                 description=data["description"],
                 price=data["price"],
-                dish_type=dish_type[tipo_plato],
+                dish_type=dish_type[tipo_plato].value,
                 preparation_time=data.get("preparation_time", 10),
                 is_active=True,
                 image_url=data.get("image_url"),
@@ -181,6 +135,7 @@ def crear_producto():
                 400,
             )
 
+        menu_cache.bump(db.session)
         db.session.commit()
         return (
             jsonify(
@@ -217,7 +172,7 @@ def actualizar_producto(tipo, id):
                         ),
                         400,
                     )
-                item.dish_type = dish_type[tipo_plato]
+                item.dish_type = dish_type[tipo_plato].value
 
         elif tipo == "BEBIDA":
             item = Drink.query.get(id)
@@ -251,6 +206,7 @@ def actualizar_producto(tipo, id):
         item.price = data.get("price", item.price)
         item.image_url = data.get("image_url", item.image_url)
 
+        menu_cache.bump(db.session)
         db.session.commit()
         return (
             jsonify(
@@ -290,6 +246,7 @@ def eliminar_producto(tipo, id):
             )
 
         db.session.delete(item)
+        menu_cache.bump(db.session)
         db.session.commit()
 
         return (
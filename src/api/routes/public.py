@@ -1,7 +1,8 @@
 from flask import Blueprint, jsonify, request, render_template
 from src.api.models import Dish, Drink, dish_type, drink_type
 from src.api import db
-from src.api.utils import send_email
+from src.api.menu_cache import menu_cache
+from src.api.utils import queue_email
 import os
 
 public_api = Blueprint("public_api", __name__)
@@ -11,9 +12,11 @@ public_api = Blueprint("public_api", __name__)
 @public_api.route("/dishes", methods=["GET"])
 def get_all_dishes():
     try:
-        dishes = Dish.query.all()
-        dish_list = [dish.serialize() for dish in dishes]
-        return jsonify(dish_list), 200
+        return menu_cache.response(
+            db.session,
+            "dishes",
+            lambda: [dish.serialize() for dish in Dish.query.all()],
+        )
     except Exception as e:
         return (
             jsonify({"error": "Internal Server Error", "message": str(e)}),
@@ -39,9 +42,11 @@ def get_dish_by_id(dish_id):
 @public_api.route("/drinks", methods=["GET"])
 def get_all_drinks():
     try:
-        drinks = Drink.query.all()
-        drink_list = [drink.serialize() for drink in drinks]
-        return jsonify(drink_list), 200
+        return menu_cache.response(
+            db.session,
+            "drinks",
+            lambda: [drink.serialize() for drink in Drink.query.all()],
+        )
     except Exception as e:
         return (
             jsonify({"error": "Internal Server Error", "message": str(e)}),
@@ -93,27 +98,15 @@ def handle_contact_email():
             email=email,
         )
 
-        # Send emails and verify results
-        user_sent = send_email(
-            email, "Gracias por contactarnos", html_user_body, is_html=True
-        )
-        admin_sent = send_email(admin_email, subject, html_admin_body, is_html=True)
-
-        if not user_sent or not admin_sent:
-            return (
-                jsonify(
-                    {
-                        "msg": "El mensaje fue recibido, pero hubo un problema al enviar el correo.",
-                        "user_sent": user_sent,
-                        "admin_sent": admin_sent,
-                    }
-                ),
-                207,
-            )  # 207 Multi-Status (partial response)
+        queue_email(email, "Gracias por contactarnos", html_user_body, is_html=True)
+        if admin_email:
+            queue_email(admin_email, subject, html_admin_body, is_html=True)
+        db.session.commit()
 
         return jsonify({"msg": "Mensaje enviado correctamente"}), 200
 
     except Exception as e:
+        db.session.rollback()
         print("❌ Error in /contact:", e)
         return (
             jsonify({"error": "Ocurrió un error al procesar la solicitud"}),
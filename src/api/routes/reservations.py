@@ -1,20 +1,34 @@
 from flask import request, jsonify, Blueprint
-from datetime import datetime
-from sqlalchemy import select, or_, func
+from datetime import datetime, timedelta
+from sqlalchemy import select, or_
 from src.api import db
-from src.api.models import Reservation, Table, reservation_status, table_status
-from src.api.utils import send_email_reservation
+from src.api.availability import HOLDING_STATUSES, availability_cache
+from src.api.date_windows import Window, date_windows, parse_day, within
+from src.api.floor_state import TableStateError, floor_state
+from src.api.idempotency import idempotent
+from src.api.models import Reservation, reservation_status, table_status
+from src.api.pagination import parse_pagination_args, paginate
+from src.api.utils import queue_reservation_emails
 
 reservations_api = Blueprint("reservations_api", __name__)
 
+# What a reservation's table becomes when the reservation changes status
+TABLE_STATUS_FOR = {
+    reservation_status.CONFIRMED: table_status.RESERVED,
+    reservation_status.PENDING: table_status.OCCUPIED,
+    reservation_status.COMPLETED: table_status.FREE,
+    reservation_status.CANCELLED: table_status.FREE,
+}
+
 
 @reservations_api.route("/reservations", methods=["POST", "GET"])
+@idempotent
 def create_reservation():
     if request.method == "POST":
         data = request.get_json()
         try:
             # Validar status
-            status_str = data.get("status", "PENDIENTE").upper()
+            status_str = data.get("status", "PENDING").upper()
             if status_str not in reservation_status.__members__:
                 return (
                     jsonify(
@@ -26,6 +40,17 @@ def create_reservation():
                 )
             status_enum = reservation_status[status_str]
 
+            start_date_time = datetime.strptime(
+                data["start_date_time"], "%Y-%m-%d %H:%M:%S"
+            )
+            if data.get("table_id") and status_enum in HOLDING_STATUSES:
+                problem = availability_cache.check_reservation(
+                    db.session, data["table_id"], start_date_time, data["quantity"]
+                )
+                if problem:
+                    db.session.rollback()
+                    return jsonify({"error": problem[0]}), problem[1]
+
             # Crear reserva
             new_reservation = Reservation(
                 user_id=data.get("user_id"),
@@ -35,37 +60,37 @@ def create_reservation():
                 quantity=data["quantity"],
                 table_id=data.get("table_id"),
                 status=status_enum,
-                start_date_time=datetime.strptime(
-                    data["start_date_time"], "%Y-%m-%d %H:%M:%S"
-                ),
+                start_date_time=start_date_time,
                 additional_details=data.get("additional_details"),
             )
 
             db.session.add(new_reservation)
 
-            if data.get("table_id") and status_enum in [
-                reservation_status.PENDIENTE,
-                reservation_status.CONFIRMADA,
-            ]:
-                table = db.session.get(Table, data["table_id"])
-                if table:
-                    table.status = table_status.RESERVADA
+            if data.get("table_id") and status_enum in HOLDING_STATUSES:
+                floor_state.transition(
+                    db.session, data["table_id"], table_status.RESERVED
+                )
+            availability_cache.bump(db.session)
 
+            # Queued in the same transaction, so mail only goes out for
+            # reservations that were actually saved
+            email_queued = queue_reservation_emails(data)
             db.session.commit()
 
-            email_sent = send_email_reservation(data)
-
             return (
                 jsonify(
                     {
                         "msg": "Reservación creada exitosamente",
                         "reservation_id": new_reservation.id,
-                        "email_sent": email_sent,
+                        "email_queued": email_queued,
                     }
                 ),
                 201,
             )
 
+        except TableStateError as e:
+            db.session.rollback()
+            return jsonify({"error": e.message}), e.status_code
         except Exception as e:
             db.session.rollback()
             print("Error al crear reservación:", e)
@@ -73,11 +98,9 @@ def create_reservation():
 
     if request.method == "GET":
         try:
-            page = int(request.args.get("page", 1))
-            per_page = int(request.args.get("per_page", 10))
+            pagination = parse_pagination_args(request.args)
             search = request.args.get("search", "").strip()
             status_filter = request.args.get("status", "").upper().strip()
-            date_filter = request.args.get("date", "").strip()
 
             stmt = select(Reservation)
 
@@ -104,45 +127,181 @@ def create_reservation():
                         400,
                     )
 
-            if date_filter:
-                try:
-                    date_obj = datetime.strptime(date_filter, "%Y-%m-%d").date()
-                    stmt = stmt.where(
-                        func.date(Reservation.start_date_time) == date_obj
-                    )
-                except ValueError:
-                    return (
-                        jsonify({"error": "Formato de fecha inválido. Usa YYYY-MM-DD"}),
-                        400,
-                    )
-
-            total = db.session.scalar(select(func.count()).select_from(stmt.subquery()))
-
-            stmt = (
-                stmt.order_by(Reservation.start_date_time.desc())
-                .offset((page - 1) * per_page)
-                .limit(per_page)
+            try:
+                window = date_windows.from_args(request.args)
+            except ValueError:
+                return (
+                    jsonify(
+                        {
+                            "error": "Fechas inválidas. Usa date o week=YYYY-MM-DD, "
+                            "o from/to en formato ISO"
+                        }
+                    ),
+                    400,
+                )
+            if window:
+                stmt = stmt.where(within(Reservation.start_date_time, window))
+
+            page = paginate(
+                db.session,
+                stmt,
+                (Reservation.start_date_time, Reservation.id),
+                pagination,
             )
-            reservations = db.session.scalars(stmt).all()
 
             return (
                 jsonify(
                     {
-                        "total": total,
-                        "page": page,
-                        "per_page": per_page,
-                        "pages": (total + per_page - 1) // per_page,
-                        "items": [res.serialize() for res in reservations],
+                        "total": page.total,
+                        "page": page.page,
+                        "per_page": page.per_page,
+                        "pages": page.pages,
+                        "items": [res.serialize() for res in page.items],
+                        "next_cursor": page.next_cursor,
+                        "prev_cursor": page.prev_cursor,
+                        "window": window.serialize() if window else None,
                     }
                 ),
                 200,
             )
 
+        except ValueError as e:
+            return jsonify({"error": "Parámetros de paginación inválidos"}), 400
         except Exception as e:
             print("Error en GET /reservations:", e)
             return jsonify({"error": str(e)}), 500
 
 
+@reservations_api.route("/reservations/availability", methods=["GET"])
+def get_availability():
+    """
+    Free tables for a day: each table's free slots and, when `time` is
+    given, the tables free at that time plus the smallest that fits.
+    """
+    try:
+        day = datetime.strptime(request.args.get("date", ""), "%Y-%m-%d").date()
+        party = int(request.args.get("party", 1))
+        at = request.args.get("time")
+        start = (
+            datetime.combine(day, datetime.strptime(at, "%H:%M").time()) if at else None
+        )
+    except ValueError:
+        return (
+            jsonify(
+                {
+                    "error": "Parámetros inválidos. Usa date=YYYY-MM-DD, "
+                    "time=HH:MM y party numérico"
+                }
+            ),
+            400,
+        )
+
+    try:
+        availability = availability_cache.for_day(db.session, day)
+        opens, closes = availability_cache.opening_hours(day)
+        tables = []
+        for table_id in availability.seating(party):
+            slots = availability.schedules[table_id].free_slots(opens, closes)
+            tables.append(
+                {
+                    **availability.tables[table_id],
+                    "free_slots": [
+                        {"start": a.isoformat(), "end": b.isoformat()} for a, b in slots
+                    ],
+                }
+            )
+
+        result = {
+            "date": day.isoformat(),
+            "party": party,
+            "duration_minutes": int(availability.duration.total_seconds() // 60),
+            "tables": tables,
+        }
+        if start:
+            best_fit = availability.best_fit(party, start)
+            result["time"] = at
+            result["available_table_ids"] = availability.free_tables(party, start)
+            result["best_fit"] = (
+                availability.tables[best_fit] if best_fit is not None else None
+            )
+        return jsonify(result), 200
+
+    except Exception as e:
+        print("Error en GET /reservations/availability:", e)
+        return jsonify({"error": str(e)}), 500
+
+
+@reservations_api.route("/reservations/day-sheet", methods=["GET"])
+def get_day_sheet():
+    """
+    One service day for the host stand, grouped by hour.
+
+    Every opening hour gets a slot, even when empty; reservations outside
+    opening hours get slots of their own. Cancelled reservations are left
+    out unless `include_cancelled=true`.
+    """
+    try:
+        day_arg = request.args.get("date", "").strip()
+        day = parse_day(day_arg) if day_arg else date_windows.today()
+    except ValueError:
+        return jsonify({"error": "Formato de fecha inválido. Usa YYYY-MM-DD"}), 400
+    include_cancelled = request.args.get("include_cancelled", "").lower() == "true"
+
+    try:
+        window = date_windows.day(day)
+        opens, closes = availability_cache.opening_hours(day)
+        if closes.date() > day:
+            # Service runs past midnight: the small hours belong to the
+            # previous day's sheet
+            window = Window(opens, closes)
+
+        stmt = (
+            select(Reservation)
+            .where(within(Reservation.start_date_time, window))
+            .order_by(Reservation.start_date_time, Reservation.id)
+        )
+        if not include_cancelled:
+            stmt = stmt.where(Reservation.status != reservation_status.CANCELLED)
+
+        hours = {}
+        hour = opens
+        while hour < closes:
+            hours[hour] = []
+            hour += timedelta(hours=1)
+        for reservation in db.session.scalars(stmt):
+            slot = reservation.start_date_time.replace(
+                minute=0, second=0, microsecond=0
+            )
+            hours.setdefault(slot, []).append(reservation.serialize())
+
+        slots = [
+            {
+                "hour": hour.isoformat(),
+                "reservations": items,
+                "guests": sum(item["quantity"] for item in items),
+            }
+            for hour, items in sorted(hours.items())
+        ]
+        return (
+            jsonify(
+                {
+                    "date": day.isoformat(),
+                    "window": window.serialize(),
+                    "opens": opens.isoformat(),
+                    "closes": closes.isoformat(),
+                    "total_reservations": sum(len(s["reservations"]) for s in slots),
+                    "total_guests": sum(s["guests"] for s in slots),
+                    "hours": slots,
+                }
+            ),
+            200,
+        )
+
+    except Exception as e:
+        print("Error en GET /reservations/day-sheet:", e)
+        return jsonify({"error": str(e)}), 500
+
+
 @reservations_api.route("/reservations/<int:id>", methods=["PUT"])
 def update_reservation(id):
     try:
@@ -187,22 +346,30 @@ def update_reservation(id):
                     400,
                 )
 
+        if reserva.table_id and reserva.status in HOLDING_STATUSES:
+            problem = availability_cache.check_reservation(
+                db.session,
+                reserva.table_id,
+                reserva.start_date_time,
+                reserva.quantity,
+                exclude_id=reserva.id,
+            )
+            if problem:
+                db.session.rollback()
+                return jsonify({"error": problem[0]}), problem[1]
+
         if reserva.table_id:
-            table = db.session.get(Table, reserva.table_id)
-            if table:
-                if reserva.status == reservation_status.CONFIRMADA:
-                    table.status = table_status.RESERVADA
-                elif reserva.status == reservation_status.PENDIENTE:
-                    table.status = table_status.OCUPADA
-                elif reserva.status in [
-                    reservation_status.COMPLETADA,
-                    reservation_status.CANCELADA,
-                ]:
-                    table.status = table_status.LIBRE
+            new_table_status = TABLE_STATUS_FOR.get(reserva.status)
+            if new_table_status:
+                floor_state.transition(db.session, reserva.table_id, new_table_status)
 
+        availability_cache.bump(db.session)
         db.session.commit()
         return jsonify({"message": "Reserva actualizada correctamente"}), 200
 
+    except TableStateError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         db.session.rollback()
         print("Error al actualizar la reserva:", e)
@@ -221,15 +388,17 @@ def delete_reservation(id):
             return jsonify({"error": "Reserva no encontrada"}), 404
 
         if reserva.table_id:
-            table = db.session.get(Table, reserva.table_id)
-            if table:
-                table.status = table_status.LIBRE
+            floor_state.transition(db.session, reserva.table_id, table_status.FREE)
 
         db.session.delete(reserva)
+        availability_cache.bump(db.session)
         db.session.commit()
 
         return jsonify({"message": "Reserva eliminada correctamente"}), 200
 
+    except TableStateError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         db.session.rollback()
         print("Error al eliminar la reserva:", e)
@@ -0,0 +1,29 @@
+from flask import Blueprint, jsonify, request
+from src.api import db
+from src.api.authz import staff_required
+from src.api.change_feed import change_feed
+
+sync_api = Blueprint("sync_api", __name__)
+
+
+@sync_api.route("/sync/changes", methods=["GET"])
+@staff_required
+def get_changes():
+    """
+    Orders, order details, tables and reservations changed after `token`.
+
+    Without a token, or with one older than the change log, the response is
+    a snapshot with `reset: true` and the terminal replaces its copy.
+    Apply `changes` as upserts and `deleted` as tombstones, store `token`,
+    and ask again right away while `has_more` is true.
+    """
+    token = request.args.get("token", "").strip()
+    if token and not token.isdigit():
+        return jsonify({"error": "Invalid token"}), 400
+
+    try:
+        result = change_feed.changes_since(db.session, int(token) if token else None)
+        return jsonify(result), 200
+    except Exception as e:
+        print("Error en GET /sync/changes:", e)
+        return jsonify({"error": str(e)}), 500
@@ -1,22 +1,16 @@
-from flask import request, jsonify, Blueprint
+from flask import request, jsonify, Blueprint, Response
 from src.api import db
-from src.api.models import User, Table, table_status
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.api.models import Table, table_status
+from src.api.authz import admin_required, staff_required
+from src.api.availability import availability_cache
+from src.api.floor_state import TableStateError, floor_events, floor_state
+from src.api.order_events import format_sse
+import os
 
-tables_api = Blueprint("tables_api", __name__)
-
-
-# Admin Authentication Check
-def admin_required(f):
-    def wrapper(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(email=current_user_id).first()
-        if not user or user.role != "ADMIN":
-            return jsonify({"error": "Admin privileges required"}), 403
-        return f(*args, **kwargs)
+# Seconds between keep-alive comments on an idle stream
+STREAM_HEARTBEAT = int(os.getenv("FLOOR_STREAM_HEARTBEAT", 15))
 
-    wrapper.__name__ = f.__name__
-    return jwt_required()(wrapper)
+tables_api = Blueprint("tables_api", __name__)
 
 
 @tables_api.route("/tables", methods=["POST"])
@@ -28,9 +22,11 @@ def create_table():
         table = Table(
             number=data.get("number"),
             chairs=data.get("chairs"),
-            status=table_status.AVAILABLE,
+            status=table_status.FREE,
         )
         db.session.add(table)
+        floor_state.changed(db.session, table)
+        availability_cache.bump(db.session)
         db.session.commit()
         return (
             jsonify(
@@ -42,6 +38,7 @@ def create_table():
             201,
         )
     except Exception as e:
+        db.session.rollback()
         print("Error creating table:", e)
         return (
             jsonify({"error": "An error occurred while creating the table"}),
@@ -52,11 +49,7 @@ def create_table():
 @tables_api.route("/tables", methods=["GET"])
 def get_tables():
     try:
-        tables = Table.query.all()
-        return (
-            jsonify({"tables": [table.serialize() for table in tables]}),
-            200,
-        )
+        return jsonify({"tables": floor_state.floor_map(db.session)}), 200
     except Exception as e:
         print("Error getting tables:", e)
         return (
@@ -65,6 +58,45 @@ def get_tables():
         )
 
 
+@tables_api.route("/tables/stream", methods=["GET"])
+@staff_required
+def stream_tables():
+    """
+    Server-Sent Events feed of the floor: a `snapshot` event with every
+    table, then a `table.updated` or `table.deleted` event per change.
+    """
+    floor_state.start_listener(db.engine)
+    # Read the sequence before querying so no change can slip between them
+    seq = floor_events.last_seq
+    snapshot = format_sse(
+        "snapshot",
+        {"tables": floor_state.floor_map(db.session)},
+        floor_events.event_id(seq),
+    )
+    # Idle streams must not pin a pooled connection
+    db.session.close()
+
+    def generate(seq):
+        yield snapshot
+        while True:
+            events = floor_events.wait_for_events(seq, timeout=STREAM_HEARTBEAT)
+            if events is None:
+                yield format_sse("resync", {})
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event in events:
+                seq = event.seq
+                yield floor_events.to_sse(event)
+
+    return Response(
+        generate(seq),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @tables_api.route("/tables/<int:id>", methods=["PUT"])
 @admin_required
 def update_table(id):
@@ -74,14 +106,33 @@ def update_table(id):
             return jsonify({"error": "Table not found"}), 404
 
         data = request.get_json()
+        status_str = str(data.get("status", table.status.value)).upper()
+        if status_str not in table_status.__members__:
+            return (
+                jsonify(
+                    {
+                        "error": f"Invalid status. Use one of: {[s.name for s in table_status]}"
+                    }
+                ),
+                400,
+            )
+
         table.number = data.get("number", table.number)
         table.chairs = data.get("chairs", table.chairs)
-        table.status = table_status(data.get("status", table.status.value))
+        if table_status[status_str] != table.status:
+            floor_state.transition(db.session, id, table_status[status_str])
+        else:
+            floor_state.changed(db.session, table)
 
+        availability_cache.bump(db.session)
         db.session.commit()
         return jsonify({"message": "Table updated successfully"}), 200
 
+    except TableStateError as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
+        db.session.rollback()
         print("Error updating table:", e)
         return (
             jsonify({"error": "An error occurred while updating the table"}),
@@ -98,10 +149,13 @@ def delete_table(id):
             return jsonify({"error": "Table not found"}), 404
 
         db.session.delete(table)
+        floor_state.changed(db.session, table, deleted=True)
+        availability_cache.bump(db.session)
         db.session.commit()
         return jsonify({"message": "Table deleted successfully"}), 200
 
     except Exception as e:
+        db.session.rollback()
         print("Error deleting table:", e)
         return (
             jsonify({"error": "An error occurred while deleting the table"}),
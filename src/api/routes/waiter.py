@@ -1,33 +1,22 @@
 from flask import request, jsonify, Blueprint
-from sqlalchemy import select, func
-from sqlalchemy.orm import joinedload
-from src.api import db
+from src.api import db, order_intake
 from src.api.models import (
     Order,
-    OrderDetail,
     order_status,
-    User,
-    Table,
+    ACTIVE_ORDER_STATUSES,
     table_status,
-    Product,
 )
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import get_jwt_identity
+from src.api.authz import waiter_required
+from src.api.floor_state import TableStateError, floor_state
+from src.api.idempotency import idempotent
+from src.api.inventory import inventory
+from src.api.order_board import order_board
+from src.api.order_events import publish_order_change
+from src.api.order_queries import select_orders, paginate_orders, load_order
 from src.api.utils import create_api_response
 
 
-# Waiter Authentication Check
-def waiter_required(f):
-    def wrapper(*args, **kwargs):
-        current_user_id = get_jwt_identity()
-        user = User.query.filter_by(email=current_user_id).first()
-        if not user or user.role != "MESERO":
-            return jsonify({"error": "Waiter staff privileges required"}), 403
-        return f(*args, **kwargs)
-
-    wrapper.__name__ = f.__name__
-    return jwt_required()(wrapper)
-
-
 waiter_api = Blueprint("waiter_api", __name__)
 
 
@@ -37,22 +26,34 @@ def get_waiter_orders():
     try:
         page = int(request.args.get("page", 1))
         per_page = int(request.args.get("per_page", 10))
+        status_filter = request.args.get("status", "").upper().strip()
+        table_id = request.args.get("table_id", type=int)
 
-        # Build base query with necessary joins
-        stmt = select(Order).options(
-            joinedload(Order.user),
-            joinedload(Order.items),
-            joinedload(Order.table),
-        )
-
-        total = db.session.scalar(select(func.count()).select_from(stmt.subquery()))
-
-        stmt = (
-            stmt.order_by(Order.created_at.desc())
-            .offset((page - 1) * per_page)
-            .limit(per_page)
-        )
-        orders = db.session.scalars(stmt).unique().all()
+        if status_filter and status_filter not in order_status.__members__:
+            return (
+                jsonify(
+                    {
+                        "error": f"Invalid status. Use one of: {[s.name for s in order_status]}"
+                    }
+                ),
+                400,
+            )
+        status = order_status[status_filter] if status_filter else None
+
+        if status is None or status in ACTIVE_ORDER_STATUSES:
+            # Active orders are served from the in-memory board
+            order_board.sync(db.session)
+            orders = order_board.orders([status] if status else None, table_id)
+            total = len(orders)
+            start = (page - 1) * per_page
+            end = start + per_page
+            items = orders[start:end]
+        else:
+            stmt = select_orders(Order.status == status)
+            if table_id is not None:
+                stmt = stmt.where(Order.table_id == table_id)
+            orders, total = paginate_orders(db.session, stmt, page, per_page)
+            items = [order.serialize() for order in orders]
 
         return (
             jsonify(
@@ -61,7 +62,7 @@ def get_waiter_orders():
                     "page": page,
                     "per_page": per_page,
                     "pages": (total + per_page - 1) // per_page,
-                    "items": [order.serialize() for order in orders],
+                    "items": items,
                 }
             ),
             200,
@@ -74,6 +75,7 @@ def get_waiter_orders():
 
 @waiter_api.route("/waiter/orders", methods=["POST"])
 @waiter_required
+@idempotent
 def create_waiter_order():
     try:
         current_user_id = get_jwt_identity()
@@ -84,62 +86,25 @@ def create_waiter_order():
         if not table_id:
             return jsonify({"error": "Table ID is required"}), 400
 
-        table = Table.query.get(table_id)
-        if not table:
-            return jsonify({"error": "Table not found"}), 404
-
-        if table.status != table_status.FREE:
-            return jsonify({"error": "Table is not available"}), 400
+        # Seat the table first: of two waiters racing for it, one gets a 409
+        floor_state.transition(
+            db.session,
+            table_id,
+            table_status.OCCUPIED,
+            expected=[table_status.FREE],
+            skip_locked=True,
+        )
 
-        # Create order
-        new_order = Order(
+        new_order = order_intake.create_order(
+            db.session,
+            data.get("items"),
             user_id=current_user_id,
             creator_id=current_user_id,
             table_id=table_id,
-            status=order_status.PENDING,
-            total=0,
         )
 
-        # Process items and check for beverages
-        items = []
-        total = 0
-        has_beverages = False
-
-        for item_data in data.get("items", []):
-            product = Product.query.get(item_data["product_id"])
-            if not product:
-                return (
-                    jsonify({"error": f"Product {item_data['product_id']} not found"}),
-                    404,
-                )
-
-            # Check if any product is a beverage
-            if product.type == "DRINK":
-                has_beverages = True
-
-            item = OrderDetail(
-                product_id=product.id,
-                quantity=item_data.get("quantity", 1),
-                price=product.price,
-            )
-            total += item.price * item.quantity
-            items.append(item)
-
-        if not items:
-            return (
-                jsonify({"error": "Order must contain at least one product"}),
-                400,
-            )
-
-        new_order.has_beverages = has_beverages
-        new_order.total = total
-        new_order.items = items
-
-        # Update table status
-        table.status = table_status.OCCUPIED
-
-        db.session.add(new_order)
         db.session.commit()
+        publish_order_change(new_order, "order.created")
 
         return (
             jsonify(
@@ -151,6 +116,9 @@ def create_waiter_order():
             201,
         )
 
+    except (order_intake.OrderIntakeError, TableStateError) as e:
+        db.session.rollback()
+        return jsonify({"error": e.message}), e.status_code
     except Exception as e:
         db.session.rollback()
         print("Error creating order:", e)
@@ -161,8 +129,8 @@ def create_waiter_order():
 @waiter_required
 def get_available_tables():
     try:
-        tables = Table.query.filter_by(status=table_status.FREE).all()
-        return jsonify([table.serialize() for table in tables]), 200
+        chairs = request.args.get("chairs", type=int)
+        return jsonify(floor_state.available(db.session, chairs)), 200
 
     except Exception as e:
         print("Error getting available tables:", e)
@@ -173,7 +141,7 @@ def get_available_tables():
 @waiter_required
 def mark_order_paid(id):
     try:
-        order = Order.query.get(id)
+        order = load_order(db.session, id)
         if not order:
             return create_api_response(error="Order not found", status_code=404)
 
@@ -184,19 +152,23 @@ def mark_order_paid(id):
             )
 
         # Free up the table
-        table = order.table
-        if table:
-            table.status = table_status.AVAILABLE
+        if order.table_id:
+            floor_state.transition(db.session, order.table_id, table_status.FREE)
 
         # Mark order as delivered (paid)
         order.status = order_status.DELIVERED
+        inventory.consume(db.session, order)
         db.session.commit()
+        publish_order_change(order)
 
         return create_api_response(
             data=order.serialize(),
             message="Order marked as paid and table freed",
         )
 
+    except TableStateError as e:
+        db.session.rollback()
+        return create_api_response(error=e.message, status_code=e.status_code)
     except Exception as e:
         db.session.rollback()
         print("Error marking order as paid:", e)
@@ -0,0 +1,195 @@
+"""
+Incrementally maintained daily sales rollup.
+
+The admin dashboard reads per-day order counts and revenue (cancelled
+orders excluded) from the rollup instead of aggregating every order on each
+load. The rollup is two tables:
+
+- `daily_sales_deltas`, append-only: every order write inserts its signed
+  contribution to the day, in the same flush as the order;
+- `daily_sales`, one row per day, into which `compact` folds the deltas.
+
+A day's totals are its `daily_sales` row plus its pending deltas, summed on
+read (`daily_totals`). Order writes only ever insert new delta rows, so
+concurrent orders on the same day never wait for each other; an
+`INSERT ... ON CONFLICT DO UPDATE` on the day's row would hold its row lock
+until the order's transaction commits and queue every other order of the
+day behind it.
+
+Before an order row changes or disappears its current contribution is
+subtracted, and after it is inserted or updated the new one is added. Both
+sides are computed in SQL from the row itself, so server defaults such as
+`created_at` are accounted for. Only relevant updates (total, status,
+created_at) touch the rollup.
+
+Reads never write. Compaction runs from `flask compact-daily-sales`, on a
+schedule (the `daily-sales-compaction` cron job in render.yaml). It moves
+the deltas in one statement, so deltas inserted meanwhile wait for the next
+run, and holds a transaction-level advisory lock: a run that finds another
+one in progress returns at once instead of queueing on its row locks.
+
+Bulk `UPDATE`/`DELETE` statements on `orders` bypass the events;
+`flask check-daily-sales` finds the drift and `flask rebuild-daily-sales`
+rebuilds the rollup from scratch.
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import (
+    Numeric,
+    cast,
+    delete,
+    event,
+    func,
+    inspect,
+    literal,
+    select,
+    text,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert
+
+from src.api.models import DailySales, DailySalesDelta, Order, order_status
+
+TRACKED_COLUMNS = ("total", "status", "created_at")
+# Advisory lock key held by a running compaction
+COMPACT_LOCK = 7211
+
+COMPACT = """
+WITH moved AS (DELETE FROM daily_sales_deltas RETURNING day, orders, sales)
+INSERT INTO daily_sales (day, orders, sales)
+SELECT day, sum(orders), sum(sales) FROM moved GROUP BY day
+ON CONFLICT (day) DO UPDATE
+SET orders = daily_sales.orders + excluded.orders,
+    sales = daily_sales.sales + excluded.sales
+"""
+
+order_day = func.date(Order.created_at)
+order_sales = cast(Order.total, Numeric(14, 2))
+
+
+def counted(*criteria):
+    return (Order.status != order_status.CANCELLED, *criteria)
+
+
+def apply_order(connection, order_id: int, sign: int):
+    """Add (`sign=1`) or subtract (`sign=-1`) one order's contribution."""
+    contribution = select(order_day, literal(sign), order_sales * sign).where(
+        *counted(Order.id == order_id)
+    )
+    stmt = insert(DailySalesDelta).from_select(["day", "orders", "sales"], contribution)
+    connection.execute(stmt)
+
+
+def _changes_rollup(target) -> bool:
+    state = inspect(target)
+    return any(state.attrs[name].history.has_changes() for name in TRACKED_COLUMNS)
+
+
+@event.listens_for(Order, "after_insert")
+def _order_inserted(mapper, connection, target):
+    apply_order(connection, target.id, 1)
+
+
+@event.listens_for(Order, "before_update")
+def _order_updating(mapper, connection, target):
+    if _changes_rollup(target):
+        apply_order(connection, target.id, -1)
+
+
+@event.listens_for(Order, "after_update")
+def _order_updated(mapper, connection, target):
+    if _changes_rollup(target):
+        apply_order(connection, target.id, 1)
+
+
+@event.listens_for(Order, "before_delete")
+def _order_deleting(mapper, connection, target):
+    apply_order(connection, target.id, -1)
+
+
+def daily_totals_from_orders():
+    """The rollup as computed from scratch over `orders`."""
+    return (
+        select(order_day.label("day"), func.count(), func.sum(order_sales))
+        .where(*counted())
+        .group_by(order_day)
+    )
+
+
+def daily_totals(start: date = None, end: date = None):
+    """
+    Per-day `day`, `orders` and `sales`: the compacted rollup plus the
+    pending deltas, optionally limited to `start`..`end`, by day.
+    """
+    parts = []
+    for table in (DailySales, DailySalesDelta):
+        part = select(table.day, table.orders, table.sales)
+        if start is not None:
+            part = part.where(table.day >= start)
+        if end is not None:
+            part = part.where(table.day <= end)
+        parts.append(part)
+    rows = union_all(*parts).subquery()
+    return (
+        select(
+            rows.c.day,
+            func.sum(rows.c.orders).label("orders"),
+            func.sum(rows.c.sales).label("sales"),
+        )
+        .group_by(rows.c.day)
+        .order_by(rows.c.day)
+    )
+
+
+def compact(session) -> Optional[int]:
+    """
+    Fold the pending deltas into `daily_sales`. Returns the number of days
+    updated, or None when another compaction is running; the caller
+    commits.
+    """
+    if not session.scalar(select(func.pg_try_advisory_xact_lock(COMPACT_LOCK))):
+        return None
+    return session.execute(text(COMPACT)).rowcount
+
+
+def rebuild(session) -> int:
+    """Recompute `daily_sales` from `orders`; returns the number of days."""
+    # Order writes wait for the rebuild instead of adding deltas it replaces
+    session.execute(text("LOCK TABLE orders IN SHARE MODE"))
+    session.execute(delete(DailySalesDelta))
+    session.execute(delete(DailySales))
+    session.execute(
+        insert(DailySales).from_select(
+            ["day", "orders", "sales"], daily_totals_from_orders()
+        )
+    )
+    return session.scalar(select(func.count()).select_from(DailySales))
+
+
+def check(session) -> List[Dict]:
+    """Days where the rollup disagrees with `orders`; empty when consistent."""
+    expected: Dict[date, Tuple[int, Decimal]] = {
+        day: (count, total)
+        for day, count, total in session.execute(daily_totals_from_orders())
+    }
+    actual = {
+        row.day: (row.orders, row.sales)
+        for row in session.execute(daily_totals())
+        if row.orders or row.sales
+    }
+    mismatches = []
+    for day in sorted(expected.keys() | actual.keys()):
+        want = expected.get(day, (0, Decimal("0.00")))
+        have = actual.get(day, (0, Decimal("0.00")))
+        if want != have:
+            mismatches.append(
+                {
+                    "date": day.isoformat(),
+                    "expected": {"orders": want[0], "sales": float(want[1])},
+                    "rollup": {"orders": have[0], "sales": float(have[1])},
+                }
+            )
+    return mismatches
@@ -0,0 +1,140 @@
+"""
+What `create_app` does to the database schema when a process starts.
+
+`SCHEMA_MODE` picks one of:
+
+- `check` (default outside development and tests): no DDL at all. The
+  revision in `alembic_version` is compared with the head of
+  `migrations/versions` and the worker refuses to start when they differ.
+  The schema is changed by `flask db upgrade`, run once per release.
+- `create`: `db.create_all()`, which only adds missing tables, and stamp
+  the head revision on a database that has none. Default in development
+  and tests.
+- `reset`: drop and recreate the public schema, then `create`. Wipes all
+  data; only for throwaway local databases.
+- `off`: leave the database alone.
+
+Under the flask CLI (`flask db upgrade` itself, for instance) a schema
+that is not at the head is reported instead of refused.
+
+Databases created by `db.create_all()` before the migrations existed have
+tables but no `alembic_version`, and their schema is the `BASELINE`
+revision. `flask db upgrade` cannot run on them as is: it would create
+those tables again. `create` stamps `BASELINE` on such a database and
+applies the later migrations; `check` refuses it and asks for the one-time
+`flask db stamp 23afaee205b8` before the next `flask db upgrade`.
+"""
+
+import os
+from typing import Set
+
+import click
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from flask_migrate import upgrade
+from sqlalchemy import inspect, text
+
+MIGRATIONS_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "migrations")
+)
+
+MODES = ("check", "create", "reset", "off")
+
+# The schema `db.create_all()` built before there were migrations
+BASELINE = "23afaee205b8"
+
+
+class SchemaError(RuntimeError):
+    pass
+
+
+def default_mode(env: str) -> str:
+    return "create" if env in ("development", "test", "testing") else "check"
+
+
+def head_revisions(directory: str = MIGRATIONS_DIR) -> Set[str]:
+    return set(ScriptDirectory(directory).get_heads())
+
+
+def current_revisions(connection) -> Set[str]:
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+def unversioned(connection) -> bool:
+    """Whether the database has tables but no migration revision."""
+    tables = set(inspect(connection).get_table_names()) - {"alembic_version"}
+    return bool(tables) and not current_revisions(connection)
+
+
+def check(engine, directory: str = MIGRATIONS_DIR):
+    """Raise SchemaError unless the database is at the migrations' head."""
+    heads = head_revisions(directory)
+    with engine.connect() as connection:
+        current = current_revisions(connection)
+        legacy = unversioned(connection)
+    if legacy:
+        raise SchemaError(
+            "Database has tables but no migration revision (it was built by "
+            f"db.create_all()); run `flask db stamp {BASELINE}` once, then "
+            "`flask db upgrade`"
+        )
+    if current != heads:
+        raise SchemaError(
+            f"Database schema is at {', '.join(sorted(current)) or 'no revision'}, "
+            f"expected {', '.join(sorted(heads))}; run `flask db upgrade`"
+        )
+
+
+def create(db, directory: str = MIGRATIONS_DIR):
+    with db.engine.begin() as connection:
+        legacy = unversioned(connection)
+        if legacy:
+            MigrationContext.configure(connection).stamp(
+                ScriptDirectory(directory), BASELINE
+            )
+    if legacy:
+        upgrade(directory=directory)
+    db.create_all()
+    with db.engine.begin() as connection:
+        context = MigrationContext.configure(connection)
+        if not context.get_current_heads():
+            context.stamp(ScriptDirectory(directory), "heads")
+
+
+def reset(db, directory: str = MIGRATIONS_DIR):
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP SCHEMA public CASCADE;"))
+        connection.execute(text("CREATE SCHEMA public;"))
+        connection.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";'))
+    create(db, directory)
+
+
+def prepare(db, mode: str, directory: str = MIGRATIONS_DIR) -> bool:
+    """
+    Apply `mode` to the app's database (inside an app context).
+
+    Returns whether the schema is known to match the models, so callers
+    can warm caches that read from it.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown SCHEMA_MODE {mode!r}; use one of {MODES}")
+    if mode == "off":
+        return False
+    if mode == "check":
+        try:
+            check(db.engine, directory)
+        except SchemaError as e:
+            if not in_cli():
+                raise
+            print("Warning:", e)
+            return False
+        return True
+    if mode == "reset":
+        reset(db, directory)
+    else:
+        create(db, directory)
+    return True
+
+
+def in_cli() -> bool:
+    return click.get_current_context(silent=True) is not None
@@ -1,7 +1,9 @@
+import itertools
+
 import pytest
 from flask import Flask
 from app import create_app
-from src.api.models import db, Product, Ingredient
+from src.api.models import db, Product, Ingredient, User, user_role
 from flask_jwt_extended import create_access_token
 
 
@@ -34,6 +36,55 @@ def auth_headers():
     return headers
 
 
+class Login:
+    """
+    Creates active users and signs tokens for them the way `handle_login`
+    does, with `role`, `email` and `user_id` claims.
+
+        admin, headers = login("ADMIN")
+    """
+
+    def __init__(self):
+        self._numbers = itertools.count(1)
+
+    def __call__(self, role="ADMIN", email=None):
+        user = self.user(role, email)
+        db.session.commit()
+        return user, self.headers(user)
+
+    def user(self, role="CLIENT", email=None, **fields):
+        """Add an active user with `role` to the session, flushed."""
+        number = next(self._numbers)
+        fields.setdefault("name", role.title())
+        user = User(
+            last_name="Test",
+            phone_number="123",
+            email=email or f"{role.lower()}{number}@test.com",
+            password="x",
+            role=user_role[role],
+            is_active=True,
+            **fields,
+        )
+        db.session.add(user)
+        db.session.flush()
+        return user
+
+    def headers(self, user, role=None):
+        """Bearer headers for `user`; `role` overrides the role claim."""
+        claims = {
+            "role": role or user.role.value,
+            "email": user.email,
+            "user_id": user.id,
+        }
+        token = create_access_token(identity=str(user.id), additional_claims=claims)
+        return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def login(app):
+    return Login()
+
+
 @pytest.fixture
 def sample_product():
     product = Product(
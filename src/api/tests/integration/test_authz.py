@@ -0,0 +1,48 @@
+from sqlalchemy.orm import Session
+
+from src.api.authz import user_status
+from src.api.models import db
+
+
+def test_roles_come_from_token_claims(client, login):
+    _, admin_headers = login("ADMIN")
+    waiter, headers = login("WAITER")
+
+    assert client.get("/api/admin/orders", headers=admin_headers).status_code == 200
+    response = client.get("/api/admin/orders", headers=headers)
+    assert response.status_code == 403
+    assert response.json["error"] == "Admin privileges required"
+
+    response = client.get("/api/waiter/waiter/orders", headers=headers)
+    assert response.status_code == 200
+
+    # A role claim that no longer matches the account is refused
+    response = client.get("/api/admin/orders", headers=login.headers(waiter, "ADMIN"))
+    assert response.status_code == 403
+
+
+def test_deactivated_account_is_revoked_before_token_expires(client, login):
+    admin, headers = login("ADMIN")
+
+    assert client.get("/api/admin/orders", headers=headers).status_code == 200
+    assert admin.id in user_status._entries
+
+    admin.is_active = False
+    db.session.commit()
+    assert admin.id not in user_status._entries
+
+    response = client.get("/api/admin/orders", headers=headers)
+    assert response.status_code == 401
+
+
+def test_account_is_evicted_when_the_change_commits(login):
+    admin, _ = login("ADMIN")
+    user_status.clear()
+
+    admin.is_active = False
+    db.session.flush()
+    with Session(db.engine) as other:
+        # A request racing with the update still sees the committed account
+        assert user_status.status(other, admin.id) == (True, "ADMIN")
+        db.session.commit()
+        assert user_status.status(other, admin.id) == (False, "ADMIN")
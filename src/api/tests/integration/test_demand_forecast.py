@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+from src.api.date_windows import date_windows
+from src.api.demand_forecast import demand_forecast
+from src.api.models import (
+    Dish,
+    Drink,
+    Ingredient,
+    Order,
+    OrderDetail,
+    ProductIngredient,
+    db,
+    order_status,
+)
+
+
+def sell(creator, days_ago, lines, status=order_status.DELIVERED):
+    day = datetime.combine(date_windows.today(), datetime.min.time())
+    order = Order(
+        order_code=f"F{days_ago}-{len(lines)}-{status.value}",
+        creator_id=creator.id,
+        status=status,
+        total=0,
+        created_at=day - timedelta(days=days_ago) + timedelta(hours=13),
+        details=[
+            OrderDetail(
+                dish_id=product.id if isinstance(product, Dish) else None,
+                drink_id=product.id if isinstance(product, Drink) else None,
+                product_name=product.name,
+                quantity=quantity,
+                unit_price=1,
+            )
+            for product, quantity in lines
+        ],
+    )
+    db.session.add(order)
+    db.session.commit()
+
+
+def test_forecast_turns_sales_into_ingredient_demand(client, login):
+    admin, headers = login("ADMIN")
+    tortilla = Ingredient(name="Tortilla", stock=60, unit="u", minimum_stock=20)
+    lemon = Ingredient(name="Lemon", stock=100, unit="u", minimum_stock=10)
+    salt = Ingredient(name="Salt", stock=5, unit="kg", minimum_stock=1)
+    tacos = Dish(name="Tacos", price="9.50", dish_type="MAIN", is_active=True)
+    lemonade = Drink(
+        name="Lemonade", price="3.00", drink_type="NON_ALCOHOLIC", is_active=True
+    )
+    db.session.add_all([tortilla, lemon, salt, tacos, lemonade])
+    db.session.flush()
+    db.session.add_all(
+        [
+            ProductIngredient(
+                product_id=tacos.id, ingredient_id=tortilla.id, quantity=2
+            ),
+            ProductIngredient(
+                product_id=tacos.id, ingredient_id=lemon.id, quantity=0.5
+            ),
+            ProductIngredient(product_id=lemonade.id, ingredient_id=lemon.id),
+        ]
+    )
+    db.session.commit()
+
+    # 20 tacos and 6 lemonades over the last 4 days; cancelled orders and
+    # today's sales are left out
+    sell(admin, 1, [(tacos, 8), (lemonade, 2)])
+    sell(admin, 2, [(tacos, 4)])
+    sell(admin, 4, [(tacos, 8), (lemonade, 4)])
+    sell(admin, 5, [(tacos, 100)])
+    sell(admin, 1, [(tacos, 50)], status=order_status.CANCELLED)
+    sell(admin, 0, [(tacos, 50)])
+
+    response = client.get(
+        "/api/admin/ingredients/forecast?days=4&horizon=7", headers=headers
+    )
+    assert response.status_code == 200
+    items = {item["name"]: item for item in response.json["ingredients"]}
+    assert [item["name"] for item in response.json["ingredients"]] == [
+        "Tortilla",
+        "Lemon",
+        "Salt",
+    ]
+
+    today = date_windows.today()
+    # 40 tortillas in 4 days: 10 a day, 60 left
+    assert items["Tortilla"]["daily_demand"] == 10
+    assert items["Tortilla"]["days_left"] == 6
+    assert items["Tortilla"]["minimum_date"] == str(today + timedelta(days=4))
+    assert items["Tortilla"]["depletion_date"] == str(today + timedelta(days=6))
+    assert items["Tortilla"]["to_order"] == 30
+    # 10 lemons for the tacos and 6 for lemonade
+    assert items["Lemon"]["daily_demand"] == 4
+    assert items["Lemon"]["depletion_date"] == str(today + timedelta(days=25))
+    assert items["Lemon"]["to_order"] == 0
+    assert items["Salt"]["daily_demand"] == 0
+    assert items["Salt"]["depletion_date"] is None
+
+    # Demand is cached, stock is read on every request
+    sell(admin, 3, [(tacos, 40)])
+    db.session.get(Ingredient, tortilla.id).stock = 30
+    db.session.commit()
+    forecast = demand_forecast.forecast(db.session, 4, 7)
+    assert forecast["ingredients"][0]["daily_demand"] == 10
+    assert forecast["ingredients"][0]["days_left"] == 3
+
+    demand_forecast.clear()
+    forecast = demand_forecast.forecast(db.session, 4, 7)
+    assert forecast["ingredients"][0]["daily_demand"] == 30
+
+    response = client.get("/api/admin/ingredients/forecast?days=0", headers=headers)
+    assert response.status_code == 400
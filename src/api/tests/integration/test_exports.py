@@ -0,0 +1,71 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+from src.api.models import Order, OrderDetail, db, order_status
+
+URL = "/api/admin/exports"
+
+
+def make_orders(admin):
+    for i, status in enumerate([order_status.DELIVERED, order_status.CANCELLED] * 3):
+        order = Order(
+            order_code=f"ORD-EXP-{i}",
+            creator_id=admin.id,
+            status=status,
+            total=10.5,
+            take_away=i == 0,
+            created_at=datetime(2026, 5, 1 + i, 13, 30, 0, 500000),
+            details=[
+                OrderDetail(
+                    product_name='Taco "al pastor"', quantity=2, unit_price=5.25
+                )
+            ],
+        )
+        db.session.add(order)
+    db.session.commit()
+
+
+def test_csv_is_the_same_with_and_without_copy(client, app, login):
+    admin, headers = login("ADMIN")
+    make_orders(admin)
+
+    copied = client.get(f"{URL}/orders", headers=headers)
+    assert copied.status_code == 200
+    assert copied.mimetype == "text/csv"
+    assert "attachment" in copied.headers["Content-Disposition"]
+
+    app.config["EXPORT_COPY"] = False
+    try:
+        streamed = client.get(f"{URL}/orders", headers=headers)
+    finally:
+        app.config["EXPORT_COPY"] = True
+    assert streamed.get_data(as_text=True) == copied.get_data(as_text=True)
+
+    rows = list(csv.DictReader(io.StringIO(copied.get_data(as_text=True))))
+    assert len(rows) == 6
+    assert rows[0]["total"] == "10.50"
+    assert rows[0]["take_away"] == "true"
+    assert rows[0]["created_at"] == "2026-05-01 13:30:00.5"
+
+
+def test_filters_and_ndjson(client, login):
+    admin, headers = login("ADMIN")
+    make_orders(admin)
+
+    response = client.get(
+        f"{URL}/order_details?format=ndjson&status=delivered"
+        "&from=2026-05-02&to=2026-05-06",
+        headers=headers,
+    )
+    assert response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["order_code"] for line in lines] == ["ORD-EXP-2", "ORD-EXP-4"]
+    assert lines[0]["subtotal"] == 10.5
+    assert lines[0]["product_name"] == 'Taco "al pastor"'
+
+    assert client.get(f"{URL}/orders?status=LOST", headers=headers).status_code == 400
+    assert client.get(f"{URL}/secrets", headers=headers).status_code == 404
+    users = client.get(f"{URL}/users", headers=headers).get_data(as_text=True)
+    assert "password" not in users.splitlines()[0]
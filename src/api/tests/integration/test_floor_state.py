@@ -0,0 +1,117 @@
+import json
+import threading
+
+import pytest
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from src.api.floor_state import CHANNEL, TableStateError, floor_events, floor_state
+from src.api.models import CacheVersion, Table, db, table_status
+
+
+def make_table(number=1):
+    table = Table(number=number, chairs=4, status=table_status.FREE)
+    db.session.add(table)
+    db.session.commit()
+    return table
+
+
+def test_only_one_waiter_seats_a_table(app):
+    table_id = make_table().id
+    seat = dict(
+        status=table_status.OCCUPIED, expected=[table_status.FREE], skip_locked=True
+    )
+
+    floor_state.transition(db.session, table_id, **seat)
+    with Session(db.engine) as other:
+        # The first waiter still holds the row: no waiting, just a 409
+        with pytest.raises(TableStateError, match="being updated"):
+            floor_state.transition(other, table_id, **seat)
+        other.rollback()
+
+        db.session.commit()
+        with pytest.raises(TableStateError, match="OCCUPIED") as error:
+            floor_state.transition(other, table_id, **seat)
+        assert error.value.status_code == 409
+
+    with pytest.raises(TableStateError) as error:
+        floor_state.transition(db.session, 999999, **seat)
+    assert error.value.status_code == 404
+
+
+def test_freeing_a_table_waits_for_the_lock_and_reads_the_row(app):
+    table = make_table()
+    assert table.status == table_status.FREE
+    with Session(db.engine) as other:
+        # Another request seats the table and is still holding its row
+        other.get(Table, table.id).status = table_status.OCCUPIED
+        other.flush()
+        threading.Timer(0.3, other.commit).start()
+
+        seq = floor_events.last_seq
+        floor_state.transition(db.session, table.id, table_status.FREE)
+        db.session.commit()
+
+    # The loaded copy still said FREE; the change was written all the same
+    assert [e.payload["status"] for e in floor_events.events_since(seq)] == ["FREE"]
+    db.session.expire_all()
+    assert db.session.get(Table, table.id).status == table_status.FREE
+
+
+def test_changes_to_different_tables_do_not_wait_for_each_other(app):
+    first_id, second_id = make_table(1).id, make_table(2).id
+    version = floor_state._version.current(db.session)
+
+    floor_state.transition(db.session, first_id, table_status.OCCUPIED)
+    with Session(db.engine) as other:
+        # The first transaction is still open; the floor version row must
+        # not be locked by it
+        other.execute(text("SET LOCAL lock_timeout = '1s'"))
+        floor_state.transition(other, second_id, table_status.OCCUPIED)
+        other.commit()
+    db.session.commit()
+
+    # Both commits bumped the version once they were done
+    stored = db.session.get(CacheVersion, "floor", populate_existing=True)
+    assert stored.version == version + 2
+
+
+def test_floor_map_follows_committed_changes(client):
+    table_id = make_table().id
+    assert [t["id"] for t in floor_state.available(db.session)] == [table_id]
+
+    seq = floor_events.last_seq
+    floor_state.transition(db.session, table_id, table_status.OCCUPIED)
+    db.session.rollback()
+    assert floor_events.last_seq == seq
+
+    floor_state.transition(db.session, table_id, table_status.OCCUPIED)
+    db.session.commit()
+    events = floor_events.events_since(seq)
+    assert [(e.type, e.payload["status"]) for e in events] == [
+        ("table.updated", "OCCUPIED")
+    ]
+    assert floor_state.available(db.session) == []
+    tables = client.get("/api/tables/tables").json["tables"]
+    assert [t["status"] for t in tables] == ["OCCUPIED"]
+
+
+def test_listener_relays_other_workers_changes(app, monkeypatch):
+    monkeypatch.setattr("src.api.pg_listener.LISTEN_TIMEOUT", 0.2)
+    monkeypatch.setattr(floor_state, "listen", True)
+    floor_state.start_listener(db.engine)
+    try:
+        seq = floor_events.last_seq
+        message = {"pid": -1, "type": "table.deleted", "table": {"id": 7}}
+        with Session(db.engine) as other:
+            # Wait for LISTEN to be registered before notifying
+            for _ in range(50):
+                other.execute(select(func.pg_notify(CHANNEL, json.dumps(message))))
+                other.commit()
+                events = floor_events.wait_for_events(seq, timeout=0.1)
+                if events:
+                    break
+        assert events[0].type == "table.deleted"
+        assert events[0].payload == {"id": 7}
+    finally:
+        floor_state.stop_listener()
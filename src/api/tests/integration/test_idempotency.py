@@ -0,0 +1,62 @@
+from src.api.idempotency import MemoryBackend, idempotency_store
+from src.api.models import EmailOutbox, IdempotencyKey, Reservation, db
+
+URL = "/api/reservations/reservations"
+
+BOOKING = {
+    "guest_name": "Ana",
+    "guest_phone": "555",
+    "email": "ana@example.com",
+    "quantity": 2,
+    "start_date_time": "2026-05-01 20:00:00",
+}
+
+
+def book(client, key, body=BOOKING):
+    return client.post(URL, json=body, headers={"Idempotency-Key": key})
+
+
+def test_retried_post_replays_the_first_response(client):
+    first = book(client, "tablet-1-0001")
+    assert first.status_code == 201
+    mails = db.session.query(EmailOutbox).count()
+
+    retry = book(client, "tablet-1-0001")
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json == first.json
+    assert db.session.query(Reservation).count() == 1
+    assert db.session.query(EmailOutbox).count() == mails
+
+    assert book(client, "tablet-1-0002").status_code == 201
+    assert db.session.query(Reservation).count() == 2
+
+    response = book(client, "tablet-1-0001", {**BOOKING, "quantity": 3})
+    assert response.status_code == 422
+
+
+def test_server_errors_are_not_saved(client):
+    response = book(client, "tablet-1-0003", {"guest_name": "Ana"})
+    assert response.status_code == 500
+    assert db.session.query(IdempotencyKey).filter_by(key="tablet-1-0003").count() == 0
+
+
+def test_anonymous_clients_do_not_share_keys(client):
+    assert book(client, "guest-0001").status_code == 201
+    other = client.post(
+        URL,
+        json=BOOKING,
+        headers={"Idempotency-Key": "guest-0001"},
+        environ_base={"REMOTE_ADDR": "10.0.0.2"},
+    )
+    assert other.status_code == 201
+    assert "Idempotent-Replayed" not in other.headers
+    assert db.session.query(Reservation).count() == 2
+
+
+def test_memory_backend(client, monkeypatch):
+    monkeypatch.setattr(idempotency_store, "backend", MemoryBackend(60))
+    assert book(client, "tablet-2-0001").status_code == 201
+    assert book(client, "tablet-2-0001").headers["Idempotent-Replayed"] == "true"
+    assert db.session.query(Reservation).count() == 1
+    assert db.session.query(IdempotencyKey).count() == 0
@@ -0,0 +1,138 @@
+import threading
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from src.api import order_intake
+from src.api.inventory import LOW_STOCK, inventory
+from src.api.models import (
+    Dish,
+    Drink,
+    Ingredient,
+    Order,
+    ProductIngredient,
+    db,
+    order_status,
+)
+from src.api.order_events import order_events
+
+
+def make_kitchen(login):
+    """Tacos use 1.5 tortillas and 1 salsa, lemonade 1 lemon and 0.3 salsa."""
+    cook, headers = login("KITCHEN")
+    tortilla = Ingredient(name="Tortilla", stock=100, unit="u", minimum_stock=10)
+    salsa = Ingredient(name="Salsa", stock=20, unit="u", minimum_stock=15)
+    lemon = Ingredient(name="Lemon", stock=50, unit="u", minimum_stock=5)
+    tacos = Dish(name="Tacos", price="9.50", dish_type="MAIN", is_active=True)
+    lemonade = Drink(
+        name="Lemonade", price="3.00", drink_type="NON_ALCOHOLIC", is_active=True
+    )
+    db.session.add_all([tortilla, salsa, lemon, tacos, lemonade])
+    db.session.flush()
+    db.session.add_all(
+        [
+            ProductIngredient(
+                product_id=tacos.id, ingredient_id=tortilla.id, quantity=1.5
+            ),
+            ProductIngredient(product_id=tacos.id, ingredient_id=salsa.id),
+            ProductIngredient(product_id=lemonade.id, ingredient_id=lemon.id),
+            ProductIngredient(
+                product_id=lemonade.id, ingredient_id=salsa.id, quantity=0.3
+            ),
+        ]
+    )
+    db.session.commit()
+    return headers, cook, (tortilla.id, salsa.id, lemon.id), (tacos, lemonade)
+
+
+def place_order(session, cook_id, tacos_id, lemonade_id):
+    items = [
+        {"product_id": tacos_id, "quantity": 3},
+        {"product_id": lemonade_id, "quantity": 2},
+    ]
+    order = order_intake.create_order(session, items, creator_id=cook_id)
+    session.commit()
+    return order.id
+
+
+def stock(*ids):
+    db.session.expire_all()
+    return [db.session.get(Ingredient, id).stock for id in ids]
+
+
+def test_order_consumes_its_recipes_once(client, login):
+    headers, cook, ingredient_ids, (tacos, lemonade) = make_kitchen(login)
+    order_id = place_order(db.session, cook.id, tacos.id, lemonade.id)
+    seq = order_events.last_seq
+
+    updates = []
+
+    def record(conn, cursor, statement, *args):
+        if statement.lstrip().startswith("WITH used"):
+            updates.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = client.put(
+            f"/api/kitchen/kitchen/orders/{order_id}",
+            json={"status": "IN_PROGRESS"},
+            headers=headers,
+        )
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    assert response.status_code == 200
+
+    # 4.5 tortillas and 3.6 salsa round up; every ingredient in one statement
+    assert stock(*ingredient_ids) == [95, 16, 48]
+    assert len(updates) == 1
+
+    # Going back and forth, or on to DELIVERED, does not deduct again
+    order = db.session.get(Order, order_id)
+    for status in (order_status.READY, order_status.IN_PROGRESS):
+        order.status = status
+        assert not inventory.consume(db.session, order)
+    order.status = order_status.DELIVERED
+    assert not inventory.consume(db.session, order)
+    db.session.commit()
+    assert stock(*ingredient_ids) == [95, 16, 48]
+
+    # Salsa only crosses its minimum with the second order
+    assert [e.type for e in order_events.events_since(seq)] == ["order.updated"]
+    second = db.session.get(
+        Order, place_order(db.session, cook.id, tacos.id, lemonade.id)
+    )
+    seq = order_events.last_seq
+    second.status = order_status.DELIVERED
+    assert inventory.consume(db.session, second)
+    assert order_events.last_seq == seq
+    db.session.commit()
+    events = order_events.events_since(seq)
+    assert [(e.type, e.payload["name"], e.payload["stock"]) for e in events] == [
+        (LOW_STOCK, "Salsa", 12)
+    ]
+
+
+def test_concurrent_orders_do_not_lose_deductions(app, login):
+    _, cook, ingredient_ids, (tacos, lemonade) = make_kitchen(login)
+    order_ids = [place_order(db.session, cook.id, tacos.id, lemonade.id)] * 2
+    order_ids.append(place_order(db.session, cook.id, tacos.id, lemonade.id))
+    results = []
+    barrier = threading.Barrier(len(order_ids))
+
+    def start(order_id):
+        with app.app_context(), Session(db.engine) as session:
+            order = session.get(Order, order_id)
+            barrier.wait()
+            order.status = order_status.IN_PROGRESS
+            results.append(inventory.consume(session, order))
+            session.commit()
+
+    threads = [threading.Thread(target=start, args=(id,)) for id in order_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    # The order started twice deducts once; the other order adds its own
+    assert sorted(results) == [False, True, True]
+    assert stock(*ingredient_ids) == [90, 12, 46]
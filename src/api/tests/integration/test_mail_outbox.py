@@ -0,0 +1,81 @@
+import pytest
+from src.api.mail_outbox import MailOutbox
+from src.api.models import EmailOutbox, email_status, db
+
+
+def test_contact_form_queues_mail_instead_of_sending(client, monkeypatch):
+    monkeypatch.setenv("MAIL_USERNAME", "admin@example.com")
+    response = client.post(
+        "/api/public/contact",
+        json={"name": "Ana", "email": "ana@example.com", "message": "Hola"},
+    )
+    assert response.status_code == 200
+
+    queued = db.session.scalars(db.select(EmailOutbox).order_by(EmailOutbox.id)).all()
+    assert [mail.to_email for mail in queued] == [
+        "ana@example.com",
+        "admin@example.com",
+    ]
+    assert all(mail.status == email_status.PENDING for mail in queued)
+
+
+@pytest.fixture
+def smtp_server():
+    controller_module = pytest.importorskip("aiosmtpd.controller")
+
+    class Handler:
+        def __init__(self):
+            self.messages = []
+
+        async def handle_RCPT(self, server, session, envelope, address, options):
+            if address.startswith("bounce@"):
+                return "550 No such user"
+            envelope.rcpt_tos.append(address)
+            return "250 OK"
+
+        async def handle_DATA(self, server, session, envelope):
+            self.messages.append(envelope)
+            return "250 Message accepted"
+
+    handler = Handler()
+    controller = controller_module.Controller(handler, hostname="127.0.0.1", port=0)
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def test_outbox_sends_batch_and_schedules_retries(app, smtp_server):
+    controller, handler = smtp_server
+    app.config.update(
+        MAIL_SERVER="127.0.0.1",
+        MAIL_PORT=controller.port,
+        MAIL_USE_TLS="false",
+        MAIL_DEFAULT_SENDER="resto@example.com",
+        MAIL_OUTBOX_WORKERS=0,
+    )
+    outbox = MailOutbox()
+    outbox.init_app(app)
+
+    outbox.queue(db.session, "ana@example.com", "Hola", "<p>Hola</p>", is_html=True)
+    outbox.queue(db.session, "bounce@example.com", "Hola", "Hola")
+    outbox.queue(db.session, "luis@example.com", "Hola", "Hola")
+    db.session.commit()
+
+    assert outbox.process_batch(db.session) == 3
+    assert sorted(m.rcpt_tos[0] for m in handler.messages) == [
+        "ana@example.com",
+        "luis@example.com",
+    ]
+    # The batch went over one connection, which stays open for the next one
+    assert len(outbox.pool._idle) == 1
+
+    mails = {m.to_email: m for m in db.session.scalars(db.select(EmailOutbox))}
+    assert mails["ana@example.com"].status == email_status.SENT
+    bounced = mails["bounce@example.com"]
+    assert bounced.status == email_status.PENDING
+    assert bounced.attempts == 1
+    assert "550" in bounced.last_error
+
+    # Not due yet, so the next batch is empty
+    assert outbox.process_batch(db.session) == 0
+    outbox.stop()
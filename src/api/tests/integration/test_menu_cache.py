@@ -0,0 +1,32 @@
+from src.api.models import Dish, db
+
+
+def test_public_dishes_are_served_from_a_versioned_snapshot(client):
+    db.session.add(Dish(name="Taco", price=5, dish_type="MAIN", is_active=True))
+    db.session.commit()
+
+    first = client.get("/api/public/dishes")
+    assert first.status_code == 200
+    assert [dish["name"] for dish in first.json] == ["Taco"]
+    etag = first.headers["ETag"]
+
+    cached = client.get("/api/public/dishes", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.data == b""
+
+    response = client.post(
+        "/api/products/productos",
+        json={
+            "tipo": "PLATO",
+            "type": "MAIN",
+            "name": "Burrito",
+            "description": "Big",
+            "price": 9,
+        },
+    )
+    assert response.status_code == 201
+
+    fresh = client.get("/api/public/dishes", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.headers["ETag"] != etag
+    assert sorted(dish["name"] for dish in fresh.json) == ["Burrito", "Taco"]
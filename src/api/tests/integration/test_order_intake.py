@@ -0,0 +1,93 @@
+from decimal import Decimal
+
+from sqlalchemy import event
+
+from src.api.models import (
+    db,
+    Dish,
+    Drink,
+    Order,
+    Table,
+    table_status,
+)
+
+
+def make_menu(login):
+    _, headers = login("WAITER")
+    dishes = [
+        Dish(name=f"Dish {i}", price="0.10", dish_type="MAIN", is_active=True)
+        for i in range(30)
+    ]
+    soda = Drink(name="Soda", price="0.20", drink_type="NON_ALCOHOLIC", is_active=True)
+    retired = Dish(name="Retired", price="5.00", dish_type="MAIN", is_active=False)
+    db.session.add_all([soda, retired, *dishes])
+    db.session.commit()
+    return headers, dishes, soda, retired
+
+
+def post_order(client, headers, lines):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        response = client.post("/api/orders/orders", json=lines, headers=headers)
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+    return response, len(statements)
+
+
+def test_orders_are_priced_on_the_server_in_constant_round_trips(client, login):
+    headers, dishes, soda, retired = make_menu(login)
+
+    small = {"products": [{"id": soda.id, "price": 0, "quantity": 1}]}
+    small["products"] += [{"id": dishes[0].id, "quantity": 2}]
+    response, small_count = post_order(client, headers, small)
+    assert response.status_code == 201
+    # 0.20 + 2 * 0.10 without float drift, and the client price is ignored
+    assert response.json["data"]["total"] == 0.4
+    assert {d["type"] for d in response.json["data"]["details"]} == {"FOOD", "DRINK"}
+
+    large = {"products": [{"id": dish.id, "quantity": 3} for dish in dishes]}
+    response, large_count = post_order(client, headers, large)
+    assert response.status_code == 201
+    assert response.json["data"]["total"] == 9.0
+    # Stored and served as exact cents, lines included
+    order = db.session.get(Order, response.json["data"]["id"])
+    assert order.total == Decimal("9.00")
+    assert order.serialize()["details"][0]["subtotal"] == Decimal("0.30")
+    # The first order also reserved a block of order codes
+    assert large_count <= small_count
+
+    response, _ = post_order(client, headers, {"products": [{"id": retired.id}]})
+    assert response.status_code == 400
+    response, _ = post_order(client, headers, {"products": [{"id": 999999}]})
+    assert response.status_code == 404
+    codes = db.session.scalars(db.select(Order.order_code)).all()
+    assert len(codes) == len(set(codes)) == 2
+    assert all(code.startswith("ORD") for code in codes)
+
+
+def test_waiter_orders_use_the_same_intake(client, login):
+    headers, dishes, soda, _ = make_menu(login)
+    table = Table(number=1, chairs=4, status=table_status.FREE)
+    db.session.add(table)
+    db.session.commit()
+
+    response = client.post(
+        "/api/waiter/waiter/orders",
+        json={
+            "table_id": table.id,
+            "items": [
+                {"product_id": soda.id, "quantity": 2},
+                {"product_id": soda.id, "quantity": 1},
+            ],
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201
+    details = response.json["order"]["details"]
+    assert [(d["name"], d["quantity"]) for d in details] == [("Soda", 3)]
+    assert response.json["order"]["total"] == 0.6
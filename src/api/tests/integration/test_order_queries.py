@@ -0,0 +1,118 @@
+import json
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from src.api.models import db, Order, OrderDetail, Table, table_status
+from src.api.order_queries import (
+    load_orders,
+    paginate_orders,
+    select_order_rows,
+    select_orders,
+    serialize_order_rows,
+)
+
+# count + page + one batched load each for user, creator, table and details
+QUERIES_PER_PAGE = 6
+# count + page (customer, creator and table joined in) + one batched details load
+ROW_QUERIES_PER_PAGE = 3
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def create_orders(login, count):
+    users = [login.user("CLIENT", name=f"User{i}") for i in range(3)]
+    tables = [Table(number=i, chairs=4, status=table_status.FREE) for i in range(2)]
+    db.session.add_all(tables)
+    db.session.flush()
+
+    for i in range(count):
+        order = Order(
+            order_code=f"ORD-TEST-{i}",
+            user_id=users[i % 3].id,
+            creator_id=users[(i + 1) % 3].id,
+            table_id=tables[i % 2].id,
+            total=20,
+        )
+        order.details = [
+            OrderDetail(product_name="Taco", quantity=2, unit_price=5),
+            OrderDetail(product_name="Soda", quantity=1, unit_price=10),
+        ]
+        db.session.add(order)
+    db.session.commit()
+    return users[0]
+
+
+def get_orders_page(client, headers, per_page):
+    db.session.expunge_all()
+    with count_queries() as statements:
+        response = client.get(
+            f"/api/orders/orders?per_page={per_page}", headers=headers
+        )
+    return response, statements
+
+
+def test_order_page_query_count_is_constant(login):
+    create_orders(login, 15)
+
+    def serialized_page(per_page):
+        db.session.expunge_all()
+        with count_queries() as statements:
+            orders, total = paginate_orders(db.session, select_orders(), 1, per_page)
+            items = [order.serialize() for order in orders]
+        return items, total, statements
+
+    small, _, small_statements = serialized_page(3)
+    large, total, large_statements = serialized_page(15)
+
+    assert total == 15
+    assert len(large) == 15
+    assert len(large[0]["details"]) == 2
+    assert large[0]["customer"].startswith("User")
+    assert len(small_statements) == QUERIES_PER_PAGE
+    assert len(large_statements) == QUERIES_PER_PAGE
+
+
+def test_order_row_page_query_count_is_constant(client, login):
+    headers = login.headers(create_orders(login, 15))
+
+    small, small_statements = get_orders_page(client, headers, 3)
+    large, large_statements = get_orders_page(client, headers, 15)
+
+    assert small.status_code == 200
+    assert large.status_code == 200
+    assert len(large.json["data"]["items"]) == 15
+    assert len(large.json["data"]["items"][0]["details"]) == 2
+    assert len(small_statements) == ROW_QUERIES_PER_PAGE
+    assert len(large_statements) == ROW_QUERIES_PER_PAGE
+
+
+def test_order_rows_serialize_like_orders(app, login):
+    user = create_orders(login, 4)
+    guest = Order(order_code="ORD-GUEST", creator_id=user.id, total=7.5, take_away=True)
+    db.session.add(guest)
+    db.session.commit()
+    db.session.expunge_all()
+
+    orders = load_orders(db.session, select_orders().order_by(Order.id))
+    rows = db.session.execute(select_order_rows().order_by(Order.id)).all()
+
+    for encoder in ("orjson", "json"):
+        app.json.encoder = encoder
+        expected = json.loads(app.json.dumps([order.serialize() for order in orders]))
+        actual = json.loads(app.json.dumps(serialize_order_rows(db.session, rows)))
+        assert actual == expected
+    assert actual[-1]["customer"] == "Guest"
+    assert actual[-1]["table"] is None
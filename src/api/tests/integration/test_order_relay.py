@@ -0,0 +1,117 @@
+import json
+import select as io_select
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from src.api.inventory import LOW_STOCK, inventory
+from src.api.models import Ingredient, Order, db
+from src.api.order_events import order_events
+from src.api.order_relay import CHANNEL, order_relay
+
+
+def notifications(dbapi):
+    """Payloads delivered to `dbapi` so far."""
+    io_select.select([dbapi], [], [], 1)
+    dbapi.poll()
+    payloads = [json.loads(notify.payload) for notify in dbapi.notifies]
+    dbapi.notifies.clear()
+    return payloads
+
+
+def test_order_writes_notify_other_workers(login):
+    admin, _ = login("ADMIN")
+    connection = db.engine.raw_connection()
+    try:
+        dbapi = connection.dbapi_connection
+        dbapi.autocommit = True
+        with dbapi.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+        order = Order(order_code="ORD-1", creator_id=admin.id, total=10)
+        db.session.add(order)
+        db.session.commit()
+        [created] = notifications(dbapi)
+        assert created["created"] == [order.id]
+
+        # Rolled back writes are never delivered
+        order.total = 12
+        db.session.flush()
+        db.session.rollback()
+        assert notifications(dbapi) == []
+
+        order.total = 15
+        db.session.commit()
+        db.session.delete(order)
+        db.session.commit()
+        updated, deleted = notifications(dbapi)
+        assert updated["updated"] == [order.id]
+        assert deleted["deleted"] == [order.id]
+    finally:
+        connection.invalidate()
+
+
+def test_listener_publishes_other_workers_changes(app, login, monkeypatch):
+    monkeypatch.setattr("src.api.pg_listener.LISTEN_TIMEOUT", 0.2)
+    monkeypatch.setattr(order_relay, "listen", True)
+    admin, _ = login("ADMIN")
+    order = Order(order_code="ORD-1", creator_id=admin.id, total=10)
+    db.session.add(order)
+    db.session.commit()
+
+    order_relay.start_listener(db.engine)
+    try:
+        seq = order_events.last_seq
+        message = {"pid": -1, "created": [order.id], "updated": [], "deleted": []}
+        with Session(db.engine) as other:
+            # Wait for LISTEN to be registered before notifying
+            for _ in range(50):
+                other.execute(select(func.pg_notify(CHANNEL, json.dumps(message))))
+                other.commit()
+                events = order_events.wait_for_events(seq, timeout=0.1)
+                if events:
+                    break
+        assert events[0].type == "order.created"
+        assert events[0].payload["orderId"] == "ORD-1"
+
+        # An order gone by the time the notification is read is deleted
+        message = {"pid": -1, "created": [], "updated": [-5], "deleted": []}
+        with Session(db.engine) as other:
+            other.execute(select(func.pg_notify(CHANNEL, json.dumps(message))))
+            other.commit()
+        deleted = []
+        for _ in range(50):
+            seq = events[-1].seq
+            events = order_events.wait_for_events(seq, timeout=0.1) or events
+            deleted += [e for e in events if e.seq > seq and e.type == "order.deleted"]
+            if deleted:
+                break
+        assert deleted[0].payload == {"id": -5}
+    finally:
+        order_relay.stop_listener()
+
+
+def test_low_stock_events_reach_other_workers(app):
+    salsa = Ingredient(name="Salsa", stock=20, unit="u", minimum_stock=15)
+    db.session.add(salsa)
+    db.session.commit()
+    connection = db.engine.raw_connection()
+    try:
+        dbapi = connection.dbapi_connection
+        dbapi.autocommit = True
+        with dbapi.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+        inventory.deduct(db.session, {salsa.id: 6})
+        db.session.commit()
+        [message] = notifications(dbapi)
+    finally:
+        connection.invalidate()
+    assert message["event"] == LOW_STOCK
+    assert message["payload"]["stock"] == 14
+
+    # Another worker publishes it as it is
+    seq = order_events.last_seq
+    order_relay._receive(json.dumps({**message, "pid": -1}))
+    [event] = order_events.events_since(seq)
+    assert (event.type, event.payload) == (LOW_STOCK, message["payload"])
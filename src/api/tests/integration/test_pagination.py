@@ -0,0 +1,46 @@
+from src.api.models import db
+
+
+def create_users(login, count):
+    for i in range(count):
+        login.user("CLIENT", name=f"User{i}")
+    db.session.commit()
+
+
+def test_cursor_pagination_walks_users_without_gaps(client, login):
+    # Users created in one transaction share created_at, so ties fall to id
+    create_users(login, 7)
+
+    seen = []
+    cursor = ""
+    pages = 0
+    while cursor is not None:
+        response = client.get(f"/api/auth/users?per_page=3&cursor={cursor}")
+        assert response.status_code == 200
+        data = response.json
+        seen.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        pages += 1
+
+    assert pages == 3
+    assert seen == sorted(seen, reverse=True)
+    assert len(set(seen)) == 7
+    assert data["total"] == 7
+
+    back = client.get(f"/api/auth/users?per_page=3&cursor={data['prev_cursor']}")
+    assert [item["id"] for item in back.json["items"]] == seen[3:6]
+
+
+def test_cursor_pagination_can_skip_total(client, login):
+    create_users(login, 2)
+
+    response = client.get("/api/auth/users?cursor=&include_total=false")
+    assert response.status_code == 200
+    assert response.json["total"] is None
+    assert response.json["pages"] is None
+    assert response.json["next_cursor"] is None
+
+
+def test_invalid_cursor_is_rejected(client):
+    response = client.get("/api/auth/users?cursor=not-a-cursor")
+    assert response.status_code == 400
@@ -1,5 +1,5 @@
 import json
-from src.api.models import Dish, db
+from src.api.models import Dish, Drink, db
 
 
 def test_get_products(client, auth_headers):
@@ -21,3 +21,65 @@ def test_get_products(client, auth_headers):
     data = json.loads(response.data)
     assert len(data["items"]) > 0
     assert data["items"][0]["name"] == "Test Product"
+
+
+def test_get_products_pages_dishes_then_drinks(client):
+    for i in range(3):
+        db.session.add(
+            Dish(name=f"Dish {i}", price=10, dish_type="MAIN", is_active=True)
+        )
+    for i in range(2):
+        db.session.add(
+            Drink(name=f"Drink {i}", price=3, drink_type="ALCOHOLIC", is_active=True)
+        )
+    db.session.add(Dish(name="Retired", price=1, dish_type="MAIN", is_active=False))
+    db.session.commit()
+
+    data = client.get("/api/products/productos?per_page=2&page=2").json
+    assert data["total"] == 5
+    assert data["pages"] == 3
+    assert [item["name"] for item in data["items"]] == ["Dish 2", "Drink 0"]
+    assert data["items"][1]["tipo"] == "BEBIDA"
+    assert data["items"][1]["type"] == "ALCOHOLIC"
+
+    data = client.get("/api/products/productos?per_page=2&page=9").json
+    assert data["total"] == 5
+    assert data["items"] == []
+
+    data = client.get("/api/products/productos?tipo=BEBIDA&search=drink").json
+    assert data["total"] == 2
+    assert all(item["id"].startswith("BEBIDA-") for item in data["items"])
+
+
+def test_fuzzy_search_ranks_and_tolerates_typos(client):
+    db.session.add(
+        Dish(name="Tacos al pastor", price=9, dish_type="MAIN", is_active=True)
+    )
+    db.session.add(
+        Dish(name="Sopa de tortilla", price=6, dish_type="APPETIZER", is_active=True)
+    )
+    db.session.add(
+        Drink(
+            name="Agua fresca",
+            description="Horchata con canela",
+            price=3,
+            drink_type="NON_ALCOHOLIC",
+            is_active=True,
+        )
+    )
+    db.session.add(
+        Dish(name="Tacos retirados", price=1, dish_type="MAIN", is_active=False)
+    )
+    db.session.commit()
+
+    data = client.get("/api/products/productos?search=tacso&search_mode=fuzzy").json
+    assert data["total"] == 1
+    assert data["items"][0]["name"] == "Tacos al pastor"
+    assert 0 < data["items"][0]["score"] <= 1
+
+    data = client.get("/api/products/productos?search=horchatta&search_mode=fuzzy").json
+    assert [item["name"] for item in data["items"]] == ["Agua fresca"]
+
+    # The default mode is still a plain substring match
+    data = client.get("/api/products/productos?search=tacso").json
+    assert data["total"] == 0
@@ -0,0 +1,15 @@
+from src.api import query_advisor
+from src.api.models import db
+
+
+def test_hot_queries_are_served_by_indexes(app):
+    try:
+        reports = query_advisor.advise(db.session)
+    finally:
+        db.session.rollback()
+
+    scans = {r["query"]: r["seq_scans"] for r in reports}
+    assert all(not tables for tables in scans.values()), scans
+    assert "ix_orders_status_created_at" in next(
+        r["indexes"] for r in reports if r["query"] == "orders by status"
+    )
@@ -0,0 +1,52 @@
+import re
+
+from src.api.models import Table, db, table_status
+from src.api.request_metrics import request_metrics
+
+
+def test_server_timing_and_metrics(client, login):
+    _, headers = login("ADMIN")
+    db.session.add(Table(number=1, chairs=4, status=table_status.FREE))
+    db.session.commit()
+
+    response = client.get("/api/tables/tables", headers=headers)
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    queries = int(re.search(r'db;dur=[\d.]+;desc="(\d+) queries"', timing).group(1))
+    assert queries >= 1
+    assert re.search(r"app;dur=[\d.]+", timing)
+    assert re.search(r"json;dur=[\d.]+", timing)
+
+    metrics = client.get("/api/admin/metrics", headers=headers)
+    assert metrics.status_code == 200
+    assert metrics.content_type.startswith("text/plain; version=0.0.4")
+    text = metrics.get_data(as_text=True)
+    labels = 'method="GET",endpoint="/api/tables/tables",status="200"'
+    assert re.search(
+        r"http_request_duration_seconds_count\{" + labels + r',worker="\d+"\} 1', text
+    )
+    assert re.search(
+        r"http_request_sql_queries_sum\{" + labels + rf',worker="\d+"\}} {queries}\n',
+        text,
+    )
+    assert "# TYPE http_request_sql_seconds_total counter" in text
+
+
+def test_slow_requests_are_logged(client, app, capsys, login):
+    _, headers = login("ADMIN")
+    request_metrics.slow_request_ms = 0
+    response = client.get("/api/tables/tables?chairs=2", headers=headers)
+    assert response.status_code == 200
+
+    out = capsys.readouterr().out
+    assert re.search(
+        r"Slow request: GET /api/tables/tables\?chairs=2 200 [\d.]+ ms, \d+ queries",
+        out,
+    )
+    assert "http_slow_requests_total{" in request_metrics.render()
+
+
+def test_requests_without_sql_count_zero_queries(client):
+    response = client.get("/api/admin/metrics")
+    assert response.status_code == 401
+    assert 'desc="0 queries"' in response.headers["Server-Timing"]
@@ -0,0 +1,100 @@
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.api.availability import availability_cache
+from src.api.models import CacheVersion, Table, table_status, db
+
+URL = "/api/reservations/reservations"
+
+
+def reserve(client, table_id, when, quantity=4):
+    return client.post(
+        URL,
+        json={
+            "guest_name": "Ana",
+            "guest_phone": "555",
+            "email": "ana@example.com",
+            "quantity": quantity,
+            "table_id": table_id,
+            "start_date_time": f"2026-05-01 {when}:00",
+        },
+    )
+
+
+def test_reservations_are_checked_against_table_availability(client):
+    small = Table(number=1, chairs=2, status=table_status.FREE)
+    large = Table(number=2, chairs=6, status=table_status.FREE)
+    db.session.add_all([small, large])
+    db.session.commit()
+
+    assert reserve(client, large.id, "20:00").status_code == 201
+    assert reserve(client, large.id, "21:30").status_code == 409
+    assert reserve(client, small.id, "21:30", quantity=4).status_code == 400
+    assert reserve(client, large.id, "22:00").status_code == 201
+
+    data = client.get(f"{URL}/availability?date=2026-05-01&party=2&time=20:30").json
+    assert data["available_table_ids"] == [small.id]
+    assert data["best_fit"]["id"] == small.id
+    slots = {table["id"]: table["free_slots"] for table in data["tables"]}
+    assert slots[large.id] == [
+        {"start": "2026-05-01T12:00:00", "end": "2026-05-01T20:00:00"}
+    ]
+
+    data = client.get(f"{URL}/availability?date=2026-05-01&party=6").json
+    assert [table["id"] for table in data["tables"]] == [large.id]
+    assert "best_fit" not in data
+
+    assert client.get(f"{URL}/availability?date=mayo").status_code == 400
+
+
+def test_day_filters_and_day_sheet(client):
+    table = Table(number=1, chairs=6, status=table_status.FREE)
+    db.session.add(table)
+    db.session.commit()
+
+    for when in ("2026-05-01 20:15", "2026-05-01 20:45", "2026-05-02 00:30"):
+        response = client.post(
+            URL,
+            json={
+                "guest_name": "Ana",
+                "guest_phone": "555",
+                "email": "ana@example.com",
+                "quantity": 2,
+                "start_date_time": f"{when}:00",
+            },
+        )
+        assert response.status_code == 201
+
+    data = client.get(f"{URL}?date=2026-05-01").json
+    assert data["total"] == 2
+    assert data["window"] == {
+        "start": "2026-05-01T00:00:00",
+        "end": "2026-05-02T00:00:00",
+    }
+    assert client.get(f"{URL}?week=2026-05-01").json["total"] == 3
+    data = client.get(f"{URL}?from=2026-05-01T20:30:00&to=2026-05-02").json
+    assert data["total"] == 2
+    assert client.get(f"{URL}?from=2026-05-01").status_code == 400
+
+    sheet = client.get(f"{URL}/day-sheet?date=2026-05-01").json
+    assert sheet["total_reservations"] == 2
+    assert sheet["total_guests"] == 4
+    by_hour = {slot["hour"]: slot for slot in sheet["hours"]}
+    assert len(by_hour["2026-05-01T20:00:00"]["reservations"]) == 2
+    assert by_hour["2026-05-01T12:00:00"]["reservations"] == []
+    assert client.get(f"{URL}/day-sheet?date=ayer").status_code == 400
+
+
+def test_writes_bump_availability_after_commit(app):
+    version = availability_cache._version.current(db.session)
+    availability_cache.bump(db.session)
+    with Session(db.engine) as other:
+        # The first write is still open and must not hold the version row
+        other.execute(text("SET LOCAL lock_timeout = '1s'"))
+        availability_cache.bump(other)
+        other.commit()
+    db.session.rollback()
+
+    # Only the committed write bumped it
+    stored = db.session.get(CacheVersion, "availability")
+    assert stored.version == version + 1
@@ -0,0 +1,129 @@
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from src.api import sales_rollup
+from src.api.models import DailySales, DailySalesDelta, Order, db, order_status
+
+
+def order(admin, code, total, **kwargs):
+    return Order(order_code=code, creator_id=admin.id, total=total, **kwargs)
+
+
+def rollup():
+    db.session.expire_all()
+    return {
+        row.day: (row.orders, float(row.sales))
+        for row in db.session.execute(sales_rollup.daily_totals())
+    }
+
+
+def test_rollup_follows_order_writes(login):
+    admin, _ = login("ADMIN")
+    old_day = datetime(2026, 1, 5, 13, 0)
+    first = order(admin, "ORD-1", 10.5)
+    second = order(admin, "ORD-2", 4)
+    old = order(admin, "ORD-3", 7, created_at=old_day)
+    db.session.add_all([first, second, old])
+    db.session.commit()
+    today = first.created_at.date()
+    assert rollup() == {today: (2, 14.5), old_day.date(): (1, 7.0)}
+
+    first.total = 12
+    db.session.commit()
+    assert rollup()[today] == (2, 16.0)
+
+    second.status = order_status.CANCELLED
+    db.session.commit()
+    assert rollup()[today] == (1, 12.0)
+
+    db.session.delete(old)
+    db.session.commit()
+    assert rollup()[old_day.date()] == (0, 0.0)
+
+    assert sales_rollup.check(db.session) == []
+
+    # Compaction folds the deltas into one row per day
+    assert sales_rollup.compact(db.session) == 2
+    db.session.commit()
+    assert db.session.scalar(db.select(db.func.count(DailySalesDelta.id))) == 0
+    assert db.session.get(DailySales, today).orders == 1
+    assert rollup() == {today: (1, 12.0), old_day.date(): (0, 0.0)}
+    assert sales_rollup.check(db.session) == []
+
+
+def test_same_day_orders_do_not_wait_for_each_other(app, login):
+    admin, _ = login("ADMIN")
+    db.session.add(order(admin, "ORD-1", 10))
+    db.session.commit()
+    sales_rollup.compact(db.session)
+    db.session.commit()
+
+    # Both transactions stay open; the second would time out on a lock
+    # held by the first if they shared the day's row
+    with Session(db.engine) as first, Session(db.engine) as second:
+        first.add(order(admin, "ORD-2", 5))
+        first.flush()
+        second.execute(text("SET LOCAL lock_timeout = '1s'"))
+        second.add(order(admin, "ORD-3", 7))
+        second.flush()
+        second.commit()
+        first.commit()
+
+    [(orders, sales)] = rollup().values()
+    assert (orders, sales) == (3, 22.0)
+    assert sales_rollup.check(db.session) == []
+
+
+def test_checker_finds_drift_and_rebuild_repairs_it(login):
+    admin, _ = login("ADMIN")
+    db.session.add(order(admin, "ORD-1", 10))
+    db.session.commit()
+
+    # Bulk statements bypass the mapper events
+    db.session.execute(db.update(Order).values(total=25))
+    db.session.commit()
+    [mismatch] = sales_rollup.check(db.session)
+    assert mismatch["rollup"]["sales"] == 10.0
+    assert mismatch["expected"]["sales"] == 25.0
+
+    assert sales_rollup.rebuild(db.session) == 1
+    db.session.commit()
+    assert sales_rollup.check(db.session) == []
+
+
+def test_dashboard_reads_the_rollup(client, login):
+    admin, headers = login("ADMIN")
+    db.session.add_all([order(admin, "ORD-1", 10), order(admin, "ORD-2", 5)])
+    db.session.commit()
+
+    stats = client.get("/api/admin/analytics/stats", headers=headers).json
+    assert stats["totalOrders"] == 2
+    assert stats["totalRevenue"] == 15.0
+    assert stats["averageOrderValue"] == 7.5
+
+    [day] = client.get("/api/admin/analytics/sales", headers=headers).json
+    assert day["orders"] == 2
+    assert day["sales"] == 15.0
+
+    # Reads sum the pending deltas; they never compact them
+    assert db.session.scalar(db.select(db.func.count(DailySalesDelta.id))) == 2
+    assert sales_rollup.compact(db.session) == 1
+    db.session.commit()
+    stats = client.get("/api/admin/analytics/stats", headers=headers).json
+    assert (stats["totalOrders"], stats["totalRevenue"]) == (2, 15.0)
+
+
+def test_overlapping_compactions_skip_instead_of_waiting(login):
+    admin, _ = login("ADMIN")
+    db.session.add(order(admin, "ORD-1", 10))
+    db.session.commit()
+
+    assert sales_rollup.compact(db.session) == 1
+    with Session(db.engine) as other:
+        other.execute(text("SET LOCAL lock_timeout = '1s'"))
+        assert sales_rollup.compact(other) is None
+        other.rollback()
+    db.session.commit()
+    assert list(rollup().values()) == [(1, 10.0)]
@@ -0,0 +1,65 @@
+import pytest
+from alembic.autogenerate import compare_metadata
+from alembic.runtime.migration import MigrationContext
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import text
+
+from src.api import schema
+from src.api.models import db
+
+
+def drop_alembic_version():
+    with db.engine.begin() as connection:
+        connection.execute(text("DROP TABLE IF EXISTS alembic_version"))
+
+
+def test_migrations_build_the_models_schema(app):
+    db.drop_all()
+    drop_alembic_version()
+
+    upgrade(directory=schema.MIGRATIONS_DIR)
+    with db.engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"compare_type": True})
+        assert compare_metadata(context, db.metadata) == []
+    assert schema.prepare(db, "check") is True
+
+    downgrade(directory=schema.MIGRATIONS_DIR, revision="base")
+    with pytest.raises(schema.SchemaError, match="flask db upgrade"):
+        schema.prepare(db, "check")
+
+
+def test_create_stamps_the_head_and_keeps_data(app):
+    db.drop_all()
+    drop_alembic_version()
+    assert schema.prepare(db, "create") is True
+    schema.check(db.engine)
+
+    with db.engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO daily_sales (day, orders, sales) VALUES ('2026-01-01', 1, 5)"
+            )
+        )
+    assert schema.prepare(db, "create") is True
+    schema.check(db.engine)
+    assert db.session.scalar(text("SELECT count(*) FROM daily_sales")) == 1
+
+    with pytest.raises(ValueError):
+        schema.prepare(db, "drop")
+
+
+def test_create_all_databases_upgrade_from_the_baseline(app):
+    # A database built by db.create_all() before there were migrations
+    db.drop_all()
+    drop_alembic_version()
+    upgrade(directory=schema.MIGRATIONS_DIR, revision=schema.BASELINE)
+    drop_alembic_version()
+
+    with pytest.raises(schema.SchemaError, match=f"flask db stamp {schema.BASELINE}"):
+        schema.check(db.engine)
+
+    assert schema.prepare(db, "create") is True
+    schema.check(db.engine)
+    with db.engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"compare_type": True})
+        assert compare_metadata(context, db.metadata) == []
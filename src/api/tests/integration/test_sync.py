@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+
+from src.api.change_feed import change_feed
+from src.api.models import (
+    ChangeLog,
+    Order,
+    OrderDetail,
+    Table,
+    db,
+    table_status,
+)
+
+URL = "/api/sync/sync/changes"
+
+
+def test_changes_since_token_with_tombstones(client, login):
+    waiter, headers = login("WAITER")
+    table = Table(number=1, chairs=4, status=table_status.FREE)
+    db.session.add(table)
+    db.session.commit()
+
+    snapshot = client.get(URL, headers=headers).json
+    assert snapshot["reset"] is True
+    assert [t["id"] for t in snapshot["changes"]["tables"]] == [table.id]
+    data = client.get(f"{URL}?token=0", headers=headers).json
+    assert data["reset"] is False
+    token = data["token"]
+
+    order = Order(
+        order_code="ORD-SYNC-1",
+        creator_id=waiter.id,
+        table_id=table.id,
+        total=10,
+        details=[OrderDetail(product_name="Taco", quantity=2, unit_price=5)],
+    )
+    table.status = table_status.OCCUPIED
+    db.session.add(order)
+    db.session.commit()
+
+    data = client.get(f"{URL}?token={token}", headers=headers).json
+    assert [o["orderId"] for o in data["changes"]["orders"]] == ["ORD-SYNC-1"]
+    assert data["changes"]["order_details"][0]["order_id"] == order.id
+    assert data["changes"]["tables"][0]["status"] == "OCCUPIED"
+    assert int(data["token"]) > int(token)
+    token = data["token"]
+
+    detail_id = order.details[0].id
+    db.session.delete(order)
+    db.session.commit()
+    data = client.get(f"{URL}?token={token}", headers=headers).json
+    assert data["deleted"]["orders"] == [order.id]
+    assert data["deleted"]["order_details"] == [detail_id]
+    assert data["changes"]["orders"] == []
+
+    again = client.get(f"{URL}?token={data['token']}", headers=headers).json
+    assert again["token"] == data["token"]
+    assert all(rows == [] for rows in again["changes"].values())
+
+    assert client.get(f"{URL}?token=abc", headers=headers).status_code == 400
+
+
+def test_replaced_details_are_sent_as_tombstones(client, login):
+    waiter, headers = login("WAITER")
+    order = Order(
+        order_code="ORD-SYNC-1",
+        creator_id=waiter.id,
+        total=10,
+        details=[
+            OrderDetail(product_name="Taco", quantity=1, unit_price=5),
+            OrderDetail(product_name="Soda", quantity=1, unit_price=5),
+        ],
+    )
+    db.session.add(order)
+    db.session.commit()
+    old_ids = sorted(detail.id for detail in order.details)
+    token = client.get(f"{URL}?token=0", headers=headers).json["token"]
+
+    # The old lines are deleted by the delete-orphan cascade
+    order.details = [OrderDetail(product_name="Taco", quantity=3, unit_price=5)]
+    order.total = 15
+    db.session.commit()
+
+    data = client.get(f"{URL}?token={token}", headers=headers).json
+    assert data["deleted"]["order_details"] == old_ids
+    assert [d["quantity"] for d in data["changes"]["order_details"]] == [3]
+    assert [o["total"] for o in data["changes"]["orders"]] == [15]
+
+
+def test_token_waits_for_gaps_until_they_settle(app):
+    db.session.add(ChangeLog(seq=1, entity="tables", entity_id=1))
+    db.session.add(ChangeLog(seq=3, entity="tables", entity_id=2))
+    db.session.commit()
+
+    # Seq 2 may belong to a transaction that has not committed yet
+    assert change_feed.changes_since(db.session, 0)["token"] == "1"
+
+    old = datetime.now() - change_feed.gap_timeout - timedelta(seconds=5)
+    db.session.get(ChangeLog, 3).changed_at = old
+    db.session.commit()
+    assert change_feed.changes_since(db.session, 0)["token"] == "3"
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from src.api.availability import Availability, AvailabilityCache, TableSchedule
+
+TWO_HOURS = timedelta(hours=2)
+
+
+def at(hour, minute=0):
+    return datetime(2026, 5, 1, hour, minute)
+
+
+def table(table_id, chairs):
+    return SimpleNamespace(
+        id=table_id,
+        serialize=lambda: {"id": table_id, "number": table_id, "chairs": chairs},
+    )
+
+
+def test_schedule_detects_overlaps_at_the_edges():
+    schedule = TableSchedule(TWO_HOURS)
+    schedule.add(at(20), 1)
+    schedule.add(at(13), 2)
+
+    assert schedule.conflicts(at(21, 59)) == [1]
+    assert schedule.conflicts(at(18, 1)) == [1]
+    assert schedule.is_free(at(18))
+    assert schedule.is_free(at(22))
+    assert schedule.is_free(at(20), exclude_id=1)
+    assert schedule.free_slots(at(12), at(23)) == [(at(15), at(20))]
+
+
+def test_best_fit_picks_the_smallest_free_table():
+    availability = Availability(
+        [table(1, 2), table(2, 6), table(3, 8), table(4, 6)],
+        [(10, 2, at(20)), (11, 1, at(20))],
+        TWO_HOURS,
+    )
+
+    assert availability.seating(5) == [2, 4, 3]
+    assert availability.free_tables(6, at(20, 30)) == [4, 3]
+    assert availability.best_fit(6, at(20, 30)) == 4
+    assert availability.best_fit(2, at(20, 30)) == 4
+    assert availability.best_fit(9, at(20, 30)) is None
+
+
+def test_opening_hours_past_midnight():
+    cache = AvailabilityCache()
+    cache.opens, cache.closes = at(18).time(), at(1).time()
+    opens, closes = cache.opening_hours(at(0).date())
+    assert (opens, closes) == (at(18), at(1) + timedelta(days=1))
+    assert cache.day_window(at(0).date()) == (at(0), closes)
+
+    schedule = TableSchedule(TWO_HOURS)
+    schedule.add(at(20), 1)
+    assert schedule.free_slots(opens, closes) == [(at(18), at(20)), (at(22), closes)]
+
+    cache.closes = at(23).time()
+    assert cache.opening_hours(at(0).date()) == (at(18), at(23))
+    assert cache.day_window(at(0).date()) == (at(0), at(0) + timedelta(days=1))
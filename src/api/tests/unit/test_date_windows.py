@@ -0,0 +1,36 @@
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from src.api.date_windows import DateWindows
+
+
+@pytest.fixture
+def windows():
+    windows = DateWindows()
+    windows.tz = ZoneInfo("America/Bogota")
+    return windows
+
+
+def test_day_and_week_windows_are_half_open(windows):
+    assert windows.day(date(2026, 5, 1)) == (
+        datetime(2026, 5, 1),
+        datetime(2026, 5, 2),
+    )
+    # 2026-05-01 is a Friday
+    assert windows.week(date(2026, 5, 1)) == (
+        datetime(2026, 4, 27),
+        datetime(2026, 5, 4),
+    )
+
+
+def test_from_to_converts_offsets_to_restaurant_time(windows):
+    window = windows.window("2026-05-01T23:00:00Z", "2026-05-03")
+    assert window == (datetime(2026, 5, 1, 18), datetime(2026, 5, 4))
+
+    with pytest.raises(ValueError):
+        windows.window("2026-05-03", "2026-05-01")
+    with pytest.raises(ValueError):
+        windows.from_args({"from": "2026-05-01"})
+    assert windows.from_args({}) is None
@@ -0,0 +1,38 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from src.api.json_encoding import encode, pick_encoder
+from src.api.models import order_status, table_status
+
+VALUE = {
+    "total": Decimal("12.50"),
+    "created_at": datetime(2026, 5, 1, 13, 30, 0, 500000),
+    "day": date(2026, 5, 1),
+    "status": order_status.READY,
+    "table": table_status.FREE,
+    "items": [{"b": 1, "a": None}, {3: "int key"}],
+}
+
+
+def test_encoders_write_the_same_json():
+    expected = (
+        b'{"created_at":"2026-05-01T13:30:00.500000","day":"2026-05-01",'
+        b'"items":[{"a":null,"b":1},{"3":"int key"}],"status":"READY",'
+        b'"table":"FREE","total":12.5}'
+    )
+    assert encode(VALUE, "json") == expected
+    assert encode(VALUE, "orjson") == expected
+
+
+def test_indent_and_unsorted_keys():
+    assert encode({"b": 1, "a": 2}, "orjson", sort_keys=False) == b'{"b":1,"a":2}'
+    assert encode({"a": 1}, "json", indent=2) == encode({"a": 1}, "orjson", indent=2)
+
+
+def test_pick_encoder():
+    assert pick_encoder("auto") == "orjson"
+    assert pick_encoder("json") == "json"
+    with pytest.raises(ValueError):
+        pick_encoder("ujson")
@@ -0,0 +1,49 @@
+from src.api.order_board import ActiveOrderBoard
+from src.api.order_events import OrderEventBroker
+from src.api.models import order_status
+
+
+def serialized(order_id, status, table_id=None):
+    return {
+        "id": order_id,
+        "status": status,
+        "table": {"id": table_id} if table_id else None,
+    }
+
+
+def test_board_indexes_active_orders_by_status_and_table():
+    board = ActiveOrderBoard()
+    board.apply(serialized(1, "PENDING", table_id=4))
+    board.apply(serialized(2, "IN_PROGRESS", table_id=4))
+    board.apply(serialized(3, "READY"))
+    board.apply(serialized(4, "DELIVERED", table_id=4))
+
+    assert [o["id"] for o in board.orders()] == [3, 2, 1]
+    assert [o["id"] for o in board.orders([order_status.PENDING])] == [1]
+    assert [o["id"] for o in board.orders(table_id=4)] == [2, 1]
+    assert board.count([order_status.PENDING, order_status.IN_PROGRESS]) == 2
+
+
+def test_board_drops_orders_that_leave_active_states():
+    board = ActiveOrderBoard()
+    board.apply(serialized(1, "READY", table_id=2))
+    board.apply(serialized(1, "DELIVERED", table_id=2))
+    board.apply(serialized(2, "PENDING"))
+    board.discard(2)
+
+    assert board.orders() == []
+    assert board.orders(table_id=2) == []
+    assert board.count() == 0
+
+
+def test_board_follows_published_events():
+    broker = OrderEventBroker()
+    board = ActiveOrderBoard()
+    broker.add_listener(board.handle_event)
+
+    broker.publish("order.created", serialized(5, "PENDING"))
+    broker.publish("order.updated", serialized(5, "IN_PROGRESS"))
+    assert board.count([order_status.IN_PROGRESS]) == 1
+
+    broker.publish("order.deleted", {"id": 5})
+    assert board.count() == 0
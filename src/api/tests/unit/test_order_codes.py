@@ -0,0 +1,37 @@
+import os
+from itertools import count
+
+from src.api.order_codes import OrderCodeGenerator
+
+
+class FakeSequence:
+    """Stands in for the session: every call reserves the next block."""
+
+    def __init__(self, block):
+        self.starts = count(1, block)
+        self.calls = 0
+
+    def execute(self, stmt):
+        self.calls += 1
+        start = next(self.starts)
+        return type("Result", (), {"scalar": lambda self: start})()
+
+
+def test_codes_come_from_reserved_blocks():
+    generator = OrderCodeGenerator(block=10)
+    session = FakeSequence(10)
+
+    codes = [generator.next(session) for _ in range(25)]
+    assert codes[0] == "ORD00000001"
+    assert len(set(codes)) == 25
+    assert session.calls == 3
+
+
+def test_forked_worker_reserves_its_own_block(monkeypatch):
+    generator = OrderCodeGenerator(block=10)
+    session = FakeSequence(10)
+    parent = generator.next(session)
+
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    child = generator.next(session)
+    assert (parent, child) == ("ORD00000001", "ORD00000011")
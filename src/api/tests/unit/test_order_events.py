@@ -0,0 +1,56 @@
+import threading
+from src.api.order_events import OrderEventBroker, format_sse
+
+
+def test_events_since_returns_only_newer_events():
+    broker = OrderEventBroker()
+    broker.publish("order.created", {"id": 1})
+    seq = broker.last_seq
+    broker.publish("order.updated", {"id": 1, "status": "IN_PROGRESS"})
+    broker.publish("order.created", {"id": 2})
+
+    events = broker.events_since(seq)
+    assert [e.payload["id"] for e in events] == [1, 2]
+    assert broker.events_since(broker.last_seq) == []
+
+
+def test_events_since_requests_resync_when_window_is_exceeded():
+    broker = OrderEventBroker(maxlen=2)
+    for i in range(5):
+        broker.publish("order.created", {"id": i})
+
+    assert broker.events_since(0) is None
+    assert broker.events_since(99) is None
+    assert len(broker.events_since(3)) == 2
+
+
+def test_event_ids_from_another_process_are_rejected():
+    broker = OrderEventBroker()
+    other = OrderEventBroker()
+    seq = broker.publish("order.created", {"id": 1})
+
+    assert broker.parse_event_id(broker.event_id(seq)) == seq
+    assert broker.parse_event_id(other.event_id(seq)) is None
+    assert broker.parse_event_id(None) is None
+
+
+def test_waiting_subscriber_wakes_on_publish():
+    broker = OrderEventBroker()
+    received = []
+
+    def subscriber():
+        received.extend(broker.wait_for_events(0, timeout=5))
+
+    thread = threading.Thread(target=subscriber)
+    thread.start()
+    broker.publish("order.created", {"id": 7})
+    thread.join(timeout=5)
+
+    assert [e.payload["id"] for e in received] == [7]
+    assert broker.wait_for_events(broker.last_seq, timeout=0.01) == []
+
+
+def test_format_sse():
+    assert format_sse("snapshot", {"items": []}, "abc-1") == (
+        'id: abc-1\nevent: snapshot\ndata: {"items":[]}\n\n'
+    )
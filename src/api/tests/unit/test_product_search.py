@@ -0,0 +1,27 @@
+from src.api.product_search import TrigramIndex, similarity, trigrams
+
+
+def test_trigrams_are_padded_like_pg_trgm():
+    assert trigrams("cat") == {"  c", " ca", "cat", "at "}
+    assert similarity(trigrams("tacos"), trigrams("tacos")) == 1.0
+
+
+def test_index_tolerates_typos_and_ranks_best_match_first():
+    index = TrigramIndex(
+        [
+            (1, "Tacos al pastor con piña"),
+            (2, "Taco de pescado"),
+            (3, "Limonada natural"),
+        ]
+    )
+
+    ranked = index.search("tacso pastor")
+    assert [doc_id for doc_id, _ in ranked] == [1]
+
+    ranked = index.search("taco")
+    assert [doc_id for doc_id, _ in ranked] == [2, 1]
+    assert ranked[0][1] > ranked[1][1]
+
+    assert [doc_id for doc_id, _ in index.search("limonda")] == [3]
+    assert index.search("hamburguesa") == []
+    assert index.search("  ") == []
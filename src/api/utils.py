@@ -1,8 +1,7 @@
 import os
 from flask import jsonify, url_for, render_template
-import smtplib
-import traceback
-from email.message import EmailMessage
+from src.api import db
+from src.api.mail_outbox import mail_outbox
 from typing import Any, Dict, Optional, Union
 
 
@@ -54,45 +53,20 @@ def generate_sitemap(app):
     )
 
 
-def send_email(to_email, subject, body, is_html=False):
-    try:
-        smtp_server = os.getenv("MAIL_SERVER")
-        smtp_port = int(os.getenv("MAIL_PORT", 587))
-        smtp_user = os.getenv("MAIL_USERNAME")
-        smtp_pass = os.getenv("MAIL_PASSWORD")
-
-        if not smtp_server or not smtp_user or not smtp_pass:
-            raise ValueError("Faltan variables de entorno para configurar el correo")
-
-        msg = EmailMessage()
-        msg["Subject"] = subject
-        msg["From"] = smtp_user
-        msg["To"] = to_email
-        # msg["Bcc"] = smtp_user  # Copia oculta al remitente
-
-        if is_html:
-            msg.set_content("Your email client does not support HTML.")
-            msg.add_alternative(body, subtype="html")
-        else:
-            msg.set_content(body)
-
-        with smtplib.SMTP(smtp_server, smtp_port) as smtp:
-            smtp.starttls()
-            smtp.login(smtp_user, smtp_pass)
-            smtp.send_message(msg)
-
-        return True  # Envío exitoso
+def queue_email(to_email, subject, body, is_html=False):
+    """
+    Queue a message in the outbox; it is delivered once the session commits.
 
-    except Exception as e:
-        print("❌ Error al enviar correo:")
-        traceback.print_exc(), e
-        return False
+    Returns the `EmailOutbox` row. Delivery happens in the background, see
+    `src.api.mail_outbox`.
+    """
+    return mail_outbox.queue(db.session, to_email, subject, body, is_html=is_html)
 
 
 # Envio de correos de reservas
 
 
-def send_email_reservation(data):
+def queue_reservation_emails(data):
     try:
         guest_name = data.get("guest_name")
         guest_phone = data.get("guest_phone")
@@ -122,18 +96,19 @@ def send_email_reservation(data):
             additional_details=additional_details,
         )
 
-        send_email(
+        queue_email(
             email,
             "Your reservation request has been received!",
             html_user_body,
             is_html=True,
         )
-        send_email(admin_email, subject, html_admin_body, is_html=True)
+        if admin_email:
+            queue_email(admin_email, subject, html_admin_body, is_html=True)
 
         return True  # o return {"status": "success"}
 
     except Exception as e:
-        print(f"Error enviando correo: {e}")
+        print(f"Error preparando correo: {e}")
         return False  # o return {"status": "error", "details": str(e)}
 
 
@@ -175,25 +150,37 @@ def create_api_response(
 # Standard pagination response
 def create_paginated_response(
     items: list,
-    total: int,
-    page: int,
+    total: Optional[int],
+    page: Optional[int],
     per_page: int,
     message: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
 ) -> tuple[Dict[str, Any], int]:
     """
     Create a standardized paginated response.
 
     Args:
         items: List of items for current page
-        total: Total number of items
-        page: Current page number
+        total: Total number of items, or None when the count was skipped
+        page: Current page number (None for cursor pagination)
         per_page: Number of items per page
         message: Optional message
+        next_cursor: Cursor for the following page (cursor pagination)
+        prev_cursor: Cursor for the preceding page (cursor pagination)
 
     Returns:
         A tuple of (response_dict, status_code)
     """
-    total_pages = (total + per_page - 1) // per_page
+    if page is None:
+        # Cursor pagination: page numbers do not apply
+        total_pages = None
+        has_next = next_cursor is not None
+        has_prev = prev_cursor is not None
+    else:
+        total_pages = (total + per_page - 1) // per_page
+        has_next = page < total_pages
+        has_prev = page > 1
 
     data = {
         "items": items,
@@ -202,8 +189,10 @@ def create_paginated_response(
             "page": page,
             "per_page": per_page,
             "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1,
+            "has_next": has_next,
+            "has_prev": has_prev,
+            "next_cursor": next_cursor,
+            "prev_cursor": prev_cursor,
         },
     }
 
@@ -7,12 +7,26 @@ import os
 from flask import Flask, jsonify, send_from_directory
 from flask_migrate import Migrate
 from src.api.utils import APIException, generate_sitemap
-from src.api import db, bcrypt, jwt, cors
+from src.api import db, bcrypt, jwt, cors, json_encoding, schema
 from src.api.admin import setup_admin
 from src.api.commands import setup_commands
 from src.api.routes import register_routes
+from src.api.menu_cache import menu_cache
+from src.api.order_board import order_board
+from src.api.product_search import product_search
+from src.api.mail_outbox import mail_outbox
+from src.api.authz import user_status
+from src.api.availability import availability_cache
+from src.api.date_windows import date_windows
+from src.api.demand_forecast import demand_forecast
+from src.api.idempotency import idempotency_store
+from src.api.change_feed import change_feed
+from src.api.floor_state import floor_state
+from src.api.order_relay import order_relay
+from src.api.request_metrics import request_metrics
+from src.api.db_pool import pool_config, pool_metrics
+from src.api import sales_rollup  # noqa: F401 (keeps daily_sales in step with orders)
 from datetime import timedelta
-from sqlalchemy import text
 
 
 def create_app(config_name=None):
@@ -28,6 +42,10 @@ def create_app(config_name=None):
         ENV = config_name
     DEBUG = ENV == "development"
 
+    # JSON responses (orjson when installed)
+    app.config["JSON_ENCODER"] = os.getenv("JSON_ENCODER", "auto")
+    json_encoding.init_app(app)
+
     # JWT configuration
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", "da_secre_qi")
     app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(hours=24)
@@ -57,22 +75,32 @@ def create_app(config_name=None):
         SQLALCHEMY_DATABASE_URI=db_url,
         SQLALCHEMY_TRACK_MODIFICATIONS=False,
         SQLALCHEMY_ECHO=DEBUG,
+        **pool_config(db_url),
     )
 
     db.init_app(app)
 
-    # Only reset schema in non-test environments
+    # Migrations own the schema; see src/api/schema.py for the modes
+    app.config["SCHEMA_MODE"] = os.getenv("SCHEMA_MODE", schema.default_mode(ENV))
     with app.app_context():
-        if ENV != "test":
-            with db.engine.connect() as connection:
-                connection.execute(text("DROP SCHEMA public CASCADE;"))
-                connection.execute(text("CREATE SCHEMA public;"))
-                connection.execute(text('CREATE EXTENSION IF NOT EXISTS "uuid-ossp";'))
-                connection.commit()
-        db.create_all()
+        pool_metrics.init_app(app, db.engine)
+        schema_ready = schema.prepare(db, app.config["SCHEMA_MODE"])
+        order_board.init_app(app, db.session if schema_ready else None)
+    menu_cache.init_app(app)
+    product_search.init_app(app)
+    mail_outbox.init_app(app)
+    user_status.init_app(app)
+    availability_cache.init_app(app)
+    date_windows.init_app(app)
+    demand_forecast.init_app(app)
+    idempotency_store.init_app(app)
+    change_feed.init_app(app)
+    floor_state.init_app(app)
+    order_relay.init_app(app)
+    request_metrics.init_app(app)
 
     # Initialize Flask-Migrate
-    Migrate(app, db, compare_type=True)
+    Migrate(app, db, directory=schema.MIGRATIONS_DIR, compare_type=True)
     setup_admin(app)
     setup_commands(app)
     register_routes(app)
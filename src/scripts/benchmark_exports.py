@@ -0,0 +1,84 @@
+"""
+Benchmark order exports: COPY against the server-side cursor, and memory.
+
+Inserts synthetic orders into DATABASE_URL with `generate_series` inside a
+transaction that is rolled back at the end, then streams the orders export
+through both CSV paths and the NDJSON path on that same connection. Peak
+Python memory is measured with tracemalloc and should not grow with the
+number of rows.
+
+    python -m src.scripts.benchmark_exports --orders 1000000
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+from sqlalchemy import create_engine, text
+
+from src.api.exports import EXPORTS, copy_rows, stream_rows
+
+SEED = """
+WITH creator AS (
+    INSERT INTO users (name, last_name, phone_number, email, password, role,
+                       is_active)
+    VALUES ('Bench', 'Mark', '0', 'bench-export@example.com', 'x', 'ADMIN', true)
+    RETURNING id
+)
+INSERT INTO orders (order_code, creator_id, status, total, take_away,
+                    created_at, updated_at)
+SELECT 'BENCH' || n, creator.id,
+       (ARRAY['PENDING', 'DELIVERED', 'CANCELLED'])[1 + n % 3],
+       (n % 5000) / 100.0, n % 7 = 0,
+       now() - n * interval '1 minute', now()
+FROM creator, generate_series(1, :count) AS n
+"""
+
+
+def measure(label: str, chunks):
+    tracemalloc.start()
+    start = time.perf_counter()
+    size = 0
+    for chunk in chunks:
+        size += len(chunk)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"  {label:<16} {elapsed * 1000:10.1f} ms  {size / 2**20:8.1f} MiB out"
+        f"  {peak / 2**20:6.2f} MiB peak"
+    )
+
+
+def run(database_url: str, count: int, chunk_rows: int):
+    engine = create_engine(database_url)
+    export = EXPORTS["orders"]
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(text(SEED), {"count": count})
+            print(f"{count} synthetic orders")
+            csv_stmt = export.statement(None, (), for_csv=True)
+            measure("COPY csv", copy_rows(connection, csv_stmt))
+            measure("cursor csv", stream_rows(connection, csv_stmt, "csv", chunk_rows))
+            measure(
+                "cursor ndjson",
+                stream_rows(
+                    connection,
+                    export.statement(None, (), for_csv=False),
+                    "ndjson",
+                    chunk_rows,
+                ),
+            )
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=200000)
+    parser.add_argument("--chunk-rows", type=int, default=2000)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+    run(args.database_url, args.orders, args.chunk_rows)
@@ -0,0 +1,105 @@
+"""
+Benchmark turning daily product sales into ingredient demand.
+
+Builds a random menu (products with a few ingredients each) and a daily
+sales history in memory, shaped like the rows `recipe_matrix` and
+`sales_matrix` read, and computes the mean daily demand per ingredient
+twice: walking recipe rows for every (day, product) sale in Python, and
+as the sparse product `S @ R` the forecast uses. Both must agree.
+
+    python -m src.scripts.benchmark_forecast --days 3650 --products 300
+"""
+
+import argparse
+import time
+from collections import defaultdict
+
+import numpy as np
+from scipy import sparse
+
+
+def synthetic(days, products, ingredients, per_recipe, sold_per_day, seed=7):
+    rng = np.random.default_rng(seed)
+    recipes = [
+        (product, ingredient, float(rng.uniform(0.1, 3)))
+        for product in range(products)
+        for ingredient in rng.choice(ingredients, per_recipe, replace=False)
+    ]
+    sales = [
+        (day, int(product), int(rng.integers(1, 20)))
+        for day in range(days)
+        for product in rng.choice(products, sold_per_day, replace=False)
+    ]
+    return recipes, sales
+
+
+def with_loops(recipes, sales, days):
+    by_product = defaultdict(list)
+    for product, ingredient, quantity in recipes:
+        by_product[product].append((ingredient, quantity))
+    demand = defaultdict(float)
+    for day, product, sold in sales:
+        for ingredient, quantity in by_product[product]:
+            demand[ingredient] += quantity * sold
+    return {ingredient: total / days for ingredient, total in demand.items()}
+
+
+def with_matrices(recipes, sales, days, products, ingredients):
+    recipe = np.array(recipes, dtype=np.float64)
+    r = sparse.coo_matrix(
+        (recipe[:, 2], (recipe[:, 0].astype(int), recipe[:, 1].astype(int))),
+        shape=(products, ingredients),
+    ).tocsr()
+    sold = np.array(sales, dtype=np.float64)
+    s = sparse.coo_matrix(
+        (sold[:, 2], (sold[:, 0].astype(int), sold[:, 1].astype(int))),
+        shape=(days, products),
+    ).tocsr()
+    return np.asarray((s @ r).sum(axis=0)).ravel() / days
+
+
+def run(days, products, ingredients, per_recipe, sold_per_day, repeats):
+    recipes, sales = synthetic(days, products, ingredients, per_recipe, sold_per_day)
+    print(
+        f"{days} days x {products} products ({len(sales)} sales rows), "
+        f"{ingredients} ingredients, {len(recipes)} recipe rows"
+    )
+    timings = {}
+    for label, compute in (
+        ("loops", lambda: with_loops(recipes, sales, days)),
+        (
+            "sparse",
+            lambda: with_matrices(recipes, sales, days, products, ingredients),
+        ),
+    ):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            result = compute()
+        timings[label] = (time.perf_counter() - start) / repeats
+        print(f"  {label:<7} {timings[label] * 1000:9.2f} ms")
+        if label == "loops":
+            expected = np.zeros(ingredients)
+            for ingredient, rate in result.items():
+                expected[ingredient] = rate
+        else:
+            assert np.allclose(result, expected)
+    print(f"  speedup {timings['loops'] / timings['sparse']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--days", type=int, default=3650)
+    parser.add_argument("--products", type=int, default=300)
+    parser.add_argument("--ingredients", type=int, default=400)
+    parser.add_argument("--per-recipe", type=int, default=6)
+    parser.add_argument("--sold-per-day", type=int, default=80)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    run(
+        args.days,
+        args.products,
+        args.ingredients,
+        args.per_recipe,
+        args.sold_per_day,
+        args.repeats,
+    )
@@ -0,0 +1,72 @@
+"""
+Benchmark order codes: issue codes from many processes and threads at once.
+
+Every process stands for a gunicorn worker with its own `OrderCodeGenerator`
+and connection pool; its threads draw codes concurrently. The sequence is
+the only shared state, so the run checks that no code was issued twice and
+reports the combined rate. It only calls `nextval`, once per block, and
+needs `order_code_seq` to exist in DATABASE_URL.
+
+    python -m src.scripts.benchmark_order_codes --workers 4 --threads 8
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from src.api.order_codes import OrderCodeGenerator
+
+
+def worker(database_url: str, threads: int, codes_per_thread: int, queue):
+    engine = create_engine(database_url, pool_size=threads)
+    generator = OrderCodeGenerator()
+
+    def draw(_):
+        with Session(engine) as session:
+            return [generator.next(session) for _ in range(codes_per_thread)]
+
+    with ThreadPoolExecutor(threads) as pool:
+        codes = [code for batch in pool.map(draw, range(threads)) for code in batch]
+    engine.dispose()
+    queue.put(codes)
+
+
+def run(database_url: str, workers: int, threads: int, codes_per_thread: int):
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=worker, args=(database_url, threads, codes_per_thread, queue)
+        )
+        for _ in range(workers)
+    ]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    codes = [code for _ in processes for code in queue.get()]
+    elapsed = time.perf_counter() - start
+    for process in processes:
+        process.join()
+
+    duplicates = len(codes) - len(set(codes))
+    print(f"{workers} workers x {threads} threads, {len(codes)} codes")
+    print(f"  {'elapsed':<12} {elapsed * 1000:10.1f} ms")
+    print(f"  {'rate':<12} {len(codes) / elapsed:10.0f} codes/s")
+    print(f"  {'duplicates':<12} {duplicates:10d}")
+    print(f"  {'range':<12} {min(codes)} .. {max(codes)}")
+    if duplicates:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--codes", type=int, default=5000, help="per thread")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+    run(args.database_url, args.workers, args.threads, args.codes)
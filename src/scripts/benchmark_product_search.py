@@ -0,0 +1,116 @@
+"""
+Benchmark product search: the ILIKE listing against the fuzzy search mode.
+
+Inserts synthetic dishes into DATABASE_URL inside a transaction that is
+rolled back at the end, so it can run against any database that already has
+the schema. The fuzzy mode uses pg_trgm when the server has it and the
+in-memory `TrigramIndex` otherwise; the report says which.
+
+    python -m src.scripts.benchmark_product_search --products 20000
+"""
+
+import argparse
+import os
+import random
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from src.api.models import Dish, Product
+from src.api.product_queries import (
+    page_menu_listing,
+    page_menu_search,
+    select_menu_listing,
+)
+from src.api.product_search import TrigramIndex, product_search, search_document
+
+WORDS = (
+    "tacos pastor pollo res cerdo queso frijoles arroz salsa verde roja "
+    "chipotle aguacate limon cilantro cebolla tortilla maiz harina sopa "
+    "crema hongos chorizo camaron pescado mole poblano enchiladas tamales"
+).split()
+
+QUERIES = ("pastor", "enchiladsa", "camaron al mojo", "quesso", "zzz")
+
+
+def insert_products(session, count: int, seed: int = 7):
+    rng = random.Random(seed)
+    rows = [
+        {
+            "name": " ".join(rng.sample(WORDS, 2)).title(),
+            "description": " ".join(rng.sample(WORDS, 6)),
+            "price": rng.randint(50, 400),
+            "is_active": True,
+            "product_type": "DISH",
+        }
+        for _ in range(count)
+    ]
+    ids = session.scalars(
+        insert(Product).returning(Product.id, sort_by_parameter_order=True), rows
+    ).all()
+    session.execute(
+        insert(Dish.__table__),
+        [{"id": product_id, "dish_type": "MAIN"} for product_id in ids],
+    )
+    session.flush()
+
+
+def timed(label: str, fn, repeat: int):
+    fn()  # warm up caches and the query plan
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+    print(f"  {label:<28} {elapsed:8.2f} ms   {result}")
+
+
+def run(database_url: str, count: int, repeat: int):
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        session = Session(bind=connection)
+        try:
+            insert_products(session, count)
+            mode = "pg_trgm" if product_search.trigram_available(session) else "memory"
+            print(f"{count} synthetic products, fuzzy mode: {mode}")
+
+            rows = session.execute(
+                select_menu_listing().with_only_columns(Product.id, search_document)
+            ).all()
+            start = time.perf_counter()
+            index = TrigramIndex(rows)
+            build = (time.perf_counter() - start) * 1000
+            print(f"  {'build in-memory index':<28} {build:8.2f} ms")
+
+            for query in QUERIES:
+                print(f"query {query!r}")
+                timed(
+                    "ILIKE listing (hits)",
+                    lambda: page_menu_listing(
+                        session, select_menu_listing(query), 1, 10
+                    )[1],
+                    repeat,
+                )
+                timed(
+                    "fuzzy listing (hits)",
+                    lambda: page_menu_search(session, query, None, 1, 10)[1],
+                    repeat,
+                )
+                timed(
+                    "in-memory index only (hits)",
+                    lambda: len(index.search(query)),
+                    repeat,
+                )
+        finally:
+            session.close()
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+    run(args.database_url, args.products, args.repeat)
@@ -0,0 +1,120 @@
+"""
+Benchmark order list serialization: ORM objects against column tuples.
+
+Inserts synthetic orders (customer, creator, table and three details each)
+into DATABASE_URL inside a transaction that is rolled back at the end, then
+builds pages of orders the way the order listing does: ORM objects with
+their relationships loaded and `Order.serialize()`, or `select_order_rows`
+and `serialize_order_rows`. Each page is encoded with both JSON encoders.
+Times are per page, averaged over the repeats, split into loading and
+building the dicts and encoding them.
+
+    python -m src.scripts.benchmark_serialization --orders 5000 --per-page 100
+"""
+
+import argparse
+import os
+import time
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from src.api.json_encoding import encode
+from src.api.models import Order
+from src.api.order_queries import (
+    load_orders,
+    select_order_rows,
+    select_orders,
+    serialize_order_rows,
+)
+
+SEED = """
+WITH people AS (
+    INSERT INTO users (name, last_name, phone_number, email, password, role,
+                       is_active)
+    SELECT 'Bench', 'User ' || n, '0', 'bench-json-' || n || '@example.com',
+           'x', 'CLIENT', true
+    FROM generate_series(1, 20) AS n
+    RETURNING id
+), floor AS (
+    INSERT INTO tables (number, chairs, status)
+    SELECT 1000 + n, 4, 'FREE' FROM generate_series(1, 10) AS n
+    RETURNING id
+), picked AS (
+    SELECT array_agg(people.id) AS users,
+           (SELECT array_agg(id) FROM floor) AS tables
+    FROM people
+), placed AS (
+    INSERT INTO orders (order_code, user_id, creator_id, table_id, status,
+                        total, take_away, created_at, updated_at)
+    SELECT 'BENCHJ' || n, users[1 + n % 20], users[1 + (n + 1) % 20],
+           tables[1 + n % 10], 'DELIVERED', 31.5, false,
+           now() - n * interval '1 minute', now()
+    FROM picked, generate_series(1, :count) AS n
+    RETURNING id
+)
+INSERT INTO order_details (order_id, product_name, quantity, unit_price)
+SELECT placed.id, line.name, line.quantity, line.price
+FROM placed, (VALUES ('Tacos al pastor', 2, 9.5),
+                     ('Sopa de tortilla', 1, 6.0),
+                     ('Agua de jamaica', 2, 3.25)) AS line(name, quantity, price)
+"""
+
+
+def orm_page(session, per_page):
+    stmt = select_orders().order_by(Order.created_at.desc(), Order.id.desc())
+    return [order.serialize() for order in load_orders(session, stmt.limit(per_page))]
+
+
+def rows_page(session, per_page):
+    stmt = select_order_rows().order_by(Order.created_at.desc(), Order.id.desc())
+    return serialize_order_rows(session, session.execute(stmt.limit(per_page)).all())
+
+
+def measure(label, session, build, per_page, repeats):
+    build_time = 0.0
+    encode_times = {"json": 0.0, "orjson": 0.0}
+    for _ in range(repeats):
+        session.expunge_all()
+        start = time.perf_counter()
+        items = build(session, per_page)
+        build_time += time.perf_counter() - start
+        for encoder in encode_times:
+            start = time.perf_counter()
+            encode(items, encoder)
+            encode_times[encoder] += time.perf_counter() - start
+    ms = 1000 / repeats
+    print(
+        f"  {label:<6} load+build {build_time * ms:8.2f} ms"
+        f"   json {encode_times['json'] * ms:6.2f} ms"
+        f"   orjson {encode_times['orjson'] * ms:6.2f} ms"
+    )
+
+
+def run(database_url: str, count: int, per_page: int, repeats: int):
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            connection.execute(text(SEED), {"count": count})
+            session = Session(bind=connection)
+            print(f"{count} synthetic orders, {per_page} per page, {repeats} pages")
+            for _ in range(2):
+                # Warm up statement compilation and the connection
+                orm_page(session, per_page)
+                rows_page(session, per_page)
+            measure("ORM", session, orm_page, per_page, repeats)
+            measure("rows", session, rows_page, per_page, repeats)
+            session.close()
+        finally:
+            transaction.rollback()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+    run(args.database_url, args.orders, args.per_page, args.repeats)
@@ -0,0 +1,119 @@
+"""
+Benchmark cold worker boot for each SCHEMA_MODE.
+
+Starts 1, 4 and 16 processes at once, the way gunicorn forks its workers,
+each importing the app and calling `create_app()` against DATABASE_URL.
+For each worker it reports the time from the moment the batch was started
+until `create_app()` returned, which includes interpreter start and
+imports, the time spent in `create_app()` and, within it, in the schema
+step (`schema.prepare`).
+`reset` (what every worker used to do) wipes the database; it runs last
+and leaves an empty schema at the head revision behind.
+
+    python -m src.scripts.benchmark_startup --workers 1 4 16
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+BOOT = """
+import os, time
+from app import create_app
+from src.api import schema
+
+prepare = schema.prepare
+schema_time = 0.0
+
+
+def timed_prepare(*args, **kwargs):
+    global schema_time
+    start = time.perf_counter()
+    try:
+        return prepare(*args, **kwargs)
+    finally:
+        schema_time = time.perf_counter() - start
+
+
+schema.prepare = timed_prepare
+start = time.perf_counter()
+create_app()
+app_time = time.perf_counter() - start
+print(time.time() - float(os.environ["BENCH_START"]), app_time, schema_time)
+"""
+
+
+def boot_workers(database_url: str, mode: str, workers: int):
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        SCHEMA_MODE=mode,
+        FLASK_ENV="production",
+        PYTHONPATH=os.pathsep.join([os.path.join(ROOT, "src"), ROOT]),
+        BENCH_START=repr(time.time()),
+    )
+    start = time.perf_counter()
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", BOOT],
+            cwd=ROOT,
+            env=env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    times, errors = [], []
+    for process in processes:
+        out, err = process.communicate()
+        if process.returncode == 0:
+            times.append(tuple(map(float, out.strip().splitlines()[-1].split())))
+        else:
+            lines = [line for line in err.splitlines() if "Error" in line]
+            errors.append(lines[-1] if lines else "?")
+    return time.perf_counter() - start, times, errors
+
+
+def run(database_url: str, worker_counts, modes):
+    # Start from a database at the head revision
+    _, _, errors = boot_workers(database_url, "reset", 1)
+    if errors:
+        raise SystemExit(f"Could not prepare the database: {errors[0]}")
+
+    print(
+        f"{'mode':<7} {'workers':>7} {'all up':>9} {'median up':>10} "
+        f"{'create_app':>11} {'schema':>9} {'schema max':>11}"
+    )
+    for mode in modes:
+        for workers in worker_counts:
+            wall, times, errors = boot_workers(database_url, mode, workers)
+            if times:
+                ready, app_time, schema_time = (
+                    statistics.median(column) for column in zip(*times)
+                )
+                slowest = max(t[2] for t in times)
+                columns = (
+                    f"{ready:9.2f}s {app_time:10.3f}s {schema_time:8.3f}s "
+                    f"{slowest:10.3f}s"
+                )
+            else:
+                columns = f"{'-':>10} {'-':>11} {'-':>9} {'-':>11}"
+            print(f"{mode:<7} {workers:>7} {wall:8.2f}s {columns}", end="")
+            if errors:
+                print(f"  {len(errors)} failed: {errors[0][:90]}", end="")
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--modes", nargs="+", default=["check", "create", "reset"])
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    args = parser.parse_args()
+    run(args.database_url, args.workers, args.modes)